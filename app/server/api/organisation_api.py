@@ -60,6 +60,7 @@ class OrganisationAPI(MethodView):
         require_transfer_card = put_data.get('require_transfer_card')
         default_lat = put_data.get('default_lat')
         default_lng = put_data.get('default_lng')
+        system_wallet_pool_size = put_data.get('system_wallet_pool_size')
 
         if organisation_id is None:
             return make_response(jsonify({'message': 'No organisation ID provided'})), 400
@@ -78,6 +79,8 @@ class OrganisationAPI(MethodView):
             organisation.default_lat = default_lat
         if default_lng is not None:
             organisation.default_lng = default_lng
+        if system_wallet_pool_size is not None:
+            organisation.grow_system_blockchain_address_pool(int(system_wallet_pool_size))
 
         response_object = {
             'message': f'Organisation {organisation_id} successfully updated',
@@ -4,6 +4,7 @@ from flask.views import MethodView
 from server import db, bt
 from server.utils.misc import get_parsed_arg_list
 from server.utils.auth import requires_auth
+from server.utils.exchange_rate_matrix import get_exchange_rate_matrix
 from server.models.token import Token, TokenType
 from server.models.exchange import ExchangeContract
 from server.schemas import token_schema, tokens_schema
@@ -26,12 +27,15 @@ class TokenAPI(MethodView):
 
         exchange_pair_tokens = Token.query.filter(func.lower(Token.symbol).in_(exchange_pairs)).all()
 
-        tokens_schema.context = {'exchange_pairs': exchange_pair_tokens}
+        exchange_rate_matrix = get_exchange_rate_matrix() if exchange_pair_tokens else None
+
+        tokens_schema.context = {'exchange_pairs': exchange_pair_tokens, 'exchange_rate_matrix': exchange_rate_matrix}
 
         response_object = {
             'message': 'success',
             'data': {
-                'tokens': tokens_schema.dump(tokens).data
+                'tokens': tokens_schema.dump(tokens).data,
+                'rates_as_of_block': exchange_rate_matrix and exchange_rate_matrix.get('as_of_block')
             }
         }
 
@@ -1,6 +1,8 @@
 import datetime
 from typing import List
 
+import config
+
 from sqlalchemy.dialects.postgresql import JSON, JSONB
 from flask import current_app
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -10,7 +12,7 @@ from sqlalchemy.sql import func
 from server import db, bt
 from server.models.utils import BlockchainTaskableBase, ManyOrgBase
 from server.models.token import Token
-from server.models.transfer_account import TransferAccount
+from server.models.transfer_account import TransferAccount, TransferAccountType
 
 from server.exceptions import (
     NoTransferAccountError,
@@ -78,11 +80,22 @@ class CreditTransfer(ManyOrgBase, BlockchainTaskableBase):
         self._transfer_amount_wei = val * int(1e16)
 
     def send_blockchain_payload_to_worker(self, is_retry=False, queue='high-priority'):
-        sender_approval = self.sender_transfer_account.get_or_create_system_transfer_approval()
+        signing_address = self.sender_transfer_account.organisation.choose_system_blockchain_address(
+            self.sender_transfer_account
+        )
+
+        sender_approval = self.sender_transfer_account.get_or_create_system_transfer_approval(signing_address)
+
+        if config.ETH_MULTI_TRANSFER_CONTRACT_ADDRESS and self.sender_transfer_account.account_type == TransferAccountType.ORGANISATION:
+            # Lets the worker batch the organisation's disbursements. Not a prior task, since the worker sends
+            # transfers individually until the contract's allowance covers them
+            self.sender_transfer_account.get_or_create_system_transfer_approval(
+                config.ETH_MULTI_TRANSFER_CONTRACT_ADDRESS
+            )
 
         recipient_approval = self.recipient_transfer_account.get_or_create_system_transfer_approval()
         self.blockchain_task_uuid = bt.make_token_transfer(
-            signing_address=self.sender_transfer_account.organisation.system_blockchain_address,
+            signing_address=signing_address,
             token=self.token,
             from_address=self.sender_transfer_account.blockchain_address,
             to_address=self.recipient_transfer_account.blockchain_address,
@@ -1,7 +1,6 @@
 from sqlalchemy.dialects.postgresql import JSON
 from sqlalchemy.orm.attributes import flag_modified
 
-from functools import partial
 from flask import current_app
 
 from server import db, bt
@@ -17,7 +16,6 @@ from server.models.utils import (
 )
 
 from server.utils.transfer_account import find_transfer_accounts_with_matching_token
-from server.utils.root_solver import find_monotonic_increasing_bounds, false_position_method
 from server.exceptions import InsufficientBalanceError, SubexchangeNotFound
 
 
@@ -276,30 +274,20 @@ class Exchange(BlockchainTaskableBase):
 
         return exchange_contract
 
-    def _get_conversion_function(self, exchange_contract, from_token, to_token):
-        return partial(
-            bt.get_conversion_amount,
-            exchange_contract.blockchain_address,
-            from_token,
-            to_token,
-            exchange_contract.reserve_token
-        )
-
     def _estimate_from_amount(self, from_token, to_token, to_desired_amount):
-        max_error = 3e-15
-
         exchange_contract = self._find_exchange_contract(from_token, to_token)
-        conversion_func = self._get_conversion_function(exchange_contract, from_token, to_token)
-
-        def root_func(x):
-            return conversion_func(x) - to_desired_amount
 
-        x_lower, y_lower, x_upper, y_upper = find_monotonic_increasing_bounds(root_func, to_desired_amount)
+        from_amount = bt.get_inverse_conversion_amount(
+            exchange_contract=exchange_contract,
+            from_token=from_token,
+            to_token=to_token,
+            to_amount=to_desired_amount)
 
-        new_x, new_y = false_position_method(
-            root_func,
-            x_lower, y_lower,
-            x_upper, y_upper,
-            max_error, max_iterations=6)
+        # Rounding to whole token units means this can differ very slightly from the desired amount
+        calculated_to_amount = bt.get_conversion_amount(
+            exchange_contract=exchange_contract,
+            from_token=from_token,
+            to_token=to_token,
+            from_amount=from_amount)
 
-        return new_x, new_y + to_desired_amount
+        return from_amount, calculated_to_amount
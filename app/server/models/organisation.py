@@ -1,5 +1,6 @@
 from flask import current_app
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.dialects.postgresql import JSONB
 import pendulum
 import secrets
 
@@ -8,6 +9,7 @@ from server.models.utils import ModelBase, organisation_association_table
 import server.models.transfer_account
 from server.utils.misc import encrypt_string, decrypt_string
 from server.utils.access_control import AccessControl
+from server.utils.wallet_pool import choose_least_loaded_address
 import server.models.transfer_account
 from server.utils.misc import encrypt_string
 from server.constants import ISO_COUNTRIES
@@ -42,6 +44,9 @@ class Organisation(ModelBase):
     # This is the 'behind the scenes' blockchain address used for paying gas fees
     system_blockchain_address = db.Column(db.String)
 
+    # Extra system addresses that transfers are spread across, since each address can only send sequentially
+    system_blockchain_address_pool = db.Column(JSONB, default=[])
+
     users               = db.relationship(
         "User",
         secondary=organisation_association_table,
@@ -131,6 +136,45 @@ class Organisation(ModelBase):
 
     custom_welcome_message_key = db.Column(db.String)
 
+    @property
+    def system_blockchain_addresses(self):
+        return [self.system_blockchain_address] + (self.system_blockchain_address_pool or [])
+
+    def choose_system_blockchain_address(self, sender_transfer_account):
+        """
+        Chooses which system address signs a transfer from the given account.
+        Only addresses the account has already approved are considered, unless it hasn't approved any,
+        so that ordinary accounts aren't made to approve every address in the pool.
+        """
+        addresses = self.system_blockchain_addresses
+
+        approved_addresses = [a for a in addresses if sender_transfer_account.get_approval(a)]
+
+        return choose_least_loaded_address(approved_addresses or addresses)
+
+    def grow_system_blockchain_address_pool(self, pool_size):
+        """
+        Adds system addresses until there are pool_size in total, including the primary system address.
+        New addresses are topped up with ETH like the primary one, and approved to spend from the
+        org level transfer account straight away, since that's where disbursements come from.
+        """
+        new_addresses = []
+        for _ in range(pool_size - len(self.system_blockchain_addresses)):
+            new_addresses.append(bt.create_blockchain_wallet(
+                wei_target_balance=current_app.config['SYSTEM_WALLET_TARGET_BALANCE'],
+                wei_topup_threshold=current_app.config['SYSTEM_WALLET_TOPUP_THRESHOLD'],
+            ))
+
+        # Reassigned rather than appended to, so that the change to the JSONB column is picked up
+        self.system_blockchain_address_pool = (self.system_blockchain_address_pool or []) + new_addresses
+
+        org_transfer_account = self.queried_org_level_transfer_account
+        if org_transfer_account:
+            for address in new_addresses:
+                org_transfer_account.give_approval_to_address(address)
+
+        return new_addresses
+
     @staticmethod
     def master_organisation() -> "Organisation":
         return Organisation.query.filter_by(is_master=True).first()
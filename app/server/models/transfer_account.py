@@ -164,8 +164,8 @@ class TransferAccount(OneOrgBase, ModelBase, SoftDelete):
     def rounded_account_balance(self):
         return (self._balance_wei or 0) / int(1e18)
 
-    def get_or_create_system_transfer_approval(self):
-        sys_blockchain_address = self.organisation.system_blockchain_address
+    def get_or_create_system_transfer_approval(self, sys_blockchain_address=None):
+        sys_blockchain_address = sys_blockchain_address or self.organisation.system_blockchain_address
 
         approval = self.get_approval(sys_blockchain_address)
 
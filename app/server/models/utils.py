@@ -207,9 +207,7 @@ class BlockchainTaskableBase(ModelBase):
     @hybrid_property
     def blockchain_status(self):
         if self.blockchain_task_uuid:
-            task = bt.get_blockchain_task(self.blockchain_task_uuid)
-
-            return task.get('status', 'ERROR')
+            return bt.get_blockchain_task_statuses([self.blockchain_task_uuid])[self.blockchain_task_uuid]
         else:
             return 'UNKNOWN'
 
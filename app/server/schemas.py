@@ -1,14 +1,13 @@
 from flask import g
 
-from marshmallow import Schema, fields, post_dump
+from marshmallow import Schema, fields, pre_dump, post_dump
 import toastedmarshmallow
 
+from server import bt
 from server.models.custom_attribute import CustomAttribute
 from server.utils.amazon_s3 import get_file_url
 from server.models.user import User
-from server.models.exchange import Exchange
 from server.constants import GE_FILTER_ATTRIBUTES
-from server.exceptions import SubexchangeNotFound
 
 
 class LowerCase(fields.Field):
@@ -30,7 +29,46 @@ class SchemaBase(Schema):
 class BlockchainTaskableSchemaBase(SchemaBase):
 
     blockchain_task_uuid  = fields.Str(dump_only=True)
-    blockchain_status   = fields.Function(lambda obj: obj.blockchain_status)
+    blockchain_status   = fields.Method('get_blockchain_status')
+
+    def get_blockchain_status(self, obj):
+        if not obj.blockchain_task_uuid:
+            return 'UNKNOWN'
+
+        prefetched = self.context.get('blockchain_statuses', {})
+        if obj.blockchain_task_uuid in prefetched:
+            return prefetched[obj.blockchain_task_uuid]
+
+        return obj.blockchain_status
+
+    def dump(self, obj, many=None, update_fields=True, **kwargs):
+        # Nested schemas share the context, so the outermost dump owns the prefetched statuses.
+        # They're dropped once it's done, since the schemas are reused between requests
+        outermost = 'blockchain_statuses' not in self.context
+        if outermost:
+            self.context['blockchain_statuses'] = {}
+
+        try:
+            return super().dump(obj, many=many, update_fields=update_fields, **kwargs)
+        finally:
+            if outermost:
+                self.context.pop('blockchain_statuses', None)
+
+    @pre_dump(pass_many=True)
+    def prefetch_blockchain_statuses(self, data, many):
+        # Look up the statuses for a whole page at once rather than once per object,
+        # adding to any already prefetched by an outer schema
+        objs = data if many else [data]
+
+        prefetched = self.context.setdefault('blockchain_statuses', {})
+
+        missing = [obj.blockchain_task_uuid for obj in objs
+                   if getattr(obj, 'blockchain_task_uuid', None) and obj.blockchain_task_uuid not in prefetched]
+
+        if missing:
+            prefetched.update(bt.get_blockchain_task_statuses(missing))
+
+        return data
 
 class UserSchema(SchemaBase):
     first_name              = fields.Str()
@@ -125,15 +163,13 @@ class TokenSchema(SchemaBase):
     name                = fields.Str()
 
     def get_exchange_rates(self, obj):
+        rate_matrix = self.context.get('exchange_rate_matrix') or {}
+        token_rates = rate_matrix.get('rates', {}).get(str(obj.id), {})
+
         rates = {}
         for to_token in self.context.get('exchange_pairs', []):
-            if to_token != obj:
-                try:
-                    rate = Exchange.get_exchange_rate(obj, to_token)
-                    rates[to_token.symbol] = rate
-
-                except SubexchangeNotFound:
-                    pass
+            if to_token != obj and str(to_token.id) in token_rates:
+                rates[to_token.symbol] = token_rates[str(to_token.id)]
 
         return rates
 
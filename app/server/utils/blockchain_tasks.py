@@ -5,18 +5,22 @@ from eth_keys import keys
 from eth_utils import keccak
 import os
 import random
-from time import sleep
+import numpy as np
 
+from server import red
 from . import task_runner
+from server.utils.chain_read_cache import ChainReadCache
+from share import blockchain_task_status as task_status
 
 from server.utils.exchange import (
-    bonding_curve_tokens_to_reserve,
-    bonding_curve_reserve_to_tokens,
-    bonding_curve_token1_to_token2
+    bonding_curve_conversion,
+    bonding_curve_inverse_conversion
 )
 
-
 class BlockchainTasker(object):
+    def __init__(self):
+        self.read_cache = ChainReadCache(red)
+
     def _eth_endpoint(self, endpoint):
         eth_worker_name = 'eth_manager'
         celery_tasks_name = 'celery_tasks'
@@ -36,6 +40,10 @@ class BlockchainTasker(object):
         return response
 
     def _synchronous_call(self, contract_address, contract_type, func, args=None, signing_address=None, queue='high-priority'):
+        hit, cached_result = self.read_cache.get(contract_address, func, args, signing_address)
+        if hit:
+            return cached_result
+
         kwargs = {
             'contract_address': contract_address,
             'abi_type': contract_type,
@@ -43,7 +51,31 @@ class BlockchainTasker(object):
             'args': args,
             'signing_address': signing_address
         }
-        return self._execute_synchronous_celery(self._eth_endpoint('call_contract_function'), kwargs, queue=queue)
+        result = self._execute_synchronous_celery(self._eth_endpoint('call_contract_function'), kwargs, queue=queue)
+
+        self.read_cache.set(contract_address, func, result, args, signing_address)
+
+        return result
+
+    def _synchronous_batch_call(self, calls, block_identifier='latest', queue='high-priority'):
+        """
+        :param calls: list of dicts with contract_address, contract_type, func and optionally args keys
+        :return: list of results, in the same order as the calls. Failed calls return None
+        """
+        kwargs = {
+            'calls': [
+                {
+                    'contract_address': call['contract_address'],
+                    'abi_type': call['contract_type'],
+                    'function': call['func'],
+                    'args': call.get('args'),
+                    'signing_address': call.get('signing_address')
+                }
+                for call in calls
+            ],
+            'block_identifier': block_identifier
+        }
+        return self._execute_synchronous_celery(self._eth_endpoint('call_contract_functions'), kwargs, queue=queue)
 
     def _transaction_task(self,
                           signing_address,
@@ -79,27 +111,67 @@ class BlockchainTasker(object):
         """
         return self._execute_synchronous_celery(self._eth_endpoint('get_task'), {'task_uuid': task_uuid})
 
+    def get_blockchain_tasks(self, task_uuids):
+        """
+        Bulk version of get_blockchain_task, using a single worker call
+
+        :param task_uuids: list of blockchain task uuids
+        :return: dict of task uuid to serialised task dictionary. Unknown uuids are left out
+        """
+        return self._execute_synchronous_celery(self._eth_endpoint('get_tasks'), {'task_uuids': list(task_uuids)})
+
+    def get_blockchain_task_statuses(self, task_uuids):
+        """
+        Gets the status of many blockchain tasks at once. Statuses are read from the cache the worker pushes
+        them into whenever they change, and only tasks missing from the cache are fetched from the worker.
+
+        :param task_uuids: list of blockchain task uuids
+        :return: dict of task uuid to status
+        """
+        task_uuids = list(set(task_uuids))
+
+        if not task_uuids:
+            return {}
+
+        cached = red.mget([task_status.TASK_STATUS_KEY_PREFIX + uuid for uuid in task_uuids])
+
+        statuses = {}
+        missing = []
+        for uuid, status in zip(task_uuids, cached):
+            if status is None:
+                missing.append(uuid)
+            else:
+                statuses[uuid] = status.decode()
+
+        if missing:
+            tasks = self.get_blockchain_tasks(missing)
+            for uuid in missing:
+                statuses[uuid] = (tasks.get(uuid) or {}).get('status', 'ERROR')
+
+        return statuses
+
     def await_task_success(self,
                            task_uuid,
                            timeout=None,
-                           poll_frequency=0.5):
-        elapsed = 0
+                           recheck_interval=5):
+        """
+        Blocks until the task succeeds, waking up on the status notifications published by the worker
+        rather than repeatedly asking it for the task.
 
+        :return: Serialised Task Dictionary, see get_blockchain_task
+        """
         if timeout is None:
             timeout = current_app.config['SYNCRONOUS_TASK_TIMEOUT']
 
-        while timeout is None or elapsed <= timeout:
-            task = self.get_blockchain_task(task_uuid)
-            if task is None:
-                return None
+        def get_status():
+            status = self.get_blockchain_task_statuses([task_uuid])[task_uuid]
+            # The worker doesn't know about the task
+            return None if status == 'ERROR' else status
 
-            if task['status'] == 'SUCCESS':
-                return task
-            else:
-                sleep(poll_frequency)
-                elapsed += poll_frequency
+        if task_status.await_task_success(red, task_uuid, get_status, timeout, recheck_interval) is None:
+            return None
 
-        raise TimeoutError
+        return self.get_blockchain_task(task_uuid)
 
     def retry_task(self, task_uuid):
         task_runner.delay_task(self._eth_endpoint('retry_task'), {'task_uuid': task_uuid })
@@ -280,82 +352,107 @@ class BlockchainTasker(object):
             prior_tasks=prior_tasks
         )
 
-    def get_conversion_amount(self, exchange_contract, from_token, to_token, from_amount, signing_address=None):
+    def get_exchange_snapshot(self, exchange_contract):
         """
-        Estimates the conversion amount received from a Liquid Token Contract network
+        Snapshots the state of every sub-exchange in a Liquid Token Contract network, at a single block.
+        Snapshots are cached per block, so quotes made within a block cost no calls to the worker at all.
+
         :param exchange_contract: the base convert contract used in the network
-        :param from_token: the token being exchanged from
-        :param to_token: the token being exchanged to
-        :param from_amount: the amount of the token being exchanged from
+        :return: dict of token address to [token supply, sub-exchange reserve, sub-exchange reserve ratio ppm]
         """
+        cache_name = f'ExchangeSnapshot-{exchange_contract.blockchain_address}'
 
-        def get_token_exchange_details(token):
-            subexchange_details = exchange_contract.get_subexchange_details(token.address)
-            subexchange_address = subexchange_details['subexchange_address']
+        hit, snapshot = self.read_cache.get_block_scoped(cache_name)
+        if hit:
+            return snapshot
 
-            token_supply = self._synchronous_call(
-                contract_address=token.address,
-                contract_type='ERC20',
-                func='totalSupply'
-            )
+        reserve_token = exchange_contract.reserve_token
+        subexchanges = exchange_contract.subexchange_address_mapping or {}
+
+        calls = []
+        for token_address, details in subexchanges.items():
+            calls.append({
+                'contract_address': token_address,
+                'contract_type': 'ERC20',
+                'func': 'totalSupply'
+            })
+            calls.append({
+                'contract_address': reserve_token.address,
+                'contract_type': 'ERC20',
+                'func': 'balanceOf',
+                'args': [details['subexchange_address']]
+            })
+
+        results = self._synchronous_batch_call(calls, block_identifier=self.read_cache.get_latest_block() or 'latest')
+
+        snapshot = {}
+        for i, (token_address, details) in enumerate(subexchanges.items()):
+            token_supply, subexchange_reserve = results[2 * i], results[2 * i + 1]
+            snapshot[token_address] = [token_supply, subexchange_reserve, details['subexchange_reserve_ratio_ppm']]
+
+        self.read_cache.set_block_scoped(cache_name, snapshot)
+
+        return snapshot
+
+    def _get_subexchange_states(self, exchange_contract, from_token, to_token):
+        snapshot = self.get_exchange_snapshot(exchange_contract)
+
+        def state(token):
+            if token == exchange_contract.reserve_token:
+                return None
 
-            subexchange_reserve = self._synchronous_call(
-                contract_address=reserve_token.address,
-                contract_type='ERC20',
-                func='balanceOf',
-                args=[subexchange_address]
-            )
+            # Raises SubexchangeNotFound if the token isn't in the network
+            exchange_contract.get_subexchange_details(token.address)
 
-            subexchange_reserve_ratio_ppm = subexchange_details['subexchange_reserve_ratio_ppm']
+            return snapshot[token.address]
 
-            return token_supply, subexchange_reserve, subexchange_reserve_ratio_ppm
+        return state(from_token), state(to_token)
 
-        raw_from_amount = from_token.system_amount_to_token(from_amount)
+    def get_conversion_amount(self, exchange_contract, from_token, to_token, from_amount, signing_address=None):
+        """
+        Estimates the conversion amount received from a Liquid Token Contract network.
+        The conversion is calculated locally from a per-block snapshot of the network, rather than on chain.
+        :param exchange_contract: the base convert contract used in the network
+        :param from_token: the token being exchanged from
+        :param to_token: the token being exchanged to
+        :param from_amount: the amount of the token being exchanged from
+        """
 
-        reserve_token = exchange_contract.reserve_token
+        from_state, to_state = self._get_subexchange_states(exchange_contract, from_token, to_token)
 
-        from_is_reserve = from_token == reserve_token
-        to_is_reserve = to_token == reserve_token
+        raw_from_amount = from_token.system_amount_to_token(from_amount)
 
-        if (not from_is_reserve) and (not to_is_reserve):
+        to_amount = round(bonding_curve_conversion(from_state, to_state, raw_from_amount))
 
-            (from_token_supply,
-             from_subexchange_reserve,
-             from_subexchange_reserve_ratio_ppm) = get_token_exchange_details(from_token)
+        return to_token.token_amount_to_system(to_amount)
 
-            (to_token_supply,
-             to_subexchange_reserve,
-             to_subexchange_reserve_ratio_ppm) = get_token_exchange_details(to_token)
+    def get_conversion_amounts(self, exchange_contract, from_token, to_token, from_amounts):
+        """
+        Vectorised version of get_conversion_amount, for quoting many amounts against the same snapshot
+        """
+        from_state, to_state = self._get_subexchange_states(exchange_contract, from_token, to_token)
 
-            to_amount = bonding_curve_token1_to_token2(from_token_supply, to_token_supply,
-                                                       from_subexchange_reserve, to_subexchange_reserve,
-                                                       from_subexchange_reserve_ratio_ppm,
-                                                       to_subexchange_reserve_ratio_ppm,
-                                                       raw_from_amount)
+        raw_from_amounts = np.array([from_token.system_amount_to_token(a) for a in from_amounts], dtype=float)
 
-        elif not from_is_reserve:
-            (from_token_supply,
-             from_subexchange_reserve,
-             from_subexchange_reserve_ratio_ppm) = get_token_exchange_details(from_token)
+        to_amounts = np.round(bonding_curve_conversion(from_state, to_state, raw_from_amounts))
 
-            to_amount = bonding_curve_tokens_to_reserve(from_token_supply,
-                                                        from_subexchange_reserve,
-                                                        from_subexchange_reserve_ratio_ppm,
-                                                        raw_from_amount)
+        return [to_token.token_amount_to_system(a) for a in to_amounts]
 
-        else:
-            (to_token_supply,
-             to_subexchange_reserve,
-             to_subexchange_reserve_ratio_ppm) = get_token_exchange_details(to_token)
+    def get_inverse_conversion_amount(self, exchange_contract, from_token, to_token, to_amount):
+        """
+        Estimates the amount of the from token required to receive to_amount of the to token
+        :param exchange_contract: the base convert contract used in the network
+        :param from_token: the token being exchanged from
+        :param to_token: the token being exchanged to
+        :param to_amount: the desired amount of the token being exchanged to
+        """
+        from_state, to_state = self._get_subexchange_states(exchange_contract, from_token, to_token)
 
-            to_amount = bonding_curve_reserve_to_tokens(to_token_supply,
-                                                        to_subexchange_reserve,
-                                                        to_subexchange_reserve_ratio_ppm,
-                                                        raw_from_amount)
+        raw_to_amount = to_token.system_amount_to_token(to_amount)
 
-        to_amount = round(to_amount)
+        from_amount = round(bonding_curve_inverse_conversion(from_state, to_state, raw_to_amount))
 
-        return to_token.token_amount_to_system(to_amount)
+        return from_token.token_amount_to_system(from_amount)
 
     def _get_path(self, from_token, to_token, reserve_token):
 
@@ -401,6 +498,28 @@ class BlockchainTasker(object):
 
         return balance_wei
 
+    def get_wallet_balances(self, addresses, token, queue='high-priority'):
+        """
+        Gets the token balances of many wallets in a single call to the worker
+        :param addresses: list of wallet addresses
+        :param token: ERC20 token to get the balances of
+        :return: dict of address to balance in wei
+        """
+        balances = self._synchronous_batch_call(
+            [
+                {
+                    'contract_address': token.address,
+                    'contract_type': 'ERC20',
+                    'func': 'balanceOf',
+                    'args': [address]
+                }
+                for address in addresses
+            ],
+            queue=queue
+        )
+
+        return dict(zip(addresses, balances))
+
     def get_allowance(self, token, owner_address, spender_address):
 
         allowance_wei = self._synchronous_call(
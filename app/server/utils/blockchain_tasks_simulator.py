@@ -36,12 +36,22 @@ def call_contract_function(kwargs, args):
         result = function_results['default']
     return FakeCeleryAsyncResult(result=result)
 
+def call_contract_functions(kwargs, args):
+    results = [
+        call_contract_function({'function': call['function']}, None).result
+        for call in kwargs.get('calls', [])
+    ]
+    return FakeCeleryAsyncResult(result=results)
+
 def transact_with_contract_function(kwargs, args):
     return FakeCeleryAsyncResult()
 
 def get_task(kwargs, args):
     return FakeCeleryAsyncResult()
 
+def get_tasks(kwargs, args):
+    return FakeCeleryAsyncResult(result={})
+
 def retry_task(kwargs, args):
     return FakeCeleryAsyncResult()
 
@@ -0,0 +1,88 @@
+import hashlib
+import json
+
+# Published by the eth worker's block watcher every time it sees a new block
+LATEST_BLOCK_KEY = 'LatestBlockNumber'
+
+# Results of these functions never change for a given contract
+IMMUTABLE_FUNCTIONS = {'decimals', 'name', 'symbol'}
+
+
+class ChainReadCache(object):
+    """
+    Read-through cache for contract calls made by the app.
+    Results that depend on chain state are keyed by the latest block number published by the eth worker, so they're
+    invalidated as soon as a new block arrives. If no block number has been published, those calls aren't cached.
+    Results of immutable functions such as decimals are cached regardless of block.
+    """
+
+    def __init__(self, red, block_ttl_seconds=120, immutable_ttl_seconds=60 * 60 * 24 * 7):
+        self.red = red
+
+        # Only needs to outlive a block or two - old block entries are never read again
+        self.block_ttl_seconds = block_ttl_seconds
+
+        # Long rather than forever, since local test chains get reset with the same contract addresses
+        self.immutable_ttl_seconds = immutable_ttl_seconds
+
+    def get_latest_block(self):
+        latest_block = self.red.get(LATEST_BLOCK_KEY)
+        return int(latest_block) if latest_block is not None else None
+
+    def _key(self, contract_address, func, args, signing_address, block):
+        call_hash = hashlib.sha256(
+            json.dumps([contract_address, func, args, signing_address], sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+        return f'ChainRead-{block}-{call_hash}'
+
+    def get_block_scoped(self, name):
+        """
+        Gets a value derived from chain state, such as a snapshot of many calls, cached for the latest block
+        :return: tuple of (hit, value)
+        """
+        block = self.get_latest_block()
+        if block is None:
+            return False, None
+
+        cached = self.red.get(f'ChainRead-{block}-{name}')
+        if cached is None:
+            return False, None
+
+        return True, json.loads(cached)
+
+    def set_block_scoped(self, name, value):
+        block = self.get_latest_block()
+        if block is None:
+            return
+
+        self.red.set(f'ChainRead-{block}-{name}', json.dumps(value), ex=self.block_ttl_seconds)
+
+    def _cache_block(self, func):
+        if func in IMMUTABLE_FUNCTIONS:
+            return 'immutable'
+
+        return self.get_latest_block()
+
+    def get(self, contract_address, func, args=None, signing_address=None):
+        """
+        :return: tuple of (hit, value)
+        """
+        block = self._cache_block(func)
+        if block is None:
+            return False, None
+
+        cached = self.red.get(self._key(contract_address, func, args, signing_address, block))
+        if cached is None:
+            return False, None
+
+        return True, json.loads(cached)
+
+    def set(self, contract_address, func, value, args=None, signing_address=None):
+        block = self._cache_block(func)
+        if block is None or value is None:
+            return
+
+        ttl = self.immutable_ttl_seconds if block == 'immutable' else self.block_ttl_seconds
+
+        self.red.set(self._key(contract_address, func, args, signing_address, block), json.dumps(value), ex=ttl)
@@ -24,3 +24,41 @@ def bonding_curve_token1_to_token2(t1_supply, t2_supply,
 
     return bonding_curve_reserve_to_tokens(t2_supply, converter2_reserve, converter2_rr_ppm, intermediate_reserve)
 
+
+
+def bonding_curve_conversion(from_state, to_state, from_amount):
+    """
+    Converts between two tokens on a network of liquid token sub-exchanges that share a reserve token.
+    Works on scalars, or numpy arrays of amounts to quote many conversions at once.
+
+    :param from_state: (supply, reserve, reserve_ratio_ppm) of the from token's sub-exchange, or None if the
+    from token is the reserve token
+    :param to_state: as above, for the to token
+    :param from_amount: raw amount of the from token
+    :return: raw amount of the to token
+    """
+    if from_state is None:
+        reserve = from_amount
+    else:
+        reserve = bonding_curve_tokens_to_reserve(*from_state, from_amount)
+
+    if to_state is None:
+        return reserve
+
+    return bonding_curve_reserve_to_tokens(*to_state, reserve)
+
+
+def bonding_curve_inverse_conversion(from_state, to_state, to_amount):
+    """
+    The inverse of bonding_curve_conversion: the raw amount of the from token required to receive to_amount.
+    The reserve/token curves are each other's inverse, so this is exact and needs no root finding.
+    """
+    if to_state is None:
+        reserve = to_amount
+    else:
+        reserve = bonding_curve_tokens_to_reserve(*to_state, to_amount)
+
+    if from_state is None:
+        return reserve
+
+    return bonding_curve_reserve_to_tokens(*from_state, reserve)
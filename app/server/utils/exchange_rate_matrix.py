@@ -0,0 +1,147 @@
+import json
+import threading
+import time
+
+import sentry_sdk
+from flask import current_app
+
+import config
+from server import db, red, bt
+from server.models.exchange import ExchangeContract
+from server.exceptions import SubexchangeNotFound
+
+RATE_MATRIX_KEY = 'ExchangeRateMatrix'
+RATE_MATRIX_REFRESH_LOCK = 'ExchangeRateMatrixRefresh'
+
+# Used when the eth worker isn't publishing block numbers
+RATE_MATRIX_MAX_AGE_SECONDS = 60
+
+# How often the background refresher checks for a new block
+RATE_MATRIX_CHECK_INTERVAL_SECONDS = 1
+
+_refresher_thread = None
+_refresher_thread_lock = threading.Lock()
+
+
+def calculate_exchange_rate_matrix():
+    """
+    Calculates the exchange rate between every pair of tokens exchangeable through the same exchange contract.
+    Each exchange contract's state is snapshotted once, so this costs one worker call per contract
+    no matter how many pairs there are.
+    :return: dict of from token id to dict of to token id to rate, keyed with strings to survive json
+    """
+    rates = {}
+    for exchange_contract in ExchangeContract.query.all():
+        tokens = [exchange_contract.reserve_token] + list(exchange_contract.exchangeable_tokens)
+
+        for from_token in tokens:
+            for to_token in tokens:
+                if from_token == to_token:
+                    continue
+                try:
+                    rate = bt.get_conversion_amount(
+                        exchange_contract=exchange_contract,
+                        from_token=from_token,
+                        to_token=to_token,
+                        from_amount=1)
+
+                    rates.setdefault(str(from_token.id), {})[str(to_token.id)] = rate
+
+                except SubexchangeNotFound:
+                    pass
+
+    return rates
+
+
+def refresh_exchange_rate_matrix():
+    as_of_block = bt.read_cache.get_latest_block()
+
+    matrix = {
+        'rates': calculate_exchange_rate_matrix(),
+        'as_of_block': as_of_block,
+        'calculated_at': time.time()
+    }
+
+    red.set(RATE_MATRIX_KEY, json.dumps(matrix))
+
+    return matrix
+
+
+def _is_stale(matrix):
+    latest_block = bt.read_cache.get_latest_block()
+
+    if latest_block is not None and matrix.get('as_of_block') is not None:
+        return matrix['as_of_block'] < latest_block
+
+    return time.time() - matrix['calculated_at'] > RATE_MATRIX_MAX_AGE_SECONDS
+
+
+def refresh_exchange_rate_matrix_if_stale():
+    """
+    Refreshes the matrix if it's missing, or a block behind. Only one process refreshes at a time.
+    :return: whether the matrix was refreshed
+    """
+    cached = red.get(RATE_MATRIX_KEY)
+    if cached is not None and not _is_stale(json.loads(cached)):
+        return False
+
+    lock = red.lock(RATE_MATRIX_REFRESH_LOCK, timeout=60)
+    if not lock.acquire(blocking=False):
+        # Another process is already refreshing
+        return False
+
+    try:
+        refresh_exchange_rate_matrix()
+    finally:
+        lock.release()
+
+    return True
+
+
+def _run_refresher(app):
+    with app.app_context():
+        while True:
+            try:
+                refresh_exchange_rate_matrix_if_stale()
+            except Exception as e:
+                sentry_sdk.capture_exception(e)
+            finally:
+                db.session.remove()
+
+            time.sleep(RATE_MATRIX_CHECK_INTERVAL_SECONDS)
+
+
+def start_exchange_rate_matrix_refresher():
+    """
+    Starts refreshing the matrix in the background of this process: once per block when the eth worker's block watcher
+    is publishing block numbers, and every RATE_MATRIX_MAX_AGE_SECONDS otherwise.
+    Does nothing if this process's refresher is already running. Threads don't survive uwsgi forking its workers,
+    so this is called on use rather than when the app is created.
+    """
+    global _refresher_thread
+
+    if config.IS_TEST:
+        return
+
+    with _refresher_thread_lock:
+        if _refresher_thread is None or not _refresher_thread.is_alive():
+            _refresher_thread = threading.Thread(
+                target=_run_refresher, args=(current_app._get_current_object(),), daemon=True
+            )
+            _refresher_thread.start()
+
+
+def get_exchange_rate_matrix():
+    """
+    Gets the precomputed exchange rate matrix. It's only ever calculated in the background,
+    so until the first calculation has finished there are no rates, and as_of_block is None.
+    :return: dict with 'rates' (see calculate_exchange_rate_matrix) and 'as_of_block'
+    """
+    start_exchange_rate_matrix_refresher()
+
+    cached = red.get(RATE_MATRIX_KEY)
+
+    if cached is None:
+        return {'rates': {}, 'as_of_block': None}
+
+    return json.loads(cached)
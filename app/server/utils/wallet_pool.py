@@ -0,0 +1,37 @@
+from server import red
+
+# Written by the eth worker, which counts the unfinished tasks for each signing wallet every few seconds
+PENDING_DEPTH_KEY = 'SigningWalletPendingDepth'
+
+# KEYS[1]: pending depth hash
+# ARGV: candidate addresses
+# Returns the address with the lowest depth, after bumping its depth. Ties go to the earliest candidate
+CHOOSE_SCRIPT = """
+local depths = redis.call('HMGET', KEYS[1], unpack(ARGV))
+local chosen = 1
+local lowest = tonumber(depths[1]) or 0
+for i = 2, #ARGV do
+    local depth = tonumber(depths[i]) or 0
+    if depth < lowest then
+        chosen = i
+        lowest = depth
+    end
+end
+redis.call('HINCRBY', KEYS[1], ARGV[chosen], 1)
+return ARGV[chosen]
+"""
+
+_choose_and_bump = red.register_script(CHOOSE_SCRIPT)
+
+
+def choose_least_loaded_address(addresses):
+    """
+    Picks the signing address with the fewest unfinished tasks queued against it.
+    The chosen address's count is bumped straight away, so that a burst of transfers between
+    the worker's recounts is spread across the pool rather than all landing on the same address.
+    Reading and bumping is done in one script, so concurrent requests can't both pick the same address.
+    """
+    if len(addresses) == 1:
+        return addresses[0]
+
+    return _choose_and_bump(keys=[PENDING_DEPTH_KEY], args=addresses).decode()
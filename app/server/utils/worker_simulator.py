@@ -3,8 +3,10 @@ from . import blockchain_tasks_simulator
 endpoint_simulators = {
     'eth_manager.celery_tasks.deploy_contract': blockchain_tasks_simulator.deploy_contract,
     'eth_manager.celery_tasks.call_contract_function': blockchain_tasks_simulator.call_contract_function,
+    'eth_manager.celery_tasks.call_contract_functions': blockchain_tasks_simulator.call_contract_functions,
     'eth_manager.celery_tasks.transact_with_contract_function': blockchain_tasks_simulator.transact_with_contract_function,
     'eth_manager.celery_tasks.get_task': blockchain_tasks_simulator.get_task,
+    'eth_manager.celery_tasks.get_tasks': blockchain_tasks_simulator.get_tasks,
     'eth_manager.celery_tasks.retry_task': blockchain_tasks_simulator.retry_task,
     'eth_manager.celery_tasks.retry_failed': blockchain_tasks_simulator.retry_failed,
     'eth_manager.celery_tasks.create_new_blockchain_wallet': blockchain_tasks_simulator.create_new_blockchain_wallet,
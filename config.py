@@ -192,6 +192,8 @@ else:
     ACTIVE_DATABASE_PORT = DATABASE_PORT
 
 ETH_DATABASE_HOST = config_parser['DATABASE'].get('eth_host') or ACTIVE_DATABASE_HOST
+# 'null' opens a new connection for every task, 'queue' keeps a bounded pool of connections per worker process
+ETH_WORKER_DB_POOL_MODE = config_parser['DATABASE'].get('eth_worker_pool_mode', 'null').lower()
 ETH_WORKER_DB_POOL_SIZE = config_parser['DATABASE'].getint('eth_worker_pool_size', 40)
 ETH_WORKER_DB_POOL_OVERFLOW = config_parser['DATABASE'].getint('eth_worker_pool_overflow', 160)
 
@@ -290,6 +292,10 @@ ETH_GAS_PRICE           = int(config_parser['ETHEREUM']['gas_price_gwei'] or 0)
 ETH_GAS_LIMIT           = int(config_parser['ETHEREUM']['gas_limit'] or 0)
 ETH_TARGET_TRANSACTION_TIME = int(config_parser['ETHEREUM']['target_transaction_time'] or 120)
 ETH_GAS_PRICE_PROVIDER  = config_parser['ETHEREUM']['gas_price_provider']
+ETH_GAS_PRICE_REFRESH_INTERVAL = config_parser['ETHEREUM'].getint('gas_price_refresh_interval', 30)
+# Added to gas limits learned from receipts. Covers storage that a transaction initialises but the transactions
+# it was learned from didn't, such as the balance of a new token holder, at 20000 gas per storage slot
+ETH_GAS_PROFILE_HEADROOM = config_parser['ETHEREUM'].getint('gas_profile_headroom', 40000)
 ETH_CONTRACT_NAME       = 'SempoCredit{}_v{}'.format(DEPLOYMENT_NAME, str(ETH_CONTRACT_VERSION))
 
 ETH_CHECK_TRANSACTION_BASE_TIME = 20
@@ -337,6 +343,57 @@ EXCHANGE_CONTRACT_ADDRESS = config_parser['ETHEREUM'].get('exchange_contract_add
 
 SYNCRONOUS_TASK_TIMEOUT = config_parser['ETHEREUM'].getint('synchronous_task_timeout', 4)
 CALL_TIMEOUT = config_parser['ETHEREUM'].getint('call_timeout', 2)
+ETH_RPC_BATCH_SIZE = config_parser['ETHEREUM'].getint('rpc_batch_size', 500)
+
+# 'locked' claims nonces under a per-wallet redis lock, 'redis' uses the lock-free allocator with background reconciliation
+ETH_NONCE_ALLOCATOR = config_parser['ETHEREUM'].get('nonce_allocator', 'locked').lower()
+ETH_NONCE_RECONCILE_INTERVAL = config_parser['ETHEREUM'].getint('nonce_reconcile_interval', 15)
+
+# 'polling' checks each transaction's receipt with its own celery task, 'block' leaves it to the block watcher process
+ETH_TRANSACTION_WATCHER = config_parser['ETHEREUM'].get('transaction_watcher', 'polling').lower()
+ETH_BLOCK_WATCHER_POLL_INTERVAL = config_parser['ETHEREUM'].getfloat('block_watcher_poll_interval', 1)
+
+# 'chain' hands each step of a transaction attempt to its own celery task, 'fused' submits it within the attempt task,
+# 'async' leaves sending and receipt checking to the async submitter process
+ETH_SUBMIT_PIPELINE = config_parser['ETHEREUM'].get('submit_pipeline', 'chain').lower()
+ETH_ASYNC_SUBMITTER_MAX_IN_FLIGHT = config_parser['ETHEREUM'].getint('async_submitter_max_in_flight', 500)
+ETH_ASYNC_SUBMITTER_CONNECTIONS = config_parser['ETHEREUM'].getint('async_submitter_connections', 50)
+
+# Worker metrics are kept in redis and served in Prometheus format by the metrics exporter,
+# and are also sent to StatsD when a host is set
+ETH_STATSD_HOST = config_parser['ETHEREUM'].get('statsd_host')
+ETH_STATSD_PORT = config_parser['ETHEREUM'].getint('statsd_port', 8125)
+ETH_METRICS_EXPORTER_PORT = config_parser['ETHEREUM'].getint('metrics_exporter_port', 9102)
+
+# Encodes ERC20 transfer, transferFrom and approve calls directly, rather than through a web3 contract
+ETH_ERC20_FAST_PATH = config_parser['ETHEREUM'].getboolean('erc20_fast_path', True)
+
+# When non-zero, processor tasks are routed to queues processor-0 ... processor-(n-1) by signing address
+ETH_PROCESSOR_PARTITIONS = config_parser['ETHEREUM'].getint('processor_partitions', 0)
+
+# Decrypted signing keys are kept in each worker process's memory for this many seconds. 0 disables the cache
+ETH_SIGNING_KEY_CACHE_SIZE = config_parser['ETHEREUM'].getint('signing_key_cache_size', 1000)
+ETH_SIGNING_KEY_CACHE_TTL = config_parser['ETHEREUM'].getint('signing_key_cache_ttl', 300)
+
+# Resending of transactions that haven't been mined, and same-nonce replacement at a higher gas price. 0 disables
+ETH_REBROADCAST_INTERVAL = config_parser['ETHEREUM'].getint('rebroadcast_interval', 0)
+ETH_REBROADCAST_AFTER = config_parser['ETHEREUM'].getint('rebroadcast_after', 60)
+ETH_REBROADCASTS_BEFORE_REPLACEMENT = config_parser['ETHEREUM'].getint('rebroadcasts_before_replacement', 2)
+ETH_REPLACEMENT_GAS_PRICE_MULTIPLIER = config_parser['ETHEREUM'].getfloat('replacement_gas_price_multiplier', 1.2)
+ETH_MAX_GAS_PRICE_REPLACEMENTS = config_parser['ETHEREUM'].getint('max_gas_price_replacements', 5)
+# How many blocks deep an unknown transaction's use of a nonce must be before ours at that nonce is failed
+ETH_NONCE_CONSUMED_CONFIRMATIONS = config_parser['ETHEREUM'].getint('nonce_consumed_confirmations', 12)
+
+# Scanning for nonces that a wallet's transactions are stuck behind, and how long a gap is left before filling. 0 disables
+ETH_NONCE_GAP_SCAN_INTERVAL = config_parser['ETHEREUM'].getint('nonce_gap_scan_interval', 0)
+ETH_NONCE_GAP_FILL_AFTER = config_parser['ETHEREUM'].getint('nonce_gap_fill_after', 30)
+
+# When set, ERC20 transfers from the same wallet and token are combined into calls to this multi-transfer contract.
+# transferFrom calls are combined too, for source accounts that have approved the contract, like organisation accounts
+ETH_MULTI_TRANSFER_CONTRACT_ADDRESS = config_parser['ETHEREUM'].get('multi_transfer_contract_address')
+ETH_MULTI_TRANSFER_WINDOW = config_parser['ETHEREUM'].getfloat('multi_transfer_window', 2)
+ETH_MULTI_TRANSFER_MAX_BATCH_SIZE = config_parser['ETHEREUM'].getint('multi_transfer_max_batch_size', 200)
+ETH_MULTI_TRANSFER_GAS_BUDGET = config_parser['ETHEREUM'].getint('multi_transfer_gas_budget', 6000000)
 
 FACEBOOK_TOKEN = common_secrets_parser['FACEBOOK']['token']
 FACEBOOK_VERIFY_TOKEN = common_secrets_parser['FACEBOOK']['verify_token']
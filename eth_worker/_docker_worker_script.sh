@@ -3,6 +3,19 @@ sleep 10
 
 WORKER_CONCURRENCY=4
 
+# The queues that processor tasks are routed to (see TransactionProcessor.get_processor_queue).
+# Used when PROCESSOR_QUEUES doesn't pin a replica to its own partitions, so no partition is left unconsumed
+default_processor_queues() {
+  local partitions
+  partitions=$(python -c 'import config; print(config.ETH_PROCESSOR_PARTITIONS)') || exit 1
+
+  if [ "$partitions" -gt 0 ]; then
+    seq -s, -f 'processor-%g' 0 $((partitions - 1))
+  else
+    echo processor
+  fi
+}
+
 echo "Running docker worker script"
 if [ "$CONTAINER_MODE" = 'TEST' ]; then
   echo pass
@@ -13,18 +26,31 @@ elif [ "$CONTAINER_TYPE" == 'FILTER' ]; then
   python ethereum_filter_test.py
 elif [ "$CONTAINER_TYPE" == 'PROCESSOR' ]; then
   echo "Starting Processor Worker"
-  celery -A eth_manager worker --loglevel=INFO --concurrency=$WORKER_CONCURRENCY --pool=eventlet -Q=processor --without-gossip --without-mingle
+  # Set PROCESSOR_QUEUES to this replica's partition(s), eg processor-0, to split partitions between replicas
+  PROCESSOR_QUEUES=${PROCESSOR_QUEUES:-$(default_processor_queues)} || exit 1
+  echo "Consuming $PROCESSOR_QUEUES"
+  celery -A eth_manager worker --loglevel=INFO --concurrency=$WORKER_CONCURRENCY --pool=eventlet -Q=$PROCESSOR_QUEUES --without-gossip --without-mingle
 elif [ "$CONTAINER_TYPE" == 'LOW_PRIORITY_WORKER' ]; then
   echo "Starting Low Priority Worker"
   celery -A eth_manager worker --loglevel=INFO --concurrency=$WORKER_CONCURRENCY --pool=eventlet -Q=low-priority,celery --without-gossip --without-mingle
 elif [ "$CONTAINER_TYPE" == 'HIGH_PRIORITY_WORKER' ]; then
   echo "Starting High Priority Worker"
   celery -A eth_manager worker --loglevel=INFO --concurrency=$WORKER_CONCURRENCY --pool=eventlet -Q=high-priority --without-gossip --without-mingle
+elif [ "$CONTAINER_TYPE" == 'BLOCK_WATCHER' ]; then
+  echo "Starting Block Watcher"
+  python -m eth_manager.block_watcher
+elif [ "$CONTAINER_TYPE" == 'METRICS_EXPORTER' ]; then
+  echo "Starting Metrics Exporter"
+  python -m eth_manager.metrics_exporter
+elif [ "$CONTAINER_TYPE" == 'ASYNC_SUBMITTER' ]; then
+  echo "Starting Async Submitter"
+  python -m eth_manager.async_submitter
 elif [ "$CONTAINER_TYPE" == 'FLOWER' ]; then
   flower -A worker --port=5555
 elif [ "$CONTAINER_TYPE" == 'ANY_PRIORITY_WORKER' ]; then
   echo "Starting Any Priority Worker"
-  celery -A eth_manager worker --loglevel=INFO --concurrency=$WORKER_CONCURRENCY --pool=eventlet -Q=low-priority,celery,high-priority,processor --without-gossip --without-mingle
+  PROCESSOR_QUEUES=${PROCESSOR_QUEUES:-$(default_processor_queues)} || exit 1
+  celery -A eth_manager worker --loglevel=INFO --concurrency=$WORKER_CONCURRENCY --pool=eventlet -Q=low-priority,celery,high-priority,$PROCESSOR_QUEUES --without-gossip --without-mingle
 
 else
   echo "Running alembic upgrade (Default)"
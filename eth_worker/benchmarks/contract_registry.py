@@ -0,0 +1,143 @@
+"""
+Reports the startup time and memory saved by the contract registry's lazy loading, and the cost of contract
+lookups with and without its caches. No node is needed, but importing eth_manager needs the worker's config.
+
+Run from the eth_worker directory:
+    python -m benchmarks.contract_registry --count 200
+"""
+import argparse
+import importlib
+import json
+import os
+import sys
+import tracemalloc
+from time import perf_counter
+
+from web3 import Web3
+
+from eth_manager.contract_registry import ContractRegistry, COMPILED_CONTRACTS_DIR
+
+ABI_MODULES = {
+    'ERC20': 'eth_manager.ABIs.erc20_abi',
+    'Dai': 'eth_manager.ABIs.dai_abi',
+    'bancor_converter': 'eth_manager.ABIs.bancor_converter_abi',
+    'bancor_network': 'eth_manager.ABIs.bancor_network_abi',
+    'MultiTransfer': 'eth_manager.ABIs.multi_transfer_abi',
+}
+
+TOKEN_ADDRESS = '0xc4375b7de8af5a38a93548eb8453a498222c4ff2'
+
+
+def measure(fn):
+    """
+    :return: tuple of (seconds taken, bytes still allocated afterwards)
+    """
+    for module_name in ABI_MODULES.values():
+        sys.modules.pop(module_name, None)
+
+    tracemalloc.start()
+    start = perf_counter()
+
+    result = fn()
+
+    elapsed = perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Keep the result alive until memory has been measured
+    del result
+
+    return elapsed, allocated
+
+
+def eager_startup(w3):
+    registry = ContractRegistry(w3)
+    for name, module_name in ABI_MODULES.items():
+        registry.register_abi(name, importlib.import_module(module_name).abi)
+    return registry
+
+
+def lazy_startup(w3):
+    registry = ContractRegistry(w3)
+    for name, module_name in ABI_MODULES.items():
+        registry.register_abi_module(name, module_name)
+    return registry
+
+
+def uncached_compiled_contract(w3, contract_name):
+    # What get_compiled_contract did before artifacts were cached
+    with open(f'{COMPILED_CONTRACTS_DIR}/{contract_name}.json') as json_file:
+        data = json.load(json_file)
+    return w3.eth.contract(abi=data['abi'], bytecode=data['bytecode'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=200, help='lookups per run')
+    options = parser.parse_args()
+
+    w3 = Web3()
+
+    print('Startup')
+    eager_time, eager_memory = measure(lambda: eager_startup(w3))
+    lazy_time, lazy_memory = measure(lambda: lazy_startup(w3))
+    print(f'  eager ABI imports: {1000 * eager_time:8.2f} ms {eager_memory / 1024:10.1f} KiB')
+    print(f'  lazy ABI modules:  {1000 * lazy_time:8.2f} ms {lazy_memory / 1024:10.1f} KiB')
+
+    # A typical worker only ever uses a few ABI types, so that's what's held in the steady state
+    def steady_state():
+        registry = lazy_startup(w3)
+        registry.get_contract_by_address(TOKEN_ADDRESS, 'ERC20')
+        registry.get_compiled_contract('SmartToken')
+        return registry
+
+    _, steady_memory = measure(steady_state)
+    print(f'  ERC20 and one artifact in use: {steady_memory / 1024:.1f} KiB')
+
+    contract_names = [f[:-len('.json')] for f in os.listdir(COMPILED_CONTRACTS_DIR) if f.endswith('.json')]
+
+    def everything():
+        registry = lazy_startup(w3)
+        for name in ABI_MODULES:
+            registry.get_contract_factory(name)
+        for name in contract_names:
+            registry.get_compiled_contract(name)
+        return registry
+
+    _, everything_memory = measure(everything)
+    print(f'  every ABI and artifact loaded: {everything_memory / 1024:.1f} KiB')
+
+    print(f'\n{options.count} lookups')
+    registry = lazy_startup(w3)
+
+    start = perf_counter()
+    for _ in range(options.count):
+        uncached_compiled_contract(w3, 'SmartToken')
+    uncached = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(options.count):
+        registry.get_compiled_contract('SmartToken')
+    cached = perf_counter() - start
+
+    print(f'  compiled contract, read from disk: {1000 * uncached / options.count:8.3f} ms')
+    print(f'  compiled contract, cached:         {1000 * cached / options.count:8.3f} ms')
+
+    start = perf_counter()
+    for _ in range(options.count):
+        w3.eth.contract(address=Web3.toChecksumAddress(TOKEN_ADDRESS), abi=registry.get_abi('ERC20'))
+    per_address = perf_counter() - start
+
+    start = perf_counter()
+    for _ in range(options.count):
+        registry.get_contract_factory('ERC20')(address=Web3.toChecksumAddress(TOKEN_ADDRESS))
+    from_factory = perf_counter() - start
+
+    print(f'  new token contract, from ABI:      {1000 * per_address / options.count:8.3f} ms')
+    print(f'  new token contract, from factory:  {1000 * from_factory / options.count:8.3f} ms')
+
+    print(f'\nRegistry stats: {registry.get_stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Compares building ERC20 transactions through a web3 contract, as process_function_transaction used to for
+every call, with the pre-encoded fast path. No node is needed, but importing eth_manager needs the worker's config.
+
+Run from the eth_worker directory:
+    python -m benchmarks.erc20_fast_path --count 2000
+"""
+import argparse
+from time import perf_counter
+
+from eth_account import Account
+from web3 import Web3
+
+from eth_manager.contract_registry import ContractRegistry
+from eth_manager.erc20_encoding import build_erc20_transaction
+
+TOKEN_ADDRESS = '0xc4375b7de8af5a38a93548eb8453a498222c4ff2'
+RECIPIENT_ADDRESS = '0x0d1d4e623D10F9FBA5Db95830F7d3839406C6AF2'
+
+METADATA = {
+    'gas': 100000,
+    'gasPrice': 10 ** 9,
+    'chainId': 1
+}
+
+
+def web3_path(registry, nonce):
+    function = registry.get_contract_function(TOKEN_ADDRESS, 'transfer', 'ERC20')
+    return function(RECIPIENT_ADDRESS, 10 ** 18).buildTransaction({**METADATA, 'nonce': nonce})
+
+
+def fast_path(registry, nonce):
+    return {**build_erc20_transaction(TOKEN_ADDRESS, 'transfer', (RECIPIENT_ADDRESS, 10 ** 18)),
+            **METADATA, 'nonce': nonce}
+
+
+def time_path(build, registry, count, private_key=None):
+    start = perf_counter()
+
+    for nonce in range(count):
+        txn = build(registry, nonce)
+        if private_key:
+            Account.signTransaction(txn, private_key)
+
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=2000, help='transactions per run')
+    options = parser.parse_args()
+
+    w3 = Web3()
+    registry = ContractRegistry(w3)
+    registry.register_abi_module('ERC20', 'eth_manager.ABIs.erc20_abi')
+
+    private_key = Account.create().privateKey
+
+    # Both paths should produce the same transaction, and be timed with the contract already registered
+    assert web3_path(registry, 0) == fast_path(registry, 0), 'Fast path transaction differs from web3'
+
+    print(f'{options.count} ERC20 transfers')
+    print(f'{"":<20}{"web3 (ms/tx)":>15}{"fast (ms/tx)":>15}{"speedup":>10}')
+
+    for label, key in [('build', None), ('build and sign', private_key)]:
+        web3_time = time_path(web3_path, registry, options.count, key)
+        fast_time = time_path(fast_path, registry, options.count, key)
+
+        print(f'{label:<20}'
+              f'{1000 * web3_time / options.count:>15.3f}'
+              f'{1000 * fast_time / options.count:>15.3f}'
+              f'{web3_time / fast_time:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
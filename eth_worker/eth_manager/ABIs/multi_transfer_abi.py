@@ -0,0 +1,62 @@
+abi = """
+[
+    {
+        "constant": false,
+        "inputs": [
+            {
+                "name": "_token",
+                "type": "address"
+            },
+            {
+                "name": "_recipients",
+                "type": "address[]"
+            },
+            {
+                "name": "_amounts",
+                "type": "uint256[]"
+            }
+        ],
+        "name": "multiTransfer",
+        "outputs": [
+            {
+                "name": "",
+                "type": "bool"
+            }
+        ],
+        "payable": false,
+        "stateMutability": "nonpayable",
+        "type": "function"
+    },
+    {
+        "constant": false,
+        "inputs": [
+            {
+                "name": "_token",
+                "type": "address"
+            },
+            {
+                "name": "_from",
+                "type": "address"
+            },
+            {
+                "name": "_recipients",
+                "type": "address[]"
+            },
+            {
+                "name": "_amounts",
+                "type": "uint256[]"
+            }
+        ],
+        "name": "multiTransferFrom",
+        "outputs": [
+            {
+                "name": "",
+                "type": "bool"
+            }
+        ],
+        "payable": false,
+        "stateMutability": "nonpayable",
+        "type": "function"
+    }
+]
+"""
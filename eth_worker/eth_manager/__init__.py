@@ -1,6 +1,7 @@
 # https://stackoverflow.com/questions/54617308/pip-install-produces-the-following-error-on-mac-error-command-gcc-failed-wit
 # python3.7 / concurrent / futures/thread.py line 135 was originally self._work_queue = queue.SimpleQueue()
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 import sentry_sdk
 from sentry_sdk.integrations.celery import CeleryIntegration
 import redis, requests
@@ -16,7 +17,7 @@ from web3 import (
 
 from web3.exceptions import BadFunctionCallOutput
 
-from sqlalchemy.pool import NullPool
+from sqlalchemy.pool import NullPool, QueuePool
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, relationship
@@ -31,14 +32,8 @@ sys.path.append(os.getcwd())
 import config
 from sql_persistence.interface import SQLPersistenceInterface
 
-from eth_manager.ABIs import (
-    dai_abi,
-    erc20_abi,
-    bancor_converter_abi,
-    bancor_network_abi
-)
-
 from eth_manager.processor import TransactionProcessor
+from eth_manager.metrics import Metrics
 from eth_manager.contract_registry import ContractRegistry
 from eth_manager.exceptions import WalletExistsError
 from eth_manager import utils
@@ -49,6 +44,11 @@ eth_config = dict()
 eth_config['ethereum_chain_id'] = config.ETH_CHAIN_ID
 eth_config['gas_price_gwei'] = config.ETH_GAS_PRICE
 eth_config['gas_limit'] = config.ETH_GAS_LIMIT
+eth_config['nonce_allocator'] = config.ETH_NONCE_ALLOCATOR
+eth_config['transaction_watcher'] = config.ETH_TRANSACTION_WATCHER
+eth_config['submit_pipeline'] = config.ETH_SUBMIT_PIPELINE
+eth_config['processor_partitions'] = config.ETH_PROCESSOR_PARTITIONS
+eth_config['multi_transfer_contract_address'] = config.ETH_MULTI_TRANSFER_CONTRACT_ADDRESS
 
 ETH_CHECK_TRANSACTION_RETRIES = config.ETH_CHECK_TRANSACTION_RETRIES
 ETH_CHECK_TRANSACTION_RETRIES_TIME_LIMIT = config.ETH_CHECK_TRANSACTION_RETRIES_TIME_LIMIT
@@ -65,15 +65,58 @@ celery_app.conf.beat_schedule = {
         "task": utils.eth_endpoint('topup_wallets'),
         "schedule": 600.0
     },
+    "sweep_blocked_tasks": {
+        "task": utils.eth_endpoint('sweep_blocked_tasks'),
+        "schedule": 60.0
+    },
+    "publish_wallet_pending_depths": {
+        "task": utils.eth_endpoint('publish_wallet_pending_depths'),
+        "schedule": 5.0
+    },
 }
 
+if config.ETH_GAS_PRICE_PROVIDER:
+    celery_app.conf.beat_schedule['refresh_gas_price'] = {
+        "task": utils.eth_endpoint('refresh_gas_price'),
+        "schedule": float(config.ETH_GAS_PRICE_REFRESH_INTERVAL)
+    }
+
+if config.ETH_REBROADCAST_INTERVAL:
+    celery_app.conf.beat_schedule['rebroadcast_stale_transactions'] = {
+        "task": utils.eth_endpoint('rebroadcast_stale_transactions'),
+        "schedule": float(config.ETH_REBROADCAST_INTERVAL)
+    }
+
+if config.ETH_NONCE_GAP_SCAN_INTERVAL:
+    celery_app.conf.beat_schedule['fill_nonce_gaps'] = {
+        "task": utils.eth_endpoint('fill_nonce_gaps'),
+        "schedule": float(config.ETH_NONCE_GAP_SCAN_INTERVAL)
+    }
+
+if config.ETH_NONCE_ALLOCATOR == 'redis':
+    celery_app.conf.beat_schedule['reconcile_nonces'] = {
+        "task": utils.eth_endpoint('reconcile_nonces'),
+        "schedule": float(config.ETH_NONCE_RECONCILE_INTERVAL)
+    }
+
 w3 = Web3(HTTPProvider(config.ETH_HTTP_PROVIDER))
 
 red = redis.Redis.from_url(config.REDIS_URL)
 
+if config.ETH_WORKER_DB_POOL_MODE == 'queue':
+    # Sized per worker process. With the eventlet pool, that's the number of tasks running at once
+    pool_args = {
+        'poolclass': QueuePool,
+        'pool_size': config.ETH_WORKER_DB_POOL_SIZE,
+        'max_overflow': config.ETH_WORKER_DB_POOL_OVERFLOW,
+        'pool_recycle': 1800
+    }
+else:
+    pool_args = {'poolclass': NullPool}
+
 engine = create_engine(
     config.ETH_DATABASE_URI,
-    poolclass=NullPool,
+    **pool_args,
     connect_args={'connect_timeout': 5},
     pool_pre_ping=True,
     echo=False,
@@ -82,15 +125,32 @@ engine = create_engine(
 
 session_factory = sessionmaker(autocommit=False, autoflush=True, bind=engine)
 
-persistence_interface = SQLPersistenceInterface(w3=w3, red=red, session_factory=session_factory)
+
+@worker_process_init.connect
+def dispose_inherited_connections(**kwargs):
+    # Pooled connections opened before a prefork worker forks can't be shared with its children
+    engine.dispose()
+
+
+metrics = Metrics(red, statsd_host=config.ETH_STATSD_HOST, statsd_port=config.ETH_STATSD_PORT)
+
+persistence_interface = SQLPersistenceInterface(w3=w3, red=red, session_factory=session_factory, metrics=metrics)
 
 blockchain_processor = TransactionProcessor(
     **eth_config,
     w3=w3,
     red=red,
-    persistence_interface=persistence_interface
+    persistence_interface=persistence_interface,
+    metrics=metrics
 )
 
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def clear_signing_keys(**kwargs):
+    blockchain_processor.signing_key_cache.clear()
+
+
 import eth_manager.celery_tasks
 #
 # blockchain_processor.registry.register_contract(
@@ -115,7 +175,9 @@ def register_tokens_from_app(host_address, auth_username, auth_password):
 
         for token in token_req.json()['data']['tokens']:
             try:
-                blockchain_processor.registry.register_contract(token['address'], dai_abi.abi)
+                blockchain_processor.registry.register_contract(
+                    token['address'], blockchain_processor.registry.get_abi('Dai')
+                )
             except BadFunctionCallOutput as e:
                 # It's probably a contract on a different chain
                 if not config.IS_PRODUCTION:
@@ -129,9 +191,12 @@ def register_tokens_from_app(host_address, auth_username, auth_password):
         return False
 
 
-blockchain_processor.registry.register_abi('ERC20', erc20_abi.abi)
-blockchain_processor.registry.register_abi('bancor_converter', bancor_converter_abi.abi)
-blockchain_processor.registry.register_abi('bancor_network', bancor_network_abi.abi)
+# Only imported when first used
+blockchain_processor.registry.register_abi_module('ERC20', 'eth_manager.ABIs.erc20_abi')
+blockchain_processor.registry.register_abi_module('Dai', 'eth_manager.ABIs.dai_abi')
+blockchain_processor.registry.register_abi_module('bancor_converter', 'eth_manager.ABIs.bancor_converter_abi')
+blockchain_processor.registry.register_abi_module('bancor_network', 'eth_manager.ABIs.bancor_network_abi')
+blockchain_processor.registry.register_abi_module('MultiTransfer', 'eth_manager.ABIs.multi_transfer_abi')
 
 # contracts_registered = False
 # attempts = 0
@@ -0,0 +1,213 @@
+import asyncio
+import datetime
+import logging
+from itertools import count
+
+import aiohttp
+from celery import signature
+from web3.datastructures import AttributeDict
+from eth_utils import to_int
+
+import config
+from eth_manager import utils
+from eth_manager.exceptions import TaskRetriesExceededError
+
+ASYNC_SUBMIT_QUEUE_KEY = 'AsyncSubmitQueue'
+
+logger = logging.getLogger('eth_manager.async_submitter')
+
+
+class JSONRPCError(Exception):
+    pass
+
+
+class AsyncSubmitter(object):
+    """
+    Sends signed transactions and waits for their receipts from a single asyncio process,
+    so that hundreds of them can be in flight at once over a pool of keep-alive connections to the node,
+    rather than each RPC call holding up a celery worker for a full round trip.
+
+    Transactions are still built, given a nonce and signed by the processor tasks. With the 'async' submit pipeline,
+    those tasks journal the signed transaction and queue its id here instead of sending it themselves.
+    Database work is done synchronously on the event loop thread, so the processor's session is never shared
+    between threads.
+    """
+
+    # Errors that mean the node already has the transaction, so it can be treated as sent
+    KNOWN_TRANSACTION_ERRORS = ['already known', 'known transaction']
+
+    def _pop(self, max_count):
+        popped = self.red.blpop(ASYNC_SUBMIT_QUEUE_KEY, timeout=1)
+        if popped is None:
+            return []
+
+        pipe = self.red.pipeline()
+        for _ in range(max_count - 1):
+            pipe.lpop(ASYNC_SUBMIT_QUEUE_KEY)
+
+        return [int(popped[1])] + [int(i) for i in pipe.execute() if i is not None]
+
+    async def rpc(self, method, params):
+        payload = {'jsonrpc': '2.0', 'id': next(self._request_ids), 'method': method, 'params': params}
+
+        async with self.http_session.post(self.provider_url, json=payload) as response:
+            response.raise_for_status()
+            body = await response.json()
+
+        if 'error' in body:
+            raise JSONRPCError(body['error'].get('message', 'JSON-RPC Error'))
+
+        return body['result']
+
+    async def submit(self, transaction_id):
+        self.in_flight += 1
+        try:
+            await self._submit(transaction_id)
+        except Exception:
+            logger.exception(f'Async submit of transaction {transaction_id} failed')
+            self.processor.metrics.increment('async_submit_errors')
+            self.persistence_interface.session.rollback()
+        finally:
+            self.in_flight -= 1
+
+    async def _submit(self, transaction_id):
+        # Other submissions use the session while this one is waiting on the node,
+        # so nothing loaded from it is held across an await
+        transaction = self.persistence_interface.get_transaction(transaction_id)
+        tx_hash, raw_transaction = transaction.hash, transaction.raw_transaction
+
+        try:
+            with self.processor.metrics.span('send_raw_transaction', transaction_id=transaction_id):
+                await self.rpc('eth_sendRawTransaction', [raw_transaction])
+
+        except JSONRPCError as e:
+            if not any(known in str(e) for known in self.KNOWN_TRANSACTION_ERRORS):
+                return self._handle_send_failure(tx_hash, str(e))
+
+        # Includes any batched transfers carried by the transaction
+        submitted_date = str(datetime.datetime.utcnow())
+        self.persistence_interface.bulk_update_transaction_data([
+            (t.id, {'submitted_date': submitted_date})
+            for t in self.persistence_interface.get_unresolved_transactions_by_hash([tx_hash])
+        ])
+        self.processor.metrics.increment('async_submitted')
+
+        if self.processor.transaction_watcher == 'block':
+            # The block watcher picks the transaction up by hash once it's mined
+            return
+
+        with self.processor.metrics.span('wait_for_receipt', transaction_id=transaction_id):
+            receipt = await self.wait_for_receipt(tx_hash)
+
+        if receipt is None:
+            # Still unmined, so keep checking from the processor like the chain pipeline does. Otherwise the expiry
+            # would fail it, and retrying the task could send it again after the original is mined
+            signature(utils.eth_endpoint('_check_transaction_response'), args=(transaction_id,)).apply_async()
+            self.processor.metrics.increment('async_receipt_timeouts')
+            return
+
+        transaction = self.persistence_interface.get_transaction(transaction_id)
+        self.processor.resolve_transaction(transaction, self.processor.transaction_result_from_receipt(receipt))
+
+    def _handle_send_failure(self, tx_hash, message):
+        # Includes any batched transfers carried by the transaction
+        transactions = self.persistence_interface.get_unresolved_transactions_by_hash([tx_hash])
+
+        self.persistence_interface.bulk_update_transaction_data([
+            (t.id, {
+                'status': 'FAILED',
+                'error': 'PreBlockchainError',
+                'message': f'Transaction {t.id}: {message}',
+                'nonce_consumed': False
+            })
+            for t in transactions
+        ])
+
+        for transaction in transactions:
+            try:
+                self.processor.new_transaction_attempt(transaction.task)
+            except TaskRetriesExceededError:
+                pass
+
+    async def wait_for_receipt(self, tx_hash):
+        interval = self.receipt_poll_interval
+        waited = 0
+
+        while waited < self.receipt_timeout:
+            await asyncio.sleep(interval)
+            waited += interval
+
+            receipt = await self.rpc('eth_getTransactionReceipt', [tx_hash])
+
+            if receipt is not None and receipt.get('blockNumber') is not None:
+                return AttributeDict({
+                    'blockNumber': to_int(hexstr=receipt['blockNumber']),
+                    'status': to_int(hexstr=receipt['status']),
+                    'gasUsed': to_int(hexstr=receipt['gasUsed']),
+                    'contractAddress': receipt.get('contractAddress')
+                })
+
+            interval = min(interval * 2, self.max_receipt_poll_interval)
+
+        return None
+
+    async def run_async(self):
+        loop = asyncio.get_event_loop()
+
+        connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+        async with aiohttp.ClientSession(connector=connector) as self.http_session:
+            while True:
+                # Don't pull more off the queue than can be put in flight
+                capacity = self.max_in_flight - self.in_flight
+                if capacity <= 0:
+                    await asyncio.sleep(0.1)
+                    continue
+
+                transaction_ids = await loop.run_in_executor(None, self._pop, capacity)
+
+                for transaction_id in transaction_ids:
+                    loop.create_task(self.submit(transaction_id))
+
+                self.processor.metrics.gauge('async_in_flight', self.in_flight + len(transaction_ids))
+
+    def run(self):
+        logger.info(f'Starting async submitter, with up to {self.max_in_flight} transactions in flight')
+        asyncio.get_event_loop().run_until_complete(self.run_async())
+
+    def __init__(self, red, persistence_interface, processor,
+                 provider_url=None,
+                 max_in_flight=500,
+                 max_connections=50,
+                 receipt_poll_interval=2,
+                 max_receipt_poll_interval=15,
+                 receipt_timeout=600):
+
+        self.red = red
+
+        self.persistence_interface = persistence_interface
+        self.processor = processor
+
+        self.provider_url = provider_url
+        self.max_in_flight = max_in_flight
+        self.max_connections = max_connections
+
+        self.receipt_poll_interval = receipt_poll_interval
+        self.max_receipt_poll_interval = max_receipt_poll_interval
+        self.receipt_timeout = receipt_timeout
+
+        self.http_session = None
+        self.in_flight = 0
+        self._request_ids = count()
+
+
+if __name__ == '__main__':
+    from eth_manager import red, persistence_interface, blockchain_processor
+
+    AsyncSubmitter(
+        red=red,
+        persistence_interface=persistence_interface,
+        processor=blockchain_processor,
+        provider_url=config.ETH_HTTP_PROVIDER,
+        max_in_flight=config.ETH_ASYNC_SUBMITTER_MAX_IN_FLIGHT,
+        max_connections=config.ETH_ASYNC_SUBMITTER_CONNECTIONS
+    ).run()
@@ -0,0 +1,117 @@
+import logging
+from time import sleep
+
+import config
+
+logger = logging.getLogger('eth_manager.block_watcher')
+
+
+class BlockWatcher(object):
+    """
+    Follows the chain block by block and resolves every unresolved transaction mined in each block in one pass,
+    rather than polling for each transaction's receipt separately.
+    Confirmation latency is about one block time, and broker traffic no longer grows with the number of
+    pending transactions.
+
+    Transactions that never get mined are still failed by the pending transaction expiry in the persistence interface.
+    """
+
+    LAST_BLOCK_KEY = 'BlockWatcher-LastBlock'
+
+    # Read by the app to key its cache of contract call results
+    LATEST_BLOCK_KEY = 'LatestBlockNumber'
+
+    def get_last_processed_block(self):
+        last_block = self.red.get(self.LAST_BLOCK_KEY)
+        return int(last_block) if last_block is not None else None
+
+    def set_last_processed_block(self, block_number):
+        self.red.set(self.LAST_BLOCK_KEY, block_number)
+
+    def process_block(self, block_number):
+        block = self.w3.eth.getBlock(block_number)
+
+        hashes = [tx_hash.hex() for tx_hash in block.transactions]
+
+        if not hashes:
+            return 0
+
+        transactions = self.persistence_interface.get_unresolved_transactions_by_hash(hashes)
+
+        # Transfers sent in the same multi-transfer batch share a hash, so each receipt is only fetched once
+        results_by_hash = {}
+        for transaction in transactions:
+            if transaction.hash not in results_by_hash:
+                results_by_hash[transaction.hash] = self.processor.check_transaction_hash(transaction.hash)
+
+        results = [(transaction, results_by_hash[transaction.hash]) for transaction in transactions]
+
+        self.persistence_interface.bulk_update_transaction_data(
+            [(transaction.id, result) for transaction, result in results]
+        )
+
+        for transaction, result in results:
+            self.processor.handle_transaction_result(transaction, result)
+
+        return len(results)
+
+    def poll(self):
+        latest_block = self.w3.eth.blockNumber
+
+        # Expires so that the app stops caching by block if the watcher goes down
+        self.red.set(self.LATEST_BLOCK_KEY, latest_block, ex=30)
+
+        last_processed = self.get_last_processed_block()
+        if last_processed is None:
+            last_processed = latest_block - 1
+
+        # Don't try and catch up on an unbounded backlog in one go after downtime
+        to_block = min(latest_block, last_processed + self.max_blocks_per_poll)
+
+        for block_number in range(last_processed + 1, to_block + 1):
+            with self.processor.metrics.span('process_block', block_number=block_number):
+                resolved = self.process_block(block_number)
+            self.set_last_processed_block(block_number)
+
+            if resolved:
+                logger.debug(f'Block {block_number}: resolved {resolved} transactions')
+
+        return to_block
+
+    def run(self):
+        logger.info(f'Starting block watcher, polling every {self.poll_interval} seconds')
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception('Block watcher poll failed')
+                self.processor.metrics.increment('block_watcher_poll_failures')
+            finally:
+                self.persistence_interface.session.remove()
+
+            sleep(self.poll_interval)
+
+    def __init__(self, w3, red, persistence_interface, processor,
+                 poll_interval=1,
+                 max_blocks_per_poll=100):
+
+        self.w3 = w3
+        self.red = red
+
+        self.persistence_interface = persistence_interface
+        self.processor = processor
+
+        self.poll_interval = poll_interval
+        self.max_blocks_per_poll = max_blocks_per_poll
+
+
+if __name__ == '__main__':
+    from eth_manager import w3, red, persistence_interface, blockchain_processor
+
+    BlockWatcher(
+        w3=w3,
+        red=red,
+        persistence_interface=persistence_interface,
+        processor=blockchain_processor,
+        poll_interval=config.ETH_BLOCK_WATCHER_POLL_INTERVAL
+    ).run()
@@ -11,7 +11,7 @@ from eth_manager.exceptions import (
 )
 class SqlAlchemyTask(celery.Task):
     """An abstract Celery Task that ensures that the connection the the
-    database is closed on task completion"""
+    database is closed (or returned to the pool) on task completion"""
     abstract = True
 
     def after_return(self, status, retval, task_id, args, kwargs, einfo):
@@ -67,6 +67,13 @@ processor_task_config = {
     'retry_backoff': False
 }
 
+# Batches are popped off their queue before processing, so retrying the task would find nothing to do.
+# Failures are retried per transaction instead.
+batch_processor_task_config = {
+    **processor_task_config,
+    'max_retries': 0
+}
+
 # @signals.task_failure.connect
 # def on_task_failure(**kwargs):
 #     print('[task:%s]' % (kwargs['sender'].request.correlation_id, )
@@ -136,6 +143,11 @@ def call_contract_function(self, contract_address, function, abi_type=None, args
                                                        signing_address)
 
 
+@celery_app.task(**base_task_config)
+def call_contract_functions(self, calls, block_identifier='latest'):
+    return blockchain_processor.call_contract_functions(calls, block_identifier)
+
+
 @celery_app.task(**base_task_config)
 def transact_with_contract_function(self, contract_address, function,  abi_type=None, args=None, kwargs=None,
                                     signing_address=None, encrypted_private_key=None,
@@ -178,6 +190,36 @@ def retry_task(self, task_uuid):
 def retry_failed(self, min_task_id=None, max_task_id=None, retry_unstarted=False):
     return blockchain_processor.retry_failed(min_task_id, max_task_id, retry_unstarted)
 
+# Set retry attempts to zero since beat will refresh again shortly anyway
+@celery_app.task(**no_retry_config)
+def refresh_gas_price(self):
+    return blockchain_processor.refresh_gas_price()
+
+# Set retry attempts to zero since beat will reconcile again shortly anyway
+@celery_app.task(**no_retry_config)
+def reconcile_nonces(self):
+    return blockchain_processor.reconcile_nonces()
+
+@celery_app.task(**no_retry_config)
+def publish_wallet_pending_depths(self):
+    return blockchain_processor.publish_wallet_pending_depths()
+
+
+@celery_app.task(**no_retry_config)
+def fill_nonce_gaps(self):
+    return blockchain_processor.fill_nonce_gaps()
+
+
+@celery_app.task(**no_retry_config)
+def rebroadcast_stale_transactions(self):
+    return blockchain_processor.rebroadcast_stale_transactions()
+
+
+@celery_app.task(**no_retry_config)
+def sweep_blocked_tasks(self):
+    return blockchain_processor.sweep_blocked_tasks()
+
+
 @celery_app.task(**no_retry_config)
 def deduplicate(self, min_task_id, max_task_id):
     return eth_manager.task_interfaces.composite.deduplicate(min_task_id, max_task_id)
@@ -188,6 +230,16 @@ def get_task(self, task_uuid):
     return blockchain_processor.get_serialised_task_from_uuid(task_uuid)
 
 
+@celery_app.task(**base_task_config)
+def get_tasks(self, task_uuids):
+    return blockchain_processor.get_serialised_tasks_from_uuids(task_uuids)
+
+
+@celery_app.task(**base_task_config)
+def get_metrics(self):
+    return blockchain_processor.get_metrics()
+
+
 @celery_app.task(**base_task_config)
 def _attempt_transaction(self, task_uuid):
     return blockchain_processor.attempt_transaction(task_uuid)
@@ -204,6 +256,11 @@ def _process_function_transaction(self, transaction_id, contract_address, abi_ty
     return blockchain_processor.process_function_transaction(transaction_id, contract_address, abi_type,
                                                              function, args, kwargs, gas_limit, task_id)
 
+@celery_app.task(**batch_processor_task_config)
+def _process_transfer_batch(self, signing_address, token_address, from_address=None):
+    return blockchain_processor.process_transfer_batch(signing_address, token_address, from_address)
+
+
 @celery_app.task(**processor_task_config)
 def _process_deploy_contract_transaction(self, transaction_id, contract_name,
                                          args=None, kwargs=None,  gas_limit=None, task_id=None):
@@ -1,25 +1,97 @@
 import json
+import importlib
+from time import perf_counter
 from eth_utils import to_checksum_address
 from eth_manager.exceptions import WrongContractNameError
 
+COMPILED_CONTRACTS_DIR = './eth_manager/stripped_compiled_contracts'
+
 
 class ContractRegistry(object):
+    """
+    Looks up web3 contracts by address, ABI type or compiled contract name.
+
+    Everything is loaded on first use and then kept: compiled contract artifacts are read from disk once,
+    ABI modules are only imported when their ABI type is first asked for, and each ABI is parsed and turned into
+    a web3 contract factory once, rather than again for every address it's used with.
+    """
 
     def get_compiled_contract(self, contract_name):
+        contract = self.compiled_contracts.get(contract_name)
+
+        if not contract:
+            data = self.get_contract_json(contract_name)
 
-        data  = self.get_contract_json(contract_name)
+            contract = self.w3.eth.contract(abi=data['abi'], bytecode=data['bytecode'])
 
-        bytecode = data['bytecode']
-        abi = data['abi']
+            self.compiled_contracts[contract_name] = contract
 
-        return self.w3.eth.contract(abi=abi, bytecode=bytecode)
+        return contract
 
     def get_contract_json(self, contract_name):
-        with open(f'./eth_manager/stripped_compiled_contracts/{contract_name}.json') as json_file:
-            return json.load(json_file)
+        data = self.contract_jsons.get(contract_name)
+
+        if data is None:
+            start = perf_counter()
+
+            with open(f'{COMPILED_CONTRACTS_DIR}/{contract_name}.json') as json_file:
+                data = json.load(json_file)
+
+            self._record_load(start)
+
+            self.contract_jsons[contract_name] = data
+
+        return data
 
     def register_abi(self, name, abi):
-        self.contract_abis[name] = abi
+        self.contract_abis[name] = self._parse_abi(abi)
+        self.contract_factories.pop(name, None)
+
+    def register_abi_module(self, name, module_name):
+        """
+        Registers an ABI type whose ABI is the `abi` attribute of the module, without importing it until it's needed
+        """
+        self.abi_modules[name] = module_name
+        self.contract_abis.pop(name, None)
+        self.contract_factories.pop(name, None)
+
+    def get_abi(self, abi_type):
+        """
+        :return: the parsed ABI for the type, from a registered ABI or ABI module, or else a compiled contract
+        of the same name. None if there isn't one
+        """
+        abi = self.contract_abis.get(abi_type)
+
+        if abi is None and abi_type in self.abi_modules:
+            start = perf_counter()
+            abi = self._parse_abi(importlib.import_module(self.abi_modules[abi_type]).abi)
+            self._record_load(start)
+
+        if abi is None:
+            try:
+                abi = self.get_contract_json(abi_type).get('abi')
+            except FileNotFoundError:
+                abi = None
+
+        if abi is not None:
+            self.contract_abis[abi_type] = abi
+
+        return abi
+
+    def get_contract_factory(self, abi_type):
+        factory = self.contract_factories.get(abi_type)
+
+        if not factory:
+            abi = self.get_abi(abi_type)
+
+            if abi is None:
+                raise Exception('ABI not found for type: {}'.format(abi_type))
+
+            factory = self.w3.eth.contract(abi=abi)
+
+            self.contract_factories[abi_type] = factory
+
+        return factory
 
     def register_contract(self, contract_address, abi):
         checksum_address = to_checksum_address(contract_address)
@@ -37,19 +109,11 @@ class ContractRegistry(object):
             raise Exception('Contract not found for address: {}'.format(contract_address))
 
         if not contract:
-            abi = self.contract_abis.get(abi_type)
+            factory = self.get_contract_factory(abi_type)
 
-            if abi is None:
-                try:
-                    data = self.get_contract_json(abi_type)
-                    abi = data.get('abi')
-                except FileNotFoundError:
-                    abi = None
+            contract = factory(address=to_checksum_address(contract_address))
 
-            if abi is None:
-                raise Exception('ABI not found for type: {}'.format(abi_type))
-
-            contract = self.register_contract(contract_address, abi)
+            self.contracts_by_address[contract_address] = contract
 
         return contract
 
@@ -57,9 +121,35 @@ class ContractRegistry(object):
         contract = self.get_contract_by_address(contract_address, abi_type)
         return getattr(contract.functions, function_name)
 
+    def get_stats(self):
+        """
+        How much has actually been loaded, and the time spent loading it, compared with what's available
+        """
+        return {
+            'abis_loaded': len(self.contract_abis),
+            'abi_modules_available': len(self.abi_modules),
+            'artifacts_loaded': len(self.contract_jsons),
+            'contracts_cached': len(self.contracts_by_address),
+            'load_count': self.load_count,
+            'load_seconds': round(self.load_seconds, 4)
+        }
+
+    def _parse_abi(self, abi):
+        return json.loads(abi) if isinstance(abi, str) else abi
+
+    def _record_load(self, start):
+        self.load_count += 1
+        self.load_seconds += perf_counter() - start
+
     def __init__(self, w3):
 
         self.w3 = w3
         self.contracts_by_address = {}
         self.contract_abis = {}
+        self.abi_modules = {}
+        self.contract_factories = {}
+        self.contract_jsons = {}
         self.compiled_contracts = {}
+
+        self.load_count = 0
+        self.load_seconds = 0
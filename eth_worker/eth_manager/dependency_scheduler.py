@@ -0,0 +1,112 @@
+# KEYS[1]: in-degree hash, KEYS[2..n+1]: prior task status keys, KEYS[n+2..2n+1]: prior task dependent sets
+# ARGV[1]: uuid of the task to block, ARGV[2..n+1]: uuids of the prior tasks
+# Returns the number of priors the task is now waiting on, or if any of the priors' status keys are missing,
+# the uuids of those priors without blocking the task
+BLOCK_SCRIPT = """
+local n = (#KEYS - 1) / 2
+local statuses = {}
+local missing = {}
+for i = 1, n do
+    statuses[i] = redis.call('GET', KEYS[1 + i])
+    if not statuses[i] then
+        table.insert(missing, ARGV[1 + i])
+    end
+end
+if #missing > 0 then
+    return missing
+end
+local waiting_on = 0
+for i = 1, n do
+    if statuses[i] ~= 'SUCCESS' then
+        redis.call('SADD', KEYS[1 + n + i], ARGV[1])
+        waiting_on = waiting_on + 1
+    end
+end
+if waiting_on > 0 then
+    redis.call('HSET', KEYS[1], ARGV[1], waiting_on)
+else
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+return waiting_on
+"""
+
+# KEYS[1]: in-degree hash, KEYS[2]: dependent set of the task that succeeded
+# Returns the uuids of dependents that have no priors left to wait on
+RELEASE_SCRIPT = """
+local dependents = redis.call('SMEMBERS', KEYS[2])
+redis.call('DEL', KEYS[2])
+local ready = {}
+for _, uuid in ipairs(dependents) do
+    if redis.call('HINCRBY', KEYS[1], uuid, -1) <= 0 then
+        redis.call('HDEL', KEYS[1], uuid)
+        table.insert(ready, uuid)
+    end
+end
+return ready
+"""
+
+
+class DependencyScheduler(object):
+    """
+    Keeps an in-degree index of tasks that are blocked on prior tasks, so that dependents are released
+    together the moment their last prior succeeds, rather than being re-attempted until their priors are done.
+
+    Whether a prior has already succeeded is read from the task status cache maintained by the persistence
+    interface. Since that's updated before a success is acted on, a task blocked at the same time as
+    its prior succeeds is either seen as already satisfied, or released. Cached statuses expire, so the
+    status of a prior that hasn't changed in a while is filled in from the database first.
+    """
+
+    IN_DEGREE_KEY = 'TaskInDegree'
+
+    def _dependents_key(self, task_uuid):
+        return f'TaskDependents-{task_uuid}'
+
+    def block(self, task_uuid, prior_task_uuids):
+        """
+        Registers a task as waiting on the given priors. Safe to call again for a task that's already blocked.
+
+        :return: the number of priors the task is waiting on. Zero means they've all succeeded in the meantime
+        """
+        keys = (
+            [self.IN_DEGREE_KEY]
+            + [self.status_key_prefix + uuid for uuid in prior_task_uuids]
+            + [self._dependents_key(uuid) for uuid in prior_task_uuids]
+        )
+
+        args = [task_uuid] + list(prior_task_uuids)
+
+        result = self._block(keys=keys, args=args)
+
+        if isinstance(result, list):
+            self.persistence_interface.fill_cached_task_statuses([uuid.decode() for uuid in result])
+            result = self._block(keys=keys, args=args)
+
+        return result
+
+    def release(self, task_uuid):
+        """
+        Called once a task succeeds, after its SUCCESS status has been committed and cached. Otherwise a dependent
+        blocked in between would wait on the task after it's been released.
+
+        :return: uuids of the tasks that were only waiting on this one
+        """
+        ready = self._release(keys=[self.IN_DEGREE_KEY, self._dependents_key(task_uuid)])
+
+        return [uuid.decode() for uuid in ready]
+
+    def unblock(self, task_uuid):
+        self.red.hdel(self.IN_DEGREE_KEY, task_uuid)
+
+    def get_blocked_task_uuids(self):
+        return [uuid.decode() for uuid in self.red.hkeys(self.IN_DEGREE_KEY)]
+
+    def __init__(self, red, persistence_interface):
+
+        self.red = red
+
+        self.persistence_interface = persistence_interface
+        self.status_key_prefix = persistence_interface.TASK_STATUS_KEY_PREFIX
+
+        self._block = self.red.register_script(BLOCK_SCRIPT)
+        self._release = self.red.register_script(RELEASE_SCRIPT)
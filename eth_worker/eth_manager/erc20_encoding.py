@@ -0,0 +1,55 @@
+from eth_abi import encode_abi
+from eth_utils import function_signature_to_4byte_selector, encode_hex, to_checksum_address, is_checksum_address
+from web3.exceptions import InvalidAddress
+
+# ABI types that are known to have the standard ERC20 transfer, transferFrom and approve functions
+ERC20_ABI_TYPES = {'ERC20'}
+
+ERC20_FUNCTION_TYPES = {
+    'transfer': ['address', 'uint256'],
+    'transferFrom': ['address', 'address', 'uint256'],
+    'approve': ['address', 'uint256'],
+}
+
+ERC20_SELECTORS = {
+    name: function_signature_to_4byte_selector(f'{name}({",".join(types)})')
+    for name, types in ERC20_FUNCTION_TYPES.items()
+}
+
+
+def is_erc20_fast_path_call(abi_type, function_name, args, kwargs=None):
+    """
+    Whether the call is one of the standard ERC20 functions, with positional arguments only,
+    and so can be encoded directly rather than through a web3 contract
+    """
+    return (
+        abi_type in ERC20_ABI_TYPES
+        and function_name in ERC20_FUNCTION_TYPES
+        and not kwargs
+        and len(args) == len(ERC20_FUNCTION_TYPES[function_name])
+    )
+
+
+def encode_erc20_call(function_name, args):
+    """
+    :return: hex call data for the function, equivalent to what web3 would build for the same call
+    """
+    types = ERC20_FUNCTION_TYPES[function_name]
+
+    for t, a in zip(types, args):
+        # web3 only accepts checksummed addresses, so a mistyped address is rejected rather than sent to
+        if t == 'address' and not is_checksum_address(a):
+            raise InvalidAddress(f'{function_name} argument is not a checksummed address: {a}')
+
+    return encode_hex(ERC20_SELECTORS[function_name] + encode_abi(types, list(args)))
+
+
+def build_erc20_transaction(contract_address, function_name, args):
+    """
+    :return: a partial transaction dict for the call, without gas, gas price, nonce or chain id
+    """
+    return {
+        'to': to_checksum_address(contract_address),
+        'value': 0,
+        'data': encode_erc20_call(function_name, args)
+    }
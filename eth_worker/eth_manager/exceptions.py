@@ -15,6 +15,9 @@ class WalletExistsError(Exception):
 class TaskRetriesExceededError(Exception):
     """Number of transaction retries allowed for task has been exceeded"""
 
+class IncompleteBatchResponseError(Exception):
+    """JSON-RPC batch response doesn't answer every request in the batch"""
+
 class LockedNotAcquired(Exception):
     """Redis lock not acquired"""
     pass
\ No newline at end of file
@@ -0,0 +1,85 @@
+import json
+import logging
+import time
+
+import requests
+
+logger = logging.getLogger('eth_manager.gas_price_oracle')
+
+
+class GasPriceOracle(object):
+    """
+    Holds the current gas price from the gas price provider. The price is refreshed on a timer by a beat task,
+    so transaction processing only ever reads a value from memory or redis, and never waits on the provider.
+    Falls back to the configured default price if the provider isn't set, or the last refresh is too old.
+    """
+
+    KEY = 'GasPriceOracle'
+
+    def refresh(self, target_transaction_time):
+        """
+        Fetches the price from the provider, capped at the default price.
+
+        :return: the new price, or if the provider can't be reached, the last good price (None if there isn't one)
+        """
+        if not self.provider_url:
+            return None
+
+        try:
+            gas_price_req = requests.get(self.provider_url + '/price',
+                                         params={'max_wait_seconds': target_transaction_time},
+                                         timeout=self.request_timeout).json()
+
+            gas_price = min(int(gas_price_req['gas_price']), self.default_gas_price)
+
+        except Exception as e:
+            # get_gas_price carries on serving the last good price until it's too old
+            logger.warning(f'Gas price refresh failed: {e}')
+            self.metrics.increment('gas_price_refresh_failures')
+
+            last_good = self._get_last_good()
+            return last_good['gas_price'] if last_good else None
+
+        self.red.set(self.KEY, json.dumps({'gas_price': gas_price, 'fetched_at': time.time()}))
+        self.metrics.gauge('gas_price_wei', gas_price)
+
+        return gas_price
+
+    def get_gas_price(self):
+        now = time.time()
+
+        if self._cached and now - self._cached_at < self.memory_ttl_seconds:
+            return self._cached['gas_price']
+
+        cached = self._get_last_good()
+
+        if cached is None or now - cached['fetched_at'] > self.max_age_seconds:
+            self.metrics.increment('gas_price_fallbacks')
+            return self.default_gas_price
+
+        self._cached = cached
+        self._cached_at = now
+
+        return cached['gas_price']
+
+    def _get_last_good(self):
+        cached = self.red.get(self.KEY)
+        return json.loads(cached) if cached else None
+
+    def __init__(self, red, metrics, default_gas_price, provider_url,
+                 max_age_seconds=300,
+                 memory_ttl_seconds=5,
+                 request_timeout=5):
+
+        self.red = red
+        self.metrics = metrics
+
+        self.default_gas_price = default_gas_price
+        self.provider_url = provider_url
+
+        self.max_age_seconds = max_age_seconds
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.request_timeout = request_timeout
+
+        self._cached = None
+        self._cached_at = 0
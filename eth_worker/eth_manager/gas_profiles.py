@@ -0,0 +1,50 @@
+# KEYS[1]: profile key
+# ARGV[1]: gas used, ARGV[2]: ttl seconds
+RECORD_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) > current then
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+"""
+
+
+class GasProfiles(object):
+    """
+    Learned gas usage per (contract address, abi type, function), taken from the gas actually used by mined
+    transactions. Lets the processor skip estimateGas for the handful of function signatures that make up most
+    traffic. Profiles keep the highest gas used seen, and expire so that they are periodically relearnt.
+    """
+
+    def _key(self, contract_address, abi_type, function_name):
+        return f'GasProfile-{contract_address}-{abi_type}-{function_name}'
+
+    def get_gas_used(self, contract_address, abi_type, function_name):
+        """
+        :return: the highest gas used seen for the function, or None if there isn't a profile for it yet
+        """
+        gas_used = self.red.get(self._key(contract_address, abi_type, function_name))
+
+        if gas_used is None:
+            self.metrics.increment('gas_profile_misses')
+            return None
+
+        self.metrics.increment('gas_profile_hits')
+        return int(gas_used)
+
+    def record_gas_used(self, contract_address, abi_type, function_name, gas_used):
+        self._record(keys=[self._key(contract_address, abi_type, function_name)],
+                     args=[int(gas_used), self.profile_ttl_seconds])
+
+    def invalidate(self, contract_address, abi_type, function_name):
+        self.red.delete(self._key(contract_address, abi_type, function_name))
+        self.metrics.increment('gas_profile_invalidations')
+
+    def __init__(self, red, metrics, profile_ttl_seconds=60 * 60 * 24):
+
+        self.red = red
+        self.metrics = metrics
+
+        self.profile_ttl_seconds = profile_ttl_seconds
+
+        self._record = self.red.register_script(RECORD_SCRIPT)
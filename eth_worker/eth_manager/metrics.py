@@ -0,0 +1,156 @@
+import json
+import logging
+import re
+import socket
+from contextlib import contextmanager
+from time import perf_counter
+
+# Upper bounds, in seconds, of the buckets that durations are counted into
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+span_logger = logging.getLogger('eth_manager.spans')
+logger = logging.getLogger('eth_manager.metrics')
+
+
+class Metrics(object):
+    """
+    Counters, gauges and histograms for the eth worker. These are kept in redis hashes rather than in process memory,
+    so every worker process reports into the same place, and can be scraped in Prometheus format from there.
+    When a StatsD host is configured, everything is also sent there as it happens.
+    """
+
+    KEY = 'EthWorkerMetrics'
+    HISTOGRAMS_KEY = 'EthWorkerHistograms'
+
+    def increment(self, name, amount=1):
+        with self._best_effort(name):
+            self.red.hincrby(self.KEY, name, amount)
+        self._send_statsd(f'{name}:{amount}|c')
+
+    def gauge(self, name, value):
+        with self._best_effort(name):
+            self.red.hset(self.KEY, name, value)
+        self._send_statsd(f'{name}:{value}|g')
+
+    def observe(self, name, seconds):
+        """
+        Counts a duration into a cumulative histogram, in the same shape as a Prometheus histogram
+        """
+        with self._best_effort(name):
+            pipe = self.red.pipeline()
+            for bound in self.buckets:
+                if seconds <= bound:
+                    pipe.hincrby(self.HISTOGRAMS_KEY, f'{name}|{bound}', 1)
+            pipe.hincrby(self.HISTOGRAMS_KEY, f'{name}|count', 1)
+            pipe.hincrbyfloat(self.HISTOGRAMS_KEY, f'{name}|sum', seconds)
+            pipe.execute()
+
+        self._send_statsd(f'{name}:{seconds * 1000:.3f}|ms')
+
+    @contextmanager
+    def span(self, stage, **ids):
+        """
+        Times a stage of a transaction's lifecycle into the {stage}_seconds histogram.
+        The ids, such as the transaction and task ids, only go to the span log, so that they don't
+        multiply the number of series in the histograms.
+        """
+        start = perf_counter()
+        failed = False
+        try:
+            yield
+        except Exception:
+            failed = True
+            raise
+        finally:
+            duration = perf_counter() - start
+
+            self.observe(f'{stage}_seconds', duration)
+            if failed:
+                self.increment(f'{stage}_errors')
+
+            span_logger.debug(json.dumps({
+                'span': stage,
+                'duration_ms': round(duration * 1000, 3),
+                'failed': failed,
+                **ids
+            }, default=str))
+
+    def get_all(self):
+        return {k.decode(): float(v) for k, v in self.red.hgetall(self.KEY).items()}
+
+    def get_histograms(self):
+        """
+        :return: dict of histogram name to its buckets as sorted (upper bound, cumulative count) tuples,
+        its total count and the sum of all observed values
+        """
+        histograms = {}
+        for field, value in self.red.hgetall(self.HISTOGRAMS_KEY).items():
+            name, part = field.decode().rsplit('|', 1)
+            histogram = histograms.setdefault(name, {'buckets': [], 'count': 0, 'sum': 0.0})
+
+            if part == 'count':
+                histogram['count'] = int(value)
+            elif part == 'sum':
+                histogram['sum'] = float(value)
+            else:
+                histogram['buckets'].append((float(part), int(value)))
+
+        for histogram in histograms.values():
+            histogram['buckets'].sort()
+
+        return histograms
+
+    def to_prometheus(self, prefix='eth_worker'):
+        """
+        :return: every metric in the Prometheus text exposition format
+        """
+        lines = []
+
+        for name, value in sorted(self.get_all().items()):
+            lines.append(f'{prefix}_{self._metric_name(name)} {value}')
+
+        for name, histogram in sorted(self.get_histograms().items()):
+            name = f'{prefix}_{self._metric_name(name)}'
+            lines.append(f'# TYPE {name} histogram')
+            for bound, count in histogram['buckets']:
+                lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{le="+Inf"}} {histogram["count"]}')
+            lines.append(f'{name}_sum {histogram["sum"]}')
+            lines.append(f'{name}_count {histogram["count"]}')
+
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        self.red.delete(self.KEY, self.HISTOGRAMS_KEY)
+
+    @contextmanager
+    def _best_effort(self, name):
+        # Metrics are often written just after a transaction is sent, where an error would make the caller
+        # treat the send as failed and try again, so they're logged and dropped instead
+        try:
+            yield
+        except Exception as e:
+            logger.warning(f'Failed to write metric {name}: {e}')
+
+    def _metric_name(self, name):
+        return re.sub(r'[^a-zA-Z0-9_:]', '_', name)
+
+    def _send_statsd(self, line):
+        if not self.statsd_address:
+            return
+
+        try:
+            self._statsd_socket.sendto(f'{self.statsd_prefix}.{line}'.encode(), self.statsd_address)
+        except OSError:
+            # Metrics are best effort, and must never fail a transaction
+            pass
+
+    def __init__(self, red, statsd_host=None, statsd_port=8125, statsd_prefix='eth_worker',
+                 buckets=DEFAULT_BUCKETS):
+        self.red = red
+
+        self.buckets = buckets
+
+        self.statsd_address = (statsd_host, statsd_port) if statsd_host else None
+        self.statsd_prefix = statsd_prefix
+        self._statsd_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM) if statsd_host else None
@@ -0,0 +1,47 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import config
+
+
+class MetricsExporter(object):
+    """
+    Serves the worker metrics kept in redis at /metrics, in the Prometheus text format.
+    Since every worker process reports into redis, one exporter covers the whole deployment.
+    """
+
+    def run(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+
+                body = metrics.to_prometheus().encode()
+
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would otherwise drown out everything else
+                pass
+
+        print(f'Starting metrics exporter on port {self.port}')
+        HTTPServer(('', self.port), Handler).serve_forever()
+
+    def __init__(self, metrics, port=9102):
+        self.metrics = metrics
+        self.port = port
+
+
+if __name__ == '__main__':
+    from eth_manager import blockchain_processor
+
+    MetricsExporter(
+        metrics=blockchain_processor.metrics,
+        port=config.ETH_METRICS_EXPORTER_PORT
+    ).run()
@@ -0,0 +1,147 @@
+import time
+
+# KEYS[1]: next nonce counter, KEYS[2]: gap set, KEYS[3]: recent claims
+# ARGV[1]: current timestamp
+# Returns -1 if the counter hasn't been seeded yet
+CLAIM_SCRIPT = """
+local gaps = redis.call('ZRANGE', KEYS[2], 0, 0)
+local nonce
+if #gaps > 0 then
+    nonce = tonumber(gaps[1])
+    redis.call('ZREM', KEYS[2], gaps[1])
+else
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return -1
+    end
+    nonce = redis.call('INCR', KEYS[1]) - 1
+end
+redis.call('HSET', KEYS[3], nonce, ARGV[1])
+return nonce
+"""
+
+# KEYS[1]: next nonce counter, KEYS[2]: gap set, KEYS[3]: recent claims
+# ARGV[1]: network nonce, ARGV[2]: reconciled counter, ARGV[3]: claim cutoff timestamp, ARGV[4...]: gaps
+# Returns the number of gaps added
+RECONCILE_SCRIPT = """
+local network_nonce = tonumber(ARGV[1])
+local counter = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[2]) > counter then
+    redis.call('SET', KEYS[1], ARGV[2])
+end
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', '(' .. network_nonce)
+
+local cutoff = tonumber(ARGV[3])
+local added = 0
+for i = 4, #ARGV do
+    local claimed_at = redis.call('HGET', KEYS[3], ARGV[i])
+    if (not claimed_at) or tonumber(claimed_at) < cutoff then
+        redis.call('ZADD', KEYS[2], ARGV[i], ARGV[i])
+        added = added + 1
+    end
+end
+
+local claims = redis.call('HGETALL', KEYS[3])
+for i = 1, #claims, 2 do
+    if tonumber(claims[i + 1]) < cutoff then
+        redis.call('HDEL', KEYS[3], claims[i])
+    end
+end
+
+return added
+"""
+
+
+# KEYS[1]: next nonce counter, KEYS[2]: gap set, KEYS[3]: recent claims
+# ARGV[1]: nonce
+# Returns 1 if the nonce can be used by the caller, 0 if it has recently been claimed
+TAKE_SCRIPT = """
+if redis.call('ZREM', KEYS[2], ARGV[1]) == 1 then
+    return 1
+end
+if redis.call('HEXISTS', KEYS[3], ARGV[1]) == 1 then
+    return 0
+end
+return 1
+"""
+
+
+class NonceAllocator(object):
+    """
+    Hands out transaction nonces for a signing wallet using an atomic redis counter plus a set of gaps,
+    so that claiming a nonce costs a single redis round trip and no wallet-wide lock.
+
+    The allocator itself knows nothing about the chain or the database. Seeding the counter and
+    reconciling it (finding gaps left by transactions that never made it onto the chain) is done
+    out of band by the persistence interface.
+    """
+
+    WALLETS_KEY = 'NonceAllocatorWallets'
+
+    def _keys(self, address):
+        return [f'NonceCounter-{address}', f'NonceGaps-{address}', f'NonceClaims-{address}']
+
+    def claim(self, address):
+        """
+        :return: the next nonce for the address, or None if the counter for the address hasn't been seeded
+        """
+        nonce = self._claim(keys=self._keys(address), args=[int(time.time())])
+
+        if nonce == -1:
+            return None
+
+        return int(nonce)
+
+    def seed(self, address, next_nonce):
+        """
+        Initialises the counter for an address. Does nothing if another process seeded it first.
+        """
+        self.red.set(self._keys(address)[0], next_nonce, nx=True)
+        self.red.sadd(self.WALLETS_KEY, address)
+
+    def get_counter(self, address):
+        counter = self.red.get(self._keys(address)[0])
+        return int(counter) if counter is not None else None
+
+    def get_gaps(self, address):
+        return [int(n) for n in self.red.zrange(self._keys(address)[1], 0, -1)]
+
+    def reconcile(self, address, network_nonce, next_nonce, gaps):
+        """
+        Moves the counter forward to at least next_nonce, drops gaps below the network nonce and
+        adds any new gaps. Gaps that have been claimed within the grace period are skipped, because the
+        claiming transaction may not have been committed to the database yet.
+
+        :return: the number of gaps added
+        """
+        cutoff = int(time.time()) - self.claim_grace_seconds
+
+        return self._reconcile(
+            keys=self._keys(address),
+            args=[network_nonce, next_nonce, cutoff] + list(gaps)
+        )
+
+    def take(self, address, nonce):
+        """
+        Takes a specific nonce out of the allocator's hands, so that it's safe to send something else with it.
+
+        :return: False if the nonce was claimed recently, and so may already be in use
+        """
+        return bool(self._take(keys=self._keys(address), args=[nonce]))
+
+    def get_wallet_addresses(self):
+        return [a.decode() if isinstance(a, bytes) else a for a in self.red.smembers(self.WALLETS_KEY)]
+
+    def reset(self, address):
+        self.red.delete(*self._keys(address))
+        self.red.srem(self.WALLETS_KEY, address)
+
+    def __init__(self, red, claim_grace_seconds=10):
+
+        self.red = red
+
+        self.claim_grace_seconds = claim_grace_seconds
+
+        self._claim = self.red.register_script(CLAIM_SCRIPT)
+        self._reconcile = self.red.register_script(RECONCILE_SCRIPT)
+        self._take = self.red.register_script(TAKE_SCRIPT)
@@ -0,0 +1,54 @@
+import logging
+import time
+
+logger = logging.getLogger('eth_manager.nonce_gaps')
+
+
+class NonceGapTracker(object):
+    """
+    Remembers when each nonce gap of a signing wallet was first seen, so that gaps are only filled once they've
+    been open long enough that they're unlikely to be closed by a transaction that's still being sent,
+    and so that how long each gap lasted can be reported once it closes.
+
+    A gap is a nonce the node has no transaction for, below a nonce we've sent a transaction with.
+    Every later transaction from the wallet is stuck behind it until something is mined at that nonce.
+    """
+
+    def _key(self, address):
+        return f'NonceGapsOpen-{address}'
+
+    def observe(self, address, gaps):
+        """
+        Records the gaps currently open for an address. Gaps that were open before and no longer are
+        count as closed, and their durations are reported to the metrics.
+
+        :return: dict of each open gap nonce to the number of seconds it has been open
+        """
+        key = self._key(address)
+        now = time.time()
+
+        first_seen = {int(n): float(t) for n, t in self.red.hgetall(key).items()}
+
+        closed = [n for n in first_seen if n not in gaps]
+        opened = {n: now for n in gaps if n not in first_seen}
+
+        pipe = self.red.pipeline()
+        if closed:
+            pipe.hdel(key, *closed)
+        if opened:
+            pipe.hmset(key, opened)
+        pipe.execute()
+
+        for n in closed:
+            duration = now - first_seen[n]
+            logger.info(f'Nonce gap {n} for {address} closed after {int(duration)} seconds')
+
+            self.metrics.increment('nonce_gaps_closed')
+            self.metrics.increment('nonce_gap_seconds_total', int(duration))
+            self.metrics.gauge('last_nonce_gap_seconds', int(duration))
+
+        return {n: now - first_seen.get(n, now) for n in gaps}
+
+    def __init__(self, red, metrics):
+        self.red = red
+        self.metrics = metrics
@@ -0,0 +1,27 @@
+import bisect
+from hashlib import md5
+
+
+class HashRing(object):
+    """
+    Consistent hash ring, used to give each signing wallet a fixed home among a set of nodes
+    (in practice, processor queues). Adding or removing a node only moves the keys that hashed to it,
+    rather than reshuffling every key.
+    """
+
+    def _hash(self, value):
+        return int(md5(value.encode()).hexdigest(), 16)
+
+    def get_node(self, key):
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._hashes)
+        return self._ring[self._hashes[index]]
+
+    def __init__(self, nodes, replicas=100):
+
+        self._ring = {}
+        for node in nodes:
+            # Virtual nodes, so that keys are spread evenly even with only a few real ones
+            for i in range(replicas):
+                self._ring[self._hash(f'{node}-{i}')] = node
+
+        self._hashes = sorted(self._ring.keys())
@@ -1,23 +1,41 @@
 from typing import Optional, Any
 
 import datetime
+import logging
 
 from eth_keys import keys
+from eth_abi import decode_abi
+from eth_utils import to_bytes, to_checksum_address
 
-from celery import chain, signature
-
-import requests
+from celery import chain, group, signature
+from web3.exceptions import TransactionNotFound
 
 import config
 from eth_manager.exceptions import PreBlockchainError, TaskRetriesExceededError
 from eth_manager import utils
+from eth_manager.async_submitter import ASYNC_SUBMIT_QUEUE_KEY
 from eth_manager.contract_registry import ContractRegistry
+from eth_manager.dependency_scheduler import DependencyScheduler
+from eth_manager.erc20_encoding import is_erc20_fast_path_call, build_erc20_transaction
+from eth_manager.gas_price_oracle import GasPriceOracle
+from eth_manager.gas_profiles import GasProfiles
+from eth_manager.metrics import Metrics
+from eth_manager.nonce_gaps import NonceGapTracker
+from eth_manager.partitioning import HashRing
+from eth_manager.rpc_batch import JSONRPCBatchClient
+from eth_manager.signing_key_cache import SigningKeyCache
+from eth_manager.transfer_batcher import TransferBatcher
 from sempo_types import UUIDList, UUID
 
 RETRY_TRANSACTION_BASE_TIME = 2
 ETH_CHECK_TRANSACTION_BASE_TIME = 2
 ETH_CHECK_TRANSACTION_RETRIES_TIME_LIMIT = 4
 
+# Used to size transfer batches until the gas used by a single transfer of the token has been learnt
+DEFAULT_TRANSFER_GAS = 60000
+
+logger = logging.getLogger('eth_manager.processor')
+
 class TransactionProcessor(object):
 
     def private_key_to_address(self, private_key):
@@ -27,23 +45,15 @@ class TransactionProcessor(object):
 
         return keys.PrivateKey(private_key).public_key.to_checksum_address()
 
-    def get_gas_price(self, target_transaction_time=None):
+    def get_gas_price(self):
+        return self.gas_price_oracle.get_gas_price()
+
+    def refresh_gas_price(self, target_transaction_time=None):
 
         if not target_transaction_time:
             target_transaction_time = config.ETH_TARGET_TRANSACTION_TIME
 
-        try:
-            gas_price_req = requests.get(config.ETH_GAS_PRICE_PROVIDER + '/price',
-                                         params={'max_wait_seconds': target_transaction_time}).json()
-
-            gas_price = min(gas_price_req['gas_price'], self.gas_price)
-
-            print('gas price: {}'.format(gas_price))
-
-        except Exception as e:
-            gas_price = self.gas_price
-
-        return gas_price
+        return self.gas_price_oracle.refresh(target_transaction_time)
 
     def topup_if_required(self, wallet, posterior_task_uuid):
         balance = self.w3.eth.getBalance(wallet.address)
@@ -77,11 +87,8 @@ class TransactionProcessor(object):
             'value': amount
         }
 
-        print(f'\n##Tx {transaction_id}, task {task_id}: Sending Eth \n'
-              f'to: {recipient_address} \n'
-              f'amount: {amount}')
-
-        return self.process_transaction(transaction_id, partial_txn_dict=partial_txn_dict, gas_limit=100000)
+        return self.process_transaction(transaction_id, partial_txn_dict=partial_txn_dict, gas_limit=100000,
+                                        task_id=task_id)
 
     def typecast_argument(self, argument):
         if isinstance(argument, dict) and argument.get('type') == 'bytes':
@@ -99,15 +106,21 @@ class TransactionProcessor(object):
         kwargs = kwargs or dict()
         kwargs = {k: self.typecast_argument(v) for k, v in kwargs.items()}
 
-        print(f'\n##Tx {transaction_id}, task {task_id}: Transacting with Function {function_name} \n'
-              f'Args: {args} \n'
-              f'Kwargs: {kwargs}')
+        gas_profile = (contract_address, abi_type, function_name)
+
+        if self.erc20_fast_path and is_erc20_fast_path_call(abi_type, function_name, args, kwargs):
+            # Skips building a web3 contract function for the bulk of our traffic
+            partial_txn_dict = build_erc20_transaction(contract_address, function_name, args)
+
+            return self.process_transaction(transaction_id, partial_txn_dict=partial_txn_dict, gas_limit=gas_limit,
+                                            gas_profile=gas_profile, task_id=task_id)
 
         function = self.registry.get_contract_function(contract_address, function_name, abi_type)
 
         bound_function = function(*args, **kwargs)
 
-        return self.process_transaction(transaction_id, bound_function, gas_limit=gas_limit)
+        return self.process_transaction(transaction_id, bound_function, gas_limit=gas_limit,
+                                        gas_profile=gas_profile, task_id=task_id)
 
     def process_deploy_contract_transaction(self, transaction_id, contract_name,
                                             args=None, kwargs=None, gas_limit=None, task_id=None):
@@ -118,47 +131,71 @@ class TransactionProcessor(object):
 
         kwargs = kwargs or dict()
 
-        print(f'\n##Tx {transaction_id}, task {task_id}: Deploying Contract {contract_name} \n'
-              f'Args: {args} \n'
-              f'Kwargs: {kwargs}')
-
         contract = self.registry.get_compiled_contract(contract_name)
 
         constructor = contract.constructor(*args, **kwargs)
 
-        return self.process_transaction(transaction_id, constructor, gas_limit=gas_limit)
+        return self.process_transaction(transaction_id, constructor, gas_limit=gas_limit, task_id=task_id)
 
     def process_transaction(self,
                             transaction_id,
                             unbuilt_transaction=None,
                             partial_txn_dict=None,
                             gas_limit=None,
-                            gas_price=None):
+                            gas_price=None,
+                            gas_profile=None,
+                            task_id=None,
+                            batched_transaction_ids=None):
+        """
+        :param batched_transaction_ids: transactions of the transfers this one carries, if it's a multi-transfer
+        batch. They're recorded as sent with the same hash and nonce in the same commit as this transaction,
+        before it can be seen mined or failed.
+        """
+
+        span_ids = {'transaction_id': transaction_id, 'task_id': task_id}
 
         try:
 
             chainId = self.ethereum_chain_id
-            gasPrice = gas_price or self.gas_price
-            # gasPrice = gas_price or self.get_gas_price()
+            gasPrice = gas_price or self.get_gas_price()
 
             signing_wallet_obj = self.persistence_interface.get_transaction_signing_wallet(transaction_id)
 
             if gas_limit:
                 gas = gas_limit
             else:
+                gas = gas_profile and self.gas_profiles.get_gas_used(*gas_profile)
+
+                if gas:
+                    # What's been used before is only a lower bound, since this call may write to fresh storage
+                    gas += self.gas_profile_headroom
+
+            if not gas:
                 try:
-                    gas = unbuilt_transaction.estimateGas({
+                    estimate_params = {
                         'from': signing_wallet_obj.address,
                         'gasPrice': gasPrice
-                    })
+                    }
+
+                    with self.metrics.span('estimate_gas', **span_ids):
+                        if unbuilt_transaction:
+                            gas = unbuilt_transaction.estimateGas(estimate_params)
+                        else:
+                            gas = self.w3.eth.estimateGas({**partial_txn_dict, **estimate_params})
                 except ValueError as e:
                     print("Estimate Gas Failed. Remedy by specifying gas limit.")
 
                     raise e
 
-            nonce, transaction_id = self.persistence_interface.locked_claim_transaction_nonce(
-                signing_wallet_obj, transaction_id
-            )
+            with self.metrics.span('claim_nonce', **span_ids):
+                if self.nonce_allocator == 'redis':
+                    nonce, transaction_id = self.persistence_interface.allocate_transaction_nonce(
+                        signing_wallet_obj, transaction_id
+                    )
+                else:
+                    nonce, transaction_id = self.persistence_interface.locked_claim_transaction_nonce(
+                        signing_wallet_obj, transaction_id
+                    )
 
             metadata = {
                 'gas': gas_limit or min(int(gas*1.2), 8000000),
@@ -169,17 +206,46 @@ class TransactionProcessor(object):
             if chainId:
                 metadata['chainId'] = chainId
 
-            if unbuilt_transaction:
-                txn = unbuilt_transaction.buildTransaction(metadata)
-            else:
-                txn = {**metadata, **partial_txn_dict}
+            with self.metrics.span('build_and_sign', **span_ids):
+                if unbuilt_transaction:
+                    txn = unbuilt_transaction.buildTransaction(metadata)
+                else:
+                    txn = {**metadata, **partial_txn_dict}
 
-            signed_txn = self.w3.eth.account.signTransaction(txn, private_key=signing_wallet_obj.private_key)
+                signed_txn = self.w3.eth.account.signTransaction(
+                    txn, private_key=self.signing_key_cache.get_private_key(signing_wallet_obj)
+                )
 
-            try:
-                print('@@@@@@@@@@@@@@ tx {} using nonce {} @@@@@@@@@@@@@@'.format(transaction_id, nonce))
+            journal = {
+                'hash': signed_txn.hash.hex(),
+                'raw_transaction': signed_txn.rawTransaction.hex(),
+                'unsigned_transaction': txn,
+                'gas_price': gasPrice,
+                'nonce': nonce
+            }
 
-                result = self.w3.eth.sendRawTransaction(signed_txn.rawTransaction)
+            def record(transaction_data):
+                # Only the carrier of a batch keeps the journal, so the batch is only ever rebroadcast once
+                batch_data = {'batch_size': len(batched_transaction_ids) + 1} if batched_transaction_ids else {}
+
+                self.persistence_interface.bulk_update_transaction_data(
+                    [(transaction_id, {**journal, **transaction_data, **batch_data})] + [
+                        (i, {'hash': journal['hash'], 'nonce': nonce, **transaction_data, **batch_data})
+                        for i in batched_transaction_ids or []
+                    ]
+                )
+
+            if self.submit_pipeline == 'async':
+                # The async submitter sends it and sets the submitted date, and makes a new attempt itself if the
+                # send fails
+                record({'nonce_consumed': True})
+                self.red.rpush(ASYNC_SUBMIT_QUEUE_KEY, transaction_id)
+
+                return transaction_id
+
+            try:
+                with self.metrics.span('send_raw_transaction', nonce=nonce, **span_ids):
+                    self.w3.eth.sendRawTransaction(signed_txn.rawTransaction)
 
             except ValueError as e:
 
@@ -190,17 +256,11 @@ class TransactionProcessor(object):
                 raise PreBlockchainError(message, True)
 
             # If we've made it this far, the nonce will(?) be consumed
-            transaction_data = {
-                'hash': signed_txn.hash.hex(),
-                'nonce': nonce,
-                'submitted_date': str(datetime.datetime.utcnow()),
-                'nonce_consumed': True
-            }
-
-            print('***************Data for transaction {}:***************'.format(transaction_id))
-            print(transaction_data)
-
-            self.persistence_interface.update_transaction_data(transaction_id, transaction_data)
+            with self.metrics.span('record_submission', **span_ids):
+                record({
+                    'submitted_date': str(datetime.datetime.utcnow()),
+                    'nonce_consumed': True
+                })
 
             return transaction_id
 
@@ -215,15 +275,6 @@ class TransactionProcessor(object):
 
             raise e
 
-    def get_unstarted_posteriors(self, task):
-
-        unstarted_posteriors = []
-        for posterior in task.posterior_tasks:
-            if posterior.status == 'UNSTARTED':
-                unstarted_posteriors.append(posterior)
-
-        return unstarted_posteriors
-
     def check_transaction_response(self, celery_task, transaction_id):
         def transaction_response_countdown():
             t = lambda retries: ETH_CHECK_TRANSACTION_BASE_TIME * 2 ** retries
@@ -246,44 +297,97 @@ class TransactionProcessor(object):
 
             transaction_hash = transaction_object.hash
 
-            result = self.check_transaction_hash(transaction_hash)
+            with self.metrics.span('get_receipt', transaction_id=transaction_id, task_id=task.id):
+                result = self.check_transaction_hash(transaction_hash)
 
             self.persistence_interface.update_transaction_data(transaction_id, result)
 
             status = result.get('status')
 
-            print(f'Status for transaction {transaction_object.id} of task UUID {task.uuid} is:'
-            f'\n {status}')
-
-            if status == 'SUCCESS':
-
-                unstarted_posteriors = self.get_unstarted_posteriors(task)
-
-                for dep_task in unstarted_posteriors:
-                    print('Starting posterior task: {}'.format(dep_task.uuid))
-                    signature(utils.eth_endpoint('_attempt_transaction'), args=(dep_task.uuid,)).delay()
-
-                self.persistence_interface.set_task_status_text(task, 'SUCCESS')
-
             if status == 'PENDING':
                 celery_task.request.retries = 0
                 raise Exception("Need Retry")
 
-            if status == 'FAILED':
-                self.new_transaction_attempt(task)
+            # Transfers sent in the same multi-transfer batch share the hash, and are all resolved by this check
+            batched_transactions = [
+                t for t in self.persistence_interface.get_unresolved_transactions_by_hash([transaction_hash])
+                if t.id != transaction_object.id
+            ]
+
+            self.persistence_interface.bulk_update_transaction_data(
+                [(t.id, result) for t in batched_transactions]
+            )
+
+            for t in [transaction_object] + batched_transactions:
+                self.handle_transaction_result(t, result)
 
         except TaskRetriesExceededError as e:
             pass
 
         except Exception as e:
-            print(e)
+            if str(e) != 'Need Retry':
+                print(e)
             celery_task.retry(countdown=transaction_response_countdown())
 
+    def handle_transaction_result(self, transaction_object, result):
+        """
+        Acts on the outcome of a mined transaction: starts posterior tasks on success,
+        or makes a new attempt on failure. The transaction data should already be updated.
+        """
+        task = transaction_object.task
+
+        status = result.get('status')
+
+        if not transaction_object.batch_size:
+            # The gas used by a batch says nothing about the gas used by a single call
+            self.update_gas_profile(task, status, result.get('gas_used'))
+
+        self.metrics.increment(f'transactions_{status.lower()}')
+
+        if transaction_object.submitted_date and status in ['SUCCESS', 'FAILED']:
+            self.metrics.observe(
+                'submit_to_mined_seconds',
+                (datetime.datetime.utcnow() - transaction_object.submitted_date).total_seconds()
+            )
+
+        if status == 'SUCCESS':
+
+            self.persistence_interface.set_task_status_text(task, 'SUCCESS')
+
+            # Only once the task's SUCCESS status is committed and cached, which happened when the transaction
+            # result was saved, so that a dependent blocked from here on sees it rather than waiting to be released
+            self.start_tasks(self.dependency_scheduler.release(task.uuid))
+
+        if status == 'FAILED':
+            try:
+                self.new_transaction_attempt(task)
+            except TaskRetriesExceededError:
+                pass
+
+    def update_gas_profile(self, task, status, gas_used):
+        if task.type != 'FUNCTION':
+            return
+
+        gas_profile = (task.contract_address, task.abi_type, task.function)
+
+        if status == 'SUCCESS' and gas_used:
+            self.gas_profiles.record_gas_used(*gas_profile, gas_used)
+
+        if status == 'FAILED':
+            # Could have run out of gas on a learned limit, so go back to estimating
+            self.gas_profiles.invalidate(*gas_profile)
+
     def check_transaction_hash(self, tx_hash):
 
-        print('watching txn: {} at {}'.format(tx_hash, datetime.datetime.utcnow()))
+        try:
+            tx_receipt = self.w3.eth.getTransactionReceipt(tx_hash)
+        except TransactionNotFound:
+            # Not mined yet
+            tx_receipt = None
+
+        return self.transaction_result_from_receipt(tx_receipt)
 
-        tx_receipt = self.w3.eth.getTransactionReceipt(tx_hash)
+    def transaction_result_from_receipt(self, tx_receipt):
 
         def print_and_return(return_dict):
             # Not printing here currently because the method above does it
@@ -303,6 +407,7 @@ class TransactionProcessor(object):
             return print_and_return({
                 'status': 'SUCCESS',
                 'block': tx_receipt.blockNumber,
+                'gas_used': tx_receipt.gasUsed,
                 'contract_address': tx_receipt.contractAddress,
                 'mined_date': mined_date
             })
@@ -312,6 +417,7 @@ class TransactionProcessor(object):
                'status': 'FAILED',
                'error': 'Blockchain Error',
                'block': tx_receipt.blockNumber,
+               'gas_used': tx_receipt.gasUsed,
                'mined_date': mined_date
            })
 
@@ -325,20 +431,91 @@ class TransactionProcessor(object):
         return unsatisfied
 
 
+    def has_dependency_cycle(self, task):
+        visited = set()
+        to_visit = list(task.prior_tasks)
+
+        while to_visit:
+            prior = to_visit.pop()
+
+            if prior.id == task.id:
+                return True
+
+            if prior.id not in visited:
+                visited.add(prior.id)
+                to_visit.extend(prior.prior_tasks)
+
+        return False
+
+    def start_tasks(self, task_uuids):
+        if not task_uuids:
+            return
+
+        logger.debug(f'Starting tasks: {task_uuids}')
+
+        group(
+            signature(utils.eth_endpoint('_attempt_transaction'), args=(task_uuid,)) for task_uuid in task_uuids
+        ).delay()
+
+    def sweep_blocked_tasks(self):
+        """
+        Safety net for the dependency scheduler. Starts blocked tasks whose priors have all succeeded
+        without releasing them, and counts orphans: tasks waiting on a prior that has used up its retries,
+        or that doesn't exist. Orphans stay blocked, so that they still start if their prior is retried manually.
+        """
+        ready = []
+        orphaned = []
+
+        for task_uuid in self.dependency_scheduler.get_blocked_task_uuids():
+            task = self.persistence_interface.get_task_from_uuid(task_uuid)
+
+            if task is None:
+                self.dependency_scheduler.unblock(task_uuid)
+                continue
+
+            unsatisfied_prior_tasks = self.get_unsatisfied_prior_tasks(task)
+
+            if not unsatisfied_prior_tasks:
+                self.dependency_scheduler.unblock(task_uuid)
+                ready.append(task_uuid)
+
+            elif any(prior.status_text == 'FAILED' for prior in unsatisfied_prior_tasks):
+                orphaned.append(task_uuid)
+
+        if orphaned:
+            logger.warning(f'Orphaned tasks, waiting on failed priors: {orphaned}')
+
+        self.metrics.gauge('orphaned_tasks', len(orphaned))
+
+        self.start_tasks(ready)
+
+        return {'started': ready, 'orphaned': orphaned}
+
     def attempt_transaction(self, task_uuid):
 
         task = self.persistence_interface.get_task_from_uuid(task_uuid)
 
         unsatisfied_prior_tasks = self.get_unsatisfied_prior_tasks(task)
         if len(unsatisfied_prior_tasks) > 0:
-            print('Skipping {}: prior tasks {} unsatisfied'.format(
-                task.id,
-                [f'{u.id} ({u.uuid})' for u in unsatisfied_prior_tasks]))
-            return
+
+            if self.has_dependency_cycle(task):
+                logger.warning(f'Skipping {task.id}: task depends on itself')
+                self.persistence_interface.set_task_status_text(task, 'FAILED: Dependency cycle')
+                return
+
+            # The task is started again by the scheduler once its priors succeed
+            if self.dependency_scheduler.block(task_uuid, [u.uuid for u in unsatisfied_prior_tasks]) > 0:
+                logger.debug('Skipping {}: prior tasks {} unsatisfied'.format(
+                    task.id,
+                    [f'{u.id} ({u.uuid})' for u in unsatisfied_prior_tasks]))
+                self.metrics.increment('attempts_blocked')
+                return
 
         topup_uuid = self.topup_if_required(task.signing_wallet, task_uuid)
         if topup_uuid:
-            print(f'Skipping {task.id}: Topup required')
+            logger.debug(f'Skipping {task.id}: Topup required')
+            self.dependency_scheduler.block(task_uuid, [topup_uuid])
+            self.metrics.increment('attempts_blocked_on_topup')
             return
 
         # This next section is designed to ensure that we don't have two transactions running for the same task
@@ -353,11 +530,13 @@ class TransactionProcessor(object):
             if have_lock:
                 current_status = task.status
                 if current_status in ['SUCCESS', 'PENDING']:
-                    print(f'Skipping {task.id}: task status is currently {current_status}')
+                    logger.debug(f'Skipping {task.id}: task status is currently {current_status}')
+                    self.metrics.increment('attempts_skipped')
                     return
                 transaction_obj = self.persistence_interface.create_blockchain_transaction(task_uuid)
             else:
-                print(f'Skipping {task.id}: Failed to aquire lock')
+                logger.debug(f'Skipping {task.id}: Failed to aquire lock')
+                self.metrics.increment('attempts_skipped')
                 return
 
         finally:
@@ -366,52 +545,233 @@ class TransactionProcessor(object):
 
         task_object = self.persistence_interface.get_task_from_uuid(task_uuid)
 
-        number_of_attempts = len(task_object.transactions)
+        self.metrics.increment('transaction_attempts')
+        if len(task_object.transactions) > 1:
+            self.metrics.increment('transaction_retries')
 
-        attempt_info = f'\nAttempt number: {number_of_attempts} ' \
-                       f' for invocation round: {task_object.previous_invocations + 1}'
+        if self.is_batchable_transfer(task_object):
+            return self.queue_batched_transfer(task_object, transaction_obj)
 
+        return self.dispatch_transaction(task_object, transaction_obj)
+
+    def dispatch_transaction(self, task_object, transaction_obj):
         if task_object.type == 'SEND_ETH':
 
             transfer_amount = int(task_object.amount)
 
-            print(f'Starting Send Eth Transaction for {task_uuid}.' + attempt_info)
-            chain1 = signature(utils.eth_endpoint('_process_send_eth_transaction'),
-                          args=(transaction_obj.id,
-                                task_object.recipient_address,
-                                transfer_amount,
-                                task_object.id))
+            endpoint, process = '_process_send_eth_transaction', self.process_send_eth_transaction
+            args = (transaction_obj.id,
+                    task_object.recipient_address,
+                    transfer_amount,
+                    task_object.id)
 
         elif task_object.type == 'FUNCTION':
-            print(f'Starting {task_object.function} Transaction for {task_uuid}.' + attempt_info)
-            chain1 = signature(utils.eth_endpoint('_process_function_transaction'),
-                               args=(transaction_obj.id,
-                                     task_object.contract_address,
-                                     task_object.abi_type,
-                                     task_object.function,
-                                     task_object.args,
-                                     task_object.kwargs,
-                                     task_object.gas_limit,
-                                     task_object.id))
+            endpoint, process = '_process_function_transaction', self.process_function_transaction
+            args = (transaction_obj.id,
+                    task_object.contract_address,
+                    task_object.abi_type,
+                    task_object.function,
+                    task_object.args,
+                    task_object.kwargs,
+                    task_object.gas_limit,
+                    task_object.id)
 
         elif task_object.type == 'DEPLOY_CONTRACT':
-            print(f'Starting Deploy {task_object.contract_name} Contract Transaction for {task_uuid}.' + attempt_info)
-            chain1 = signature(utils.eth_endpoint('_process_deploy_contract_transaction'),
-                               args=(transaction_obj.id,
-                                     task_object.contract_name,
-                                     task_object.args,
-                                     task_object.kwargs,
-                                     task_object.gas_limit,
-                                     task_object.id))
+            endpoint, process = '_process_deploy_contract_transaction', self.process_deploy_contract_transaction
+            args = (transaction_obj.id,
+                    task_object.contract_name,
+                    task_object.args,
+                    task_object.kwargs,
+                    task_object.gas_limit,
+                    task_object.id)
         else:
             raise Exception(f"Task type {task_object.type} not recognised")
 
-        chain2 = signature(utils.eth_endpoint('_check_transaction_response'))
+        if self.submit_pipeline == 'fused':
+            return self.submit_and_track(process, args, transaction_obj.id)
+
+        chain1 = signature(utils.eth_endpoint(endpoint), args=args,
+                           queue=self.get_processor_queue(task_object.signing_wallet.address))
 
         error_callback = signature(utils.eth_endpoint('_log_error'), args=(transaction_obj.id,))
 
+        if self.transaction_watcher == 'block' or self.submit_pipeline == 'async':
+            # The block watcher or async submitter picks the transaction up by hash once it's mined
+            return chain1.on_error(error_callback).delay()
+
+        chain2 = signature(utils.eth_endpoint('_check_transaction_response'))
+
         return chain([chain1, chain2]).on_error(error_callback).delay()
 
+    def submit_and_track(self, process, args, transaction_id):
+        """
+        Builds, nonces, signs and sends the transaction in this worker and session, rather than handing each step
+        to a separate celery task. Celery is then only used for retries, which process_transaction schedules
+        itself on failure, and for checking the receipt when the block watcher isn't running.
+        """
+        try:
+            transaction_id = process(*args)
+
+        except Exception as e:
+            # Raising would get this attempt retried as a whole, on top of the new attempt already scheduled
+            self.log_error(None, e, None, transaction_id)
+            return None
+
+        if self.transaction_watcher != 'block':
+            signature(utils.eth_endpoint('_check_transaction_response'), args=(transaction_id,)).apply_async(
+                countdown=ETH_CHECK_TRANSACTION_BASE_TIME
+            )
+
+        return transaction_id
+
+    def get_processor_queue(self, signing_address):
+        """
+        With processor partitions configured, each signing wallet is always handled by the same processor queue,
+        so the workers consuming it don't contend with other workers over the wallet's lock,
+        and the wallet's contracts stay cached in their memory.
+        """
+        if not self.processor_queue_ring:
+            return 'processor'
+
+        return self.processor_queue_ring.get_node(signing_address.lower())
+
+    def is_batchable_transfer(self, task):
+        return (
+            self.multi_transfer_contract_address is not None
+            and task.type == 'FUNCTION'
+            and task.abi_type == 'ERC20'
+            and task.function in ['transfer', 'transferFrom']
+            and not task.kwargs
+        )
+
+    def get_transfer_source(self, task):
+        """
+        The address a batchable transfer's tokens are taken from. Transfers are queued by this,
+        since a single multi-transfer call can only spend the tokens of one address.
+        """
+        if task.function == 'transferFrom':
+            return task.args[0]
+
+        return task.signing_wallet.address
+
+    def queue_batched_transfer(self, task, transaction_obj):
+        signing_address = task.signing_wallet.address
+        from_address = self.get_transfer_source(task)
+
+        if self.transfer_batcher.add(signing_address, task.contract_address, from_address, transaction_obj.id):
+            signature(utils.eth_endpoint('_process_transfer_batch'),
+                      args=(signing_address, task.contract_address, from_address)).apply_async(
+                countdown=self.multi_transfer_window,
+                queue=self.get_processor_queue(signing_address)
+            )
+
+    def get_transfer_batch_size(self, token_address, function='transfer'):
+        transfer_gas = self.gas_profiles.get_gas_used(token_address, 'ERC20', function) or DEFAULT_TRANSFER_GAS
+
+        return max(1, min(self.multi_transfer_max_batch_size, self.multi_transfer_gas_budget // transfer_gas))
+
+    def process_transfer_batch(self, signing_address, token_address, from_address=None):
+        """
+        Sends up to one gas-budget-sized chunk of the queued transfers as a single multi-transfer call.
+        Every task in the chunk keeps its own transaction, and they all share the hash of the batch,
+        so each task still resolves on its own when the batch is mined.
+
+        Transfers of the signing wallet's own tokens are sent with multiTransfer, while transferFrom calls
+        spending another address's tokens are sent with multiTransferFrom, which the contract only accepts
+        from callers that the address has approved as spenders.
+
+        Falls back to sending the transfers individually if the multi-transfer contract
+        hasn't been approved to spend enough of the source address's tokens.
+        """
+        # Batches queued before transferFrom calls were batched don't pass a source address
+        from_address = from_address or signing_address
+        is_transfer_from = from_address != signing_address
+
+        transaction_ids, remaining = self.transfer_batcher.pop(
+            signing_address, token_address, from_address,
+            self.get_transfer_batch_size(token_address, 'transferFrom' if is_transfer_from else 'transfer')
+        )
+
+        if remaining:
+            signature(utils.eth_endpoint('_process_transfer_batch'),
+                      args=(signing_address, token_address, from_address)).apply_async(
+                queue=self.get_processor_queue(signing_address)
+            )
+
+        transactions = [self.persistence_interface.get_transaction(i) for i in transaction_ids]
+
+        if not transactions:
+            return None
+
+        recipients = []
+        amounts = []
+        for transaction in transactions:
+            # The recipient and amount are always the last two args, for both transfer and transferFrom
+            *_, recipient, amount = transaction.task.args
+            recipients.append(recipient)
+            amounts.append(int(amount))
+
+        if len(transactions) == 1 or not self.has_multi_transfer_allowance(from_address, token_address, sum(amounts)):
+            for transaction in transactions:
+                self.dispatch_transaction(transaction.task, transaction)
+            return None
+
+        logger.debug(f'Sending batch of {len(transactions)} transfers of {token_address} from {from_address}')
+
+        carrier, *others = transactions
+
+        if is_transfer_from:
+            batch_call = self.registry.get_contract_function(
+                self.multi_transfer_contract_address, 'multiTransferFrom', 'MultiTransfer'
+            )(token_address, from_address, recipients, amounts)
+        else:
+            batch_call = self.registry.get_contract_function(
+                self.multi_transfer_contract_address, 'multiTransfer', 'MultiTransfer'
+            )(token_address, recipients, amounts)
+
+        try:
+            self.process_transaction(carrier.id, batch_call, batched_transaction_ids=[t.id for t in others])
+
+        except Exception as e:
+            # Not retried as a batch. process_transaction has already made a new attempt for the carrier's task,
+            # so the rest each get one too, and are queued to be batched again
+            self.persistence_interface.bulk_update_transaction_data([
+                (t.id, {'status': 'FAILED', 'error': type(e).__name__, 'message': str(e)})
+                for t in transactions
+            ])
+
+            for transaction in others:
+                try:
+                    self.new_transaction_attempt(transaction.task)
+                except TaskRetriesExceededError:
+                    pass
+
+            self.metrics.increment('transfer_batch_failures')
+
+            return None
+
+        self.metrics.increment('transfer_batches')
+        self.metrics.increment('batched_transfers', len(transactions))
+
+        if self.transaction_watcher != 'block' and self.submit_pipeline != 'async':
+            signature(utils.eth_endpoint('_check_transaction_response'), args=(carrier.id,)).delay()
+
+        return carrier.id
+
+    def has_multi_transfer_allowance(self, owner_address, token_address, amount):
+        allowance = self.call_contract_function(
+            token_address, 'ERC20', 'allowance', args=(owner_address, self.multi_transfer_contract_address)
+        )
+
+        if allowance < amount:
+            logger.warning(
+                f'Multi-transfer contract allowance for {owner_address} too low, sending transfers individually'
+            )
+            self.metrics.increment('multi_transfer_allowance_shortfalls')
+            return False
+
+        return True
+
     def get_signing_wallet_object(self, signing_address, encrypted_private_key):
         if signing_address:
 
@@ -440,10 +800,7 @@ class TransactionProcessor(object):
         }
 
         if not getattr(exc, 'is_logged', False):
-            print("LOGGING")
             self.persistence_interface.update_transaction_data(transaction_id, data)
-        else:
-            print("NOT LOGGING")
 
     def new_transaction_attempt(self, task):
         number_of_attempts_this_round = abs(
@@ -464,9 +821,189 @@ class TransactionProcessor(object):
             )
 
 
+    def publish_wallet_pending_depths(self):
+        return self.persistence_interface.publish_wallet_pending_depths()
+
+    def rebroadcast_stale_transactions(self):
+        """
+        Finds submitted transactions that still haven't been mined, and sends them again from the journal.
+        Once a transaction has been rebroadcast enough times without being mined, it's replaced by the same
+        transaction at the same nonce with a higher gas price, rather than failing it and leaving a nonce gap
+        that holds up every later transaction from the wallet.
+        """
+        stale_before = datetime.datetime.utcnow() - datetime.timedelta(seconds=self.rebroadcast_after_seconds)
+
+        counts = {'resolved': 0, 'rebroadcast': 0, 'replaced': 0, 'failed': 0}
+
+        for transaction in self.persistence_interface.get_stale_submitted_transactions(stale_before):
+            outcome = self.rebroadcast_transaction(transaction)
+            if outcome:
+                counts[outcome] += 1
+
+        return counts
+
+    def rebroadcast_transaction(self, transaction):
+        hashes = [transaction.hash] + (transaction.replaced_hashes or [])
+
+        mined = self.find_mined_hash(hashes)
+        if mined:
+            # Mined after all, possibly as one of the transactions it replaced
+            self.resolve_transaction(transaction, mined)
+            return 'resolved'
+
+        signing_address = transaction.signing_wallet.address
+        if self.w3.eth.getTransactionCount(signing_address) > transaction.nonce:
+            # Something has been mined at the nonce. It may be one of ours, mined since the receipts were checked
+            mined = self.find_mined_hash(hashes)
+            if mined:
+                self.resolve_transaction(transaction, mined)
+                return 'resolved'
+
+            confirmed_block = max(self.w3.eth.blockNumber - self.nonce_consumed_confirmations, 0)
+            if self.w3.eth.getTransactionCount(signing_address, block_identifier=confirmed_block) <= transaction.nonce:
+                # Not buried deep enough yet to rule out a reorg bringing ours back, so check again next time
+                return None
+
+            # The nonce has been used by something we don't know about, so none of our versions can be mined
+            self.resolve_transaction(transaction, {
+                'status': 'FAILED',
+                'error': 'Nonce Consumed',
+                'message': f'Nonce {transaction.nonce} used by another transaction'
+            })
+            return 'failed'
+
+        if transaction.status == 'PENDING':
+            return self.resend_transaction(transaction)
+
+        # Timed out, so retry_failed or new_transaction_attempt may be making a new attempt for the task.
+        # Resending puts the transaction back to pending, and holding the task's lock until then
+        # stops a new attempt being created in between, as attempt_transaction skips pending tasks
+        have_lock = False
+        lock = self.red.lock(f'TaskID-{transaction.task.id}', timeout=10)
+        try:
+            have_lock = lock.acquire(blocking_timeout=1)
+            if not have_lock:
+                logger.debug(f'Skipping rebroadcast of transaction {transaction.id}: Failed to aquire lock')
+                return None
+
+            if self.persistence_interface.has_newer_transaction_attempt(transaction):
+                logger.debug(f'Skipping rebroadcast of transaction {transaction.id}: task has a newer attempt')
+                return None
+
+            return self.resend_transaction(transaction)
+
+        finally:
+            if have_lock:
+                lock.release()
+
+    def find_mined_hash(self, hashes):
+        """
+        :return: the result for whichever of the hashes has been mined, with the hash included, or None
+        """
+        for tx_hash in hashes:
+            result = self.check_transaction_hash(tx_hash)
+            if result['status'] != 'PENDING':
+                return {**result, 'hash': tx_hash}
+
+        return None
+
+    def resend_transaction(self, transaction):
+        """
+        Rebroadcasts the transaction as it was signed, or replaces it at a higher gas price
+        once it's been rebroadcast enough times
+        """
+        if (transaction.rebroadcast_count or 0) < self.rebroadcasts_before_replacement:
+            try:
+                self.w3.eth.sendRawTransaction(transaction.raw_transaction)
+            except ValueError as e:
+                # Nodes reject transactions they already have, which is fine
+                logger.debug(f'Rebroadcast of transaction {transaction.id}: {str(e)}')
+
+            self._update_journaled_transaction(transaction, {
+                'rebroadcast_count': (transaction.rebroadcast_count or 0) + 1
+            })
+            self.metrics.increment('rebroadcasts')
+            return 'rebroadcast'
+
+        if (transaction.replacement_count or 0) >= self.max_gas_price_replacements:
+            return None
+
+        return self.replace_transaction(transaction)
+
+    def replace_transaction(self, transaction):
+        # Nodes only accept a replacement at the same nonce if it pays at least 10% more
+        gas_price = max(int(transaction.gas_price * self.replacement_gas_price_multiplier), self.get_gas_price())
+
+        txn = {**transaction.unsigned_transaction, 'gasPrice': gas_price}
+
+        signed_txn = self.w3.eth.account.signTransaction(
+            txn, private_key=self.signing_key_cache.get_private_key(transaction.signing_wallet)
+        )
+
+        try:
+            self.w3.eth.sendRawTransaction(signed_txn.rawTransaction)
+        except ValueError as e:
+            logger.warning(f'Replacement of transaction {transaction.id} failed: {str(e)}')
+            return None
+
+        logger.info(f'Replaced transaction {transaction.id} at nonce {transaction.nonce} with gas price {gas_price}')
+
+        old_hash = transaction.hash
+
+        data = {
+            'hash': signed_txn.hash.hex(),
+            'raw_transaction': signed_txn.rawTransaction.hex(),
+            'unsigned_transaction': txn,
+            'gas_price': gas_price,
+            'rebroadcast_count': 0,
+            'replacement_count': (transaction.replacement_count or 0) + 1,
+            'replaced_hashes': [old_hash] + (transaction.replaced_hashes or [])
+        }
+
+        # Batched transfers share the carrier transaction's hash, so they have to follow it to the replacement
+        batched_transactions = [
+            t for t in self.persistence_interface.get_unresolved_transactions_by_hash([old_hash])
+            if t.id != transaction.id
+        ]
+
+        self._update_journaled_transaction(transaction, data)
+        self.persistence_interface.bulk_update_transaction_data(
+            [(t.id, {'hash': data['hash'], 'status': 'PENDING'}) for t in batched_transactions]
+        )
+
+        self.metrics.increment('gas_price_replacements')
+        return 'replaced'
+
+    def _update_journaled_transaction(self, transaction, data):
+        self.persistence_interface.update_transaction_data(transaction.id, {
+            **data,
+            'status': 'PENDING',
+            'last_broadcast_date': datetime.datetime.utcnow()
+        })
+
+    def resolve_transaction(self, transaction, result):
+        """
+        Updates a transaction, along with any batched transactions sharing its hash, and acts on the result
+        """
+        transactions = [transaction] + [
+            t for t in self.persistence_interface.get_unresolved_transactions_by_hash([transaction.hash])
+            if t.id != transaction.id
+        ]
+
+        self.persistence_interface.bulk_update_transaction_data([(t.id, result) for t in transactions])
+
+        for t in transactions:
+            self.handle_transaction_result(t, result)
+
+    def get_metrics(self):
+        return self.metrics.get_all()
+
     def get_serialised_task_from_uuid(self, uuid):
         return self.persistence_interface.get_serialised_task_from_uuid(uuid)
 
+    def get_serialised_tasks_from_uuids(self, uuids):
+        return self.persistence_interface.get_serialised_tasks_from_uuids(uuids)
+
     def call_contract_function(self,
                                contract_address: str, abi_type: str, function_name: str,
                                args: Optional[tuple] = None, kwargs: Optional[dict] = None,
@@ -493,13 +1030,72 @@ class TransactionProcessor(object):
 
         function = function_list(*args, **kwargs)
 
-        txn_meta = {'gasPrice': self.get_gas_price()}
+        # Calls aren't mined, so there's no need for a gas price
+        txn_meta = {}
 
         if signing_address:
             txn_meta['from'] = signing_address
 
         call_data = function.call(txn_meta)
 
+        return self._format_call_data(call_data)
+
+    def call_contract_functions(self, calls, block_identifier='latest'):
+        """
+        Batch version of call_contract_function. Makes all the calls in as few JSON-RPC round trips as possible.
+
+        :param calls: a list of dicts, each with contract_address, abi_type and function keys,
+        and optionally args, kwargs and signing_address
+        :param block_identifier: block to make every call at, so the results are consistent with each other
+        :return: a list of call results, in the same order as the calls. A call that fails returns None
+        """
+
+        functions = []
+        transactions = []
+        for call in calls:
+            args = call.get('args') or tuple()
+            if not isinstance(args, (list, tuple)):
+                args = [args]
+
+            kwargs = call.get('kwargs') or dict()
+
+            contract = self.registry.get_contract_by_address(call['contract_address'], call.get('abi_type'))
+
+            function = getattr(contract.functions, call['function'])(*args, **kwargs)
+
+            txn = {'to': function.address, 'data': contract.encodeABI(call['function'], args, kwargs)}
+
+            if call.get('signing_address'):
+                txn['from'] = call['signing_address']
+
+            functions.append(function)
+            transactions.append(txn)
+
+        if isinstance(block_identifier, int):
+            block_identifier = hex(block_identifier)
+
+        raw_results = self.rpc_batch_client.eth_call_batch(transactions, block_identifier)
+
+        results = []
+        for function, raw_result in zip(functions, raw_results):
+            if isinstance(raw_result, Exception):
+                logger.warning(f'Batch call to {function.fn_name} on {function.address} failed: {raw_result}')
+                results.append(None)
+                continue
+
+            output_types = [output['type'] for output in function.abi['outputs']]
+            decoded = decode_abi(output_types, to_bytes(hexstr=raw_result))
+
+            decoded = [to_checksum_address(value) if output_type == 'address' else value
+                       for output_type, value in zip(output_types, decoded)]
+
+            call_data = decoded[0] if len(decoded) == 1 else decoded
+
+            results.append(self._format_call_data(call_data))
+
+        return results
+
+    def _format_call_data(self, call_data):
         if isinstance(call_data, bytes):
             return call_data.rstrip(b'\x00').decode()
 
@@ -641,6 +1237,109 @@ class TransactionProcessor(object):
             'unstarted_count': len(unstarted_tasks) if unstarted_tasks else 'Unknown'
         }
 
+    def reconcile_nonces(self):
+        """
+        Reconciles the redis nonce allocator for every wallet it has handed out nonces for
+        """
+        gaps_added = {}
+        for address in self.persistence_interface.nonce_allocator.get_wallet_addresses():
+            wallet = self.persistence_interface.get_wallet_by_address(address)
+            if wallet:
+                gaps_added[address] = self.persistence_interface.reconcile_wallet_nonces(wallet)
+
+        return gaps_added
+
+    def fill_nonce_gaps(self):
+        """
+        Finds nonces that a wallet's later transactions are stuck behind, and fills them
+        """
+        filled = {}
+        for wallet in self.persistence_interface.get_wallets_with_pending_transactions():
+            filled[wallet.address] = self.fill_wallet_nonce_gaps(wallet)
+
+        return filled
+
+    def fill_wallet_nonce_gaps(self, signing_wallet_obj):
+        """
+        Compares the wallet's local nonce ledger with the chain. Any nonce the node has no transaction for, below the
+        highest nonce we've sent, is a gap. Once a gap has been open for long enough, it's filled by resending our
+        own transaction at that nonce if the node dropped it, or otherwise by a zero value transfer to self.
+
+        :return: list of the nonces filled
+        """
+        address = signing_wallet_obj.address
+
+        # Shares the lock with nonce claiming, so a gap can't be handed to a new transaction while it's being filled
+        with self.red.lock(address, timeout=600):
+            self.persistence_interface.session.commit()
+
+            latest_nonce = self.w3.eth.getTransactionCount(address, block_identifier='latest')
+            pending_nonce = self.w3.eth.getTransactionCount(address, block_identifier='pending')
+
+            ledger = self.persistence_interface.get_nonce_ledger(signing_wallet_obj, latest_nonce)
+            sent_nonces = [n for n, t in ledger.items() if t.hash]
+
+            # The node's pending count stops at the first nonce it has nothing for
+            gaps = []
+            if sent_nonces and pending_nonce < max(sent_nonces):
+                gaps = [pending_nonce] + [
+                    n for n in range(pending_nonce + 1, max(sent_nonces))
+                    if n not in ledger or ledger[n].status != 'PENDING'
+                ]
+
+            gap_ages = self.nonce_gap_tracker.observe(address, gaps)
+
+            filled = []
+            for nonce, age in gap_ages.items():
+                if age < self.nonce_gap_fill_after_seconds:
+                    continue
+
+                transaction = ledger.get(nonce)
+
+                if transaction and transaction.status == 'PENDING':
+                    if transaction.raw_transaction:
+                        # Ours, but dropped by the node
+                        self.rebroadcast_transaction(transaction)
+                        filled.append(nonce)
+                    # Otherwise it's still being sent
+                    continue
+
+                if self.nonce_allocator == 'redis' and \
+                        not self.persistence_interface.nonce_allocator.take(address, nonce):
+                    continue
+
+                if self.send_nonce_filler(signing_wallet_obj, nonce):
+                    filled.append(nonce)
+
+            return filled
+
+    def send_nonce_filler(self, signing_wallet_obj, nonce):
+        txn = {
+            'to': signing_wallet_obj.address,
+            'value': 0,
+            'gas': 21000,
+            'gasPrice': self.get_gas_price(),
+            'nonce': nonce
+        }
+
+        if self.ethereum_chain_id:
+            txn['chainId'] = self.ethereum_chain_id
+
+        signed_txn = self.w3.eth.account.signTransaction(
+            txn, private_key=self.signing_key_cache.get_private_key(signing_wallet_obj)
+        )
+
+        try:
+            self.w3.eth.sendRawTransaction(signed_txn.rawTransaction)
+        except ValueError as e:
+            logger.warning(f'Filling nonce gap {nonce} for {signing_wallet_obj.address} failed: {str(e)}')
+            return False
+
+        logger.info(f'Filled nonce gap {nonce} for {signing_wallet_obj.address} with {signed_txn.hash.hex()}')
+
+        self.metrics.increment('nonce_gaps_filled')
+        return True
+
     def _retry_task(self, task):
         self.persistence_interface.increment_task_invokations(task)
         signature(utils.eth_endpoint('_attempt_transaction'), args=(task.uuid,)).delay()
@@ -653,10 +1352,26 @@ class TransactionProcessor(object):
                  gas_price_gwei,
                  gas_limit,
                  persistence_interface,
-                 task_max_retries=3):
+                 task_max_retries=3,
+                 nonce_allocator='locked',
+                 transaction_watcher='polling',
+                 multi_transfer_contract_address=None,
+                 submit_pipeline='chain',
+                 processor_partitions=0,
+                 metrics=None):
 
             self.registry = ContractRegistry(w3)
 
+            # Shared with the persistence interface when it's passed in, so there's one set of config and one socket
+            self.metrics = metrics or Metrics(
+                red, statsd_host=config.ETH_STATSD_HOST, statsd_port=config.ETH_STATSD_PORT
+            )
+            self.gas_profiles = GasProfiles(red, self.metrics)
+            self.gas_profile_headroom = config.ETH_GAS_PROFILE_HEADROOM
+            self.signing_key_cache = SigningKeyCache(
+                self.metrics, config.ETH_SIGNING_KEY_CACHE_SIZE, config.ETH_SIGNING_KEY_CACHE_TTL
+            )
+
             self.ethereum_chain_id = int(ethereum_chain_id) if ethereum_chain_id else None
             self.w3 = w3
             self.red = red
@@ -665,8 +1380,42 @@ class TransactionProcessor(object):
             self.gas_limit = gas_limit
             self.transaction_max_value = self.gas_price * self.gas_limit
 
+            self.rpc_batch_client = JSONRPCBatchClient(config.ETH_HTTP_PROVIDER, config.ETH_RPC_BATCH_SIZE)
+
+            self.gas_price_oracle = GasPriceOracle(red, self.metrics, self.gas_price, config.ETH_GAS_PRICE_PROVIDER)
+
             self.persistence_interface = persistence_interface
 
             self.task_max_retries = task_max_retries
 
+            self.nonce_allocator = nonce_allocator
+
+            self.transaction_watcher = transaction_watcher
+
+            self.submit_pipeline = submit_pipeline
+
+            self.erc20_fast_path = config.ETH_ERC20_FAST_PATH
+
+            self.rebroadcast_after_seconds = config.ETH_REBROADCAST_AFTER
+            self.rebroadcasts_before_replacement = config.ETH_REBROADCASTS_BEFORE_REPLACEMENT
+            self.replacement_gas_price_multiplier = config.ETH_REPLACEMENT_GAS_PRICE_MULTIPLIER
+            self.max_gas_price_replacements = config.ETH_MAX_GAS_PRICE_REPLACEMENTS
+            self.nonce_consumed_confirmations = config.ETH_NONCE_CONSUMED_CONFIRMATIONS
+
+            self.nonce_gap_tracker = NonceGapTracker(red, self.metrics)
+            self.nonce_gap_fill_after_seconds = config.ETH_NONCE_GAP_FILL_AFTER
+
+            self.processor_queue_ring = None
+            if processor_partitions:
+                self.processor_queue_ring = HashRing([f'processor-{i}' for i in range(processor_partitions)])
+
+            self.multi_transfer_contract_address = multi_transfer_contract_address
+            self.multi_transfer_window = config.ETH_MULTI_TRANSFER_WINDOW
+            self.multi_transfer_max_batch_size = config.ETH_MULTI_TRANSFER_MAX_BATCH_SIZE
+            self.multi_transfer_gas_budget = config.ETH_MULTI_TRANSFER_GAS_BUDGET
+
+            self.transfer_batcher = TransferBatcher(red)
+
+            self.dependency_scheduler = DependencyScheduler(red, persistence_interface)
+
 
@@ -0,0 +1,60 @@
+import requests
+
+from eth_manager.exceptions import IncompleteBatchResponseError
+
+
+class JSONRPCBatchClient(object):
+    """
+    Sends many JSON-RPC requests to the node in a single HTTP round trip, using JSON-RPC batching.
+    Uses a persistent session so the connection to the node is reused between batches.
+    """
+
+    def _post_batch(self, requests_list):
+        """
+        :return: a list of responses in the same order as requests_list
+        """
+        response = self.session.post(self.provider_url, json=requests_list, timeout=self.timeout)
+        response.raise_for_status()
+
+        # Nodes may return batch responses in any order, and drop some altogether
+        responses = {r.get('id'): r for r in response.json()}
+
+        missing_ids = [r['id'] for r in requests_list if r['id'] not in responses]
+        if missing_ids:
+            raise IncompleteBatchResponseError(f'No response to JSON-RPC batch request ids {missing_ids}')
+
+        return [responses[r['id']] for r in requests_list]
+
+    def request_batch(self, method, params_list):
+        """
+        :param method: the JSON-RPC method used for every request in the batch
+        :param params_list: a list of params, one for each request
+        :return: a list of results in the same order as params_list. Requests that errored have an Exception instead
+        """
+        results = []
+        for start in range(0, len(params_list), self.batch_size):
+            chunk = params_list[start:start + self.batch_size]
+
+            requests_list = [
+                {'jsonrpc': '2.0', 'id': start + i, 'method': method, 'params': params}
+                for i, params in enumerate(chunk)
+            ]
+
+            for response in self._post_batch(requests_list):
+                if 'error' in response:
+                    results.append(Exception(response['error'].get('message', 'JSON-RPC Error')))
+                else:
+                    results.append(response['result'])
+
+        return results
+
+    def eth_call_batch(self, transactions, block_identifier='latest'):
+        return self.request_batch('eth_call', [[txn, block_identifier] for txn in transactions])
+
+    def __init__(self, provider_url, batch_size=500, timeout=30):
+
+        self.provider_url = provider_url
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+        self.session = requests.Session()
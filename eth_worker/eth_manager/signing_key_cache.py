@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import OrderedDict
+
+from eth_keys import keys
+
+
+class SigningKeyCache(object):
+    """
+    Process-local LRU cache of ready-to-sign private key objects, so that signing a transaction doesn't
+    re-derive the Fernet key, decrypt and parse the wallet's key every time.
+
+    Entries are keyed on the wallet's encrypted key as well as its address, so a rotated or re-encrypted key is
+    never served from the cache without having to invalidate anything, and the stale entry ages out like any other.
+    Entries expire after a TTL so decrypted keys don't sit in memory indefinitely.
+    Keys are never written anywhere outside this process.
+
+    Hit, miss and decryption time counters are kept locally and flushed to the metrics hash every
+    flush_interval_seconds, rather than adding a redis round trip to every signature.
+    """
+
+    def get_private_key(self, wallet):
+        """
+        :param wallet: BlockchainWallet
+        :return: eth_keys PrivateKey for the wallet
+        """
+        cache_key = (wallet.address, wallet.encrypted_private_key)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry[1] > now:
+                self._entries.move_to_end(cache_key)
+                self._count('signing_key_cache_hits')
+                return entry[0]
+
+        started = time.perf_counter()
+        private_key = wallet.private_key
+        if isinstance(private_key, str):
+            private_key = bytes.fromhex(private_key.replace('0x', ''))
+        private_key = keys.PrivateKey(private_key)
+        decrypt_us = int((time.perf_counter() - started) * 1e6)
+
+        with self._lock:
+            self._entries[cache_key] = (private_key, now + self.ttl_seconds)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+            self._count('signing_key_cache_misses')
+            # Average decryption time per miss times the number of hits gives the CPU time saved
+            self._count('signing_key_decrypt_us', decrypt_us)
+
+        return private_key
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._flush()
+
+    def _count(self, name, amount=1):
+        self._counts[name] = self._counts.get(name, 0) + amount
+
+        if time.time() - self._last_flush >= self.flush_interval_seconds:
+            self._flush()
+
+    def _flush(self):
+        counts, self._counts = self._counts, {}
+        self._last_flush = time.time()
+
+        for name, amount in counts.items():
+            self.metrics.increment(name, amount)
+
+    def __init__(self, metrics, max_size=1000, ttl_seconds=300, flush_interval_seconds=10):
+
+        self.metrics = metrics
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._entries = OrderedDict()
+        self._counts = {}
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
@@ -1,8 +1,7 @@
-from time import sleep
-
 from celery import signature
 
-from eth_manager import utils
+from eth_manager import utils, persistence_interface
+from share import blockchain_task_status as task_status
 
 
 def deploy_contract_task(signing_address, contract_name, args=None, prior_tasks=None):
@@ -81,21 +80,32 @@ def get_wallet_balance(address, token_address):
     return balance_wei
 
 
-def await_task_success(task_uuid, timeout=None, poll_frequency=0.5):
-    elapsed = 0
+def get_task(task_uuid):
+    sig = signature(
+        utils.eth_endpoint('get_task'),
+        kwargs={'task_uuid': task_uuid}
+    )
+
+    return utils.execute_synchronous_celery(sig)
+
+
+def await_task_success(task_uuid, timeout=None, recheck_interval=5):
+    """
+    Blocks until the task succeeds, waking up on the status notifications published by the persistence interface
+    rather than repeatedly asking a worker for the task.
+    """
     print(f'Awaiting success for task uuid: {task_uuid}')
-    while timeout is None or elapsed <= timeout:
-        sig = signature(
-            utils.eth_endpoint('get_task'),
-            kwargs={'task_uuid': task_uuid}
-        )
 
-        task = utils.execute_synchronous_celery(sig)
+    def get_status():
+        status = persistence_interface.get_cached_task_status(task_uuid)
+        if status is None:
+            # Not in the cache yet, so fall back to the worker
+            task = get_task(task_uuid)
+            status = task and task['status']
+
+        # The task may just not have been created yet, so keep waiting for it
+        return status or 'UNKNOWN'
 
-        if task and task['status'] == 'SUCCESS':
-            return task
-        else:
-            sleep(poll_frequency)
-            elapsed += poll_frequency
+    task_status.await_task_success(persistence_interface.red, task_uuid, get_status, timeout, recheck_interval)
 
-    raise TimeoutError
+    return get_task(task_uuid)
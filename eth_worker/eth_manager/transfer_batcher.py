@@ -0,0 +1,62 @@
+# KEYS[1]: queued transaction ids, KEYS[2]: flush scheduled flag
+# ARGV[1]: max number of ids to pop
+# Returns the number of ids left in the queue, followed by the popped ids
+POP_SCRIPT = """
+local ids = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+redis.call('LTRIM', KEYS[1], #ids, -1)
+local remaining = redis.call('LLEN', KEYS[1])
+if remaining == 0 then
+    redis.call('DEL', KEYS[2])
+end
+table.insert(ids, 1, remaining)
+return ids
+"""
+
+
+class TransferBatcher(object):
+    """
+    Queues up the transactions for ERC20 transfers from the same signing wallet, token and source address,
+    so that they can be sent together as a single call to a multi-transfer contract.
+
+    Only one flush is scheduled per queue at a time. The flag that tracks this is cleared atomically with the
+    pop that empties the queue, so a transfer added at any point is either picked up by the current flush,
+    or schedules the next one.
+    """
+
+    def _keys(self, signing_address, token_address, from_address):
+        queue_id = f'{signing_address}-{token_address}'
+        # Queues of the signing wallet's own tokens keep the keys they had before transferFrom calls were batched
+        if from_address != signing_address:
+            queue_id += f'-{from_address}'
+
+        return [f'TransferBatch-{queue_id}', f'TransferBatchScheduled-{queue_id}']
+
+    def add(self, signing_address, token_address, from_address, transaction_id):
+        """
+        :return: True if no flush is currently scheduled for the queue, meaning the caller must schedule one
+        """
+        queue_key, scheduled_key = self._keys(signing_address, token_address, from_address)
+
+        pipe = self.red.pipeline()
+        pipe.rpush(queue_key, transaction_id)
+        # Expires in case the scheduled flush is lost, so the queue doesn't stall forever
+        pipe.set(scheduled_key, 1, nx=True, ex=self.scheduled_flag_ttl_seconds)
+        _, newly_scheduled = pipe.execute()
+
+        return bool(newly_scheduled)
+
+    def pop(self, signing_address, token_address, from_address, max_size):
+        """
+        :return: tuple of (list of up to max_size transaction ids, the number of ids still queued)
+        """
+        remaining, *transaction_ids = self._pop(keys=self._keys(signing_address, token_address, from_address), args=[max_size])
+
+        return [int(i) for i in transaction_ids], remaining
+
+    def __init__(self, red, scheduled_flag_ttl_seconds=300):
+
+        self.red = red
+
+        self.scheduled_flag_ttl_seconds = scheduled_flag_ttl_seconds
+
+        self._pop = self.red.register_script(POP_SCRIPT)
@@ -1,7 +1,10 @@
 import datetime
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, exists, event, inspect
+from sqlalchemy.orm import aliased
 
+import config
 from sempo_types import UUID, UUIDList
+from share import blockchain_task_status as task_status
 
 from sql_persistence.models import (
     BlockchainTransaction,
@@ -13,21 +16,47 @@ from eth_manager.exceptions import (
     WalletExistsError,
     LockedNotAcquired
 )
+from eth_manager.metrics import Metrics
+from eth_manager.nonce_allocator import NonceAllocator
 from sqlalchemy.orm import scoped_session
 class SQLPersistenceInterface(object):
 
+    # Read by the app when serialising blockchain taskable objects, and by anything waiting on a task to complete
+    TASK_STATUS_KEY_PREFIX = task_status.TASK_STATUS_KEY_PREFIX
+    TASK_STATUS_CACHE_SECONDS = task_status.TASK_STATUS_CACHE_SECONDS
+    TASK_STATUS_CHANNEL_PREFIX = task_status.TASK_STATUS_CHANNEL_PREFIX
+
+    # Read by the app when choosing which of an organisation's system wallets to sign with
+    WALLET_PENDING_DEPTH_KEY = 'SigningWalletPendingDepth'
+    # Tasks older than this are stuck or orphaned rather than queued, so don't count towards a wallet's depth
+    WALLET_PENDING_DEPTH_WINDOW_SECONDS = 60 * 10
+
     def _fail_expired_transactions(self):
         expire_time = datetime.datetime.utcnow() - datetime.timedelta(
             seconds=self.PENDING_TRANSACTION_EXPIRY_SECONDS
         )
 
+        expired_filter = and_(BlockchainTransaction.status == 'PENDING',
+                              BlockchainTransaction.updated < expire_time)
+
+        expired_task_ids = [
+            task_id for (task_id,) in
+            self.session.query(BlockchainTransaction.blockchain_task_id).filter(expired_filter).all()
+        ]
+
+        if not expired_task_ids:
+            return
+
         (self.session.query(BlockchainTransaction)
-         .filter(and_(BlockchainTransaction.status == 'PENDING',
-                      BlockchainTransaction.updated < expire_time))
+         .filter(expired_filter)
          .update({BlockchainTransaction.status: 'FAILED',
                   BlockchainTransaction.error: 'Timeout Error'},
                  synchronize_session=False))
 
+        self.update_task_statuses(expired_task_ids)
+
+        self.session.commit()
+
     def _unconsume_high_failed_nonces(self, signing_wallet_id, stating_nonce):
         expire_time = datetime.datetime.utcnow() - datetime.timedelta(
             seconds=self.PENDING_TRANSACTION_EXPIRY_SECONDS
@@ -54,14 +83,7 @@ class SQLPersistenceInterface(object):
          .update({BlockchainTransaction.nonce_consumed: False},
                  synchronize_session=False))
 
-    def _calculate_nonce(self, signing_wallet_obj, starting_nonce=0):
-
-        self._unconsume_high_failed_nonces(signing_wallet_obj.id, starting_nonce)
-        self._fail_expired_transactions()
-
-        # First find the highest *continuous* nonce that isn't either pending, or consumed
-        # (failed or succeeded on blockchain)
-
+    def _get_likely_consumed_nonces(self, signing_wallet_obj, starting_nonce=0):
         likely_consumed_nonces = (
             self.session.query(BlockchainTransaction)
                 .filter(BlockchainTransaction.signing_wallet == signing_wallet_obj)
@@ -76,10 +98,47 @@ class SQLPersistenceInterface(object):
                 )
                 .all())
 
+        return set(txn.nonce for txn in likely_consumed_nonces)
+
+    def get_nonce_ledger(self, signing_wallet_obj, starting_nonce=0):
+        """
+        The most recent transaction at each nonce from starting_nonce up that is either pending,
+        or has (as far as we know) consumed its nonce.
+
+        :return: dict of nonce to transaction
+        """
+        transactions = (
+            self.session.query(BlockchainTransaction)
+                .filter(BlockchainTransaction.signing_wallet == signing_wallet_obj)
+                .filter(BlockchainTransaction.ignore == False)
+                .filter(BlockchainTransaction.first_block_hash == self.first_block_hash)
+                .filter(BlockchainTransaction.nonce >= starting_nonce)
+                .filter(or_(BlockchainTransaction.status == 'PENDING',
+                            BlockchainTransaction.nonce_consumed == True))
+                .order_by(BlockchainTransaction.id.asc())
+                .all())
+
+        return {t.nonce: t for t in transactions}
+
+    def get_wallets_with_pending_transactions(self):
+        return (self.session.query(BlockchainWallet)
+                .join(BlockchainTransaction, BlockchainTransaction.signing_wallet_id == BlockchainWallet.id)
+                .filter(BlockchainTransaction.status == 'PENDING')
+                .filter(BlockchainTransaction.hash != None)
+                .filter(BlockchainTransaction.first_block_hash == self.first_block_hash)
+                .distinct()
+                .all())
+
+    def _calculate_nonce(self, signing_wallet_obj, starting_nonce=0):
+
+        self._unconsume_high_failed_nonces(signing_wallet_obj.id, starting_nonce)
+        self._fail_expired_transactions()
+
+        # First find the highest *continuous* nonce that isn't either pending, or consumed
+        # (failed or succeeded on blockchain)
+
         # Use a set to find continous nonces because txns in db may be out of order
-        nonce_set = set()
-        for txn in likely_consumed_nonces:
-            nonce_set.add(txn.nonce)
+        nonce_set = self._get_likely_consumed_nonces(signing_wallet_obj, starting_nonce)
 
         next_nonce = starting_nonce
         while next_nonce in nonce_set:
@@ -89,17 +148,20 @@ class SQLPersistenceInterface(object):
 
     def locked_claim_transaction_nonce(self, signing_wallet_obj, transaction_id):
         lock = self.red.lock(signing_wallet_obj.address, timeout=600)
-        print(f'Attempting lock for txn: {transaction_id} \n'
-              f'addr:{signing_wallet_obj.address}')
         # Commits here are because the database would sometimes timeout during a long lock
         # and could not cleanly restart with uncommitted data in the session. Committing before
         # the lock, and then once it's reclaimed lets the session gracefully refresh if it has to.
+        # It also hands the connection back to the pool while waiting, so waiters can't exhaust it.
         self.session.commit()
-        with lock:
+        with self.metrics.span('nonce_lock_wait', transaction_id=transaction_id, address=signing_wallet_obj.address):
+            lock.acquire()
+        try:
             self.session.commit()
             self.session.refresh(signing_wallet_obj)
             ct = self.claim_transaction_nonce(signing_wallet_obj, transaction_id)
             return ct
+        finally:
+            lock.release()
 
     def claim_transaction_nonce(self, signing_wallet_obj, transaction_id):
         network_nonce = self.w3.eth.getTransactionCount(signing_wallet_obj.address, block_identifier='pending')
@@ -115,6 +177,68 @@ class SQLPersistenceInterface(object):
 
         return calculated_nonce, blockchain_transaction.id
 
+    def allocate_transaction_nonce(self, signing_wallet_obj, transaction_id):
+        """
+        Claims a nonce from the redis nonce allocator, without taking the wallet lock.
+        Chain and database reconciliation happens separately, in reconcile_wallet_nonces.
+        """
+        blockchain_transaction = self.session.query(BlockchainTransaction).get(transaction_id)
+
+        if blockchain_transaction.nonce is not None:
+            return blockchain_transaction.nonce, blockchain_transaction.id
+
+        nonce = self.nonce_allocator.claim(signing_wallet_obj.address)
+        if nonce is None:
+            self._seed_nonce_allocator(signing_wallet_obj)
+            nonce = self.nonce_allocator.claim(signing_wallet_obj.address)
+
+        blockchain_transaction.signing_wallet = signing_wallet_obj
+        blockchain_transaction.nonce = nonce
+        blockchain_transaction.status = 'PENDING'
+        self.session.commit()
+
+        return nonce, blockchain_transaction.id
+
+    def _seed_nonce_allocator(self, signing_wallet_obj):
+        with self.red.lock(signing_wallet_obj.address, timeout=600):
+            network_nonce = self.w3.eth.getTransactionCount(signing_wallet_obj.address, block_identifier='pending')
+            consumed_nonces = self._get_likely_consumed_nonces(signing_wallet_obj, network_nonce)
+
+            next_nonce = max(consumed_nonces | {network_nonce - 1}) + 1
+
+            self.nonce_allocator.seed(signing_wallet_obj.address, next_nonce)
+
+    def reconcile_wallet_nonces(self, signing_wallet_obj):
+        """
+        Background counterpart to allocate_transaction_nonce. Brings the allocator counter up to the network nonce,
+        and marks any nonces between the network nonce and the counter that aren't used by a pending or consumed
+        transaction as gaps, so they are handed out again.
+
+        :return: the number of gaps added
+        """
+        address = signing_wallet_obj.address
+
+        # Shares the lock with locked_claim_transaction_nonce so the two modes can't interleave during a switch-over
+        with self.red.lock(address, timeout=600):
+            self.session.commit()
+
+            counter = self.nonce_allocator.get_counter(address)
+            if counter is None:
+                return 0
+
+            network_nonce = self.w3.eth.getTransactionCount(address, block_identifier='pending')
+
+            self._unconsume_high_failed_nonces(signing_wallet_obj.id, network_nonce)
+            self._fail_expired_transactions()
+            self.session.commit()
+
+            consumed_nonces = self._get_likely_consumed_nonces(signing_wallet_obj, network_nonce)
+
+            next_nonce = max(counter, network_nonce)
+            gaps = [n for n in range(network_nonce, next_nonce) if n not in consumed_nonces]
+
+            return self.nonce_allocator.reconcile(address, network_nonce, next_nonce, gaps)
+
     def update_transaction_data(self, transaction_id, transaction_data):
 
         transaction = self.session.query(BlockchainTransaction).get(transaction_id)
@@ -124,6 +248,72 @@ class SQLPersistenceInterface(object):
 
         self.session.commit()
 
+    def bulk_update_transaction_data(self, transaction_data_list):
+        """
+        :param transaction_data_list: list of (transaction_id, transaction_data) tuples, committed together
+        """
+        for transaction_id, transaction_data in transaction_data_list:
+            transaction = self.session.query(BlockchainTransaction).get(transaction_id)
+
+            for attribute in transaction_data:
+                setattr(transaction, attribute, transaction_data[attribute])
+
+        self.session.commit()
+
+    def get_stale_submitted_transactions(self, stale_before):
+        """
+        Journaled transactions that were sent before stale_before and haven't been seen mined.
+        Transactions failed by the pending expiry are included, since they may still be sitting in the mempool,
+        but not once their task has moved on to a newer attempt, or their nonce has been released for reuse.
+        """
+        last_broadcast = func.coalesce(BlockchainTransaction.last_broadcast_date, BlockchainTransaction.submitted_date)
+
+        transactions = (
+            self.session.query(BlockchainTransaction)
+                .join(BlockchainTask, BlockchainTransaction.blockchain_task_id == BlockchainTask.id)
+                .filter(BlockchainTransaction.raw_transaction != None)
+                .filter(BlockchainTransaction.nonce_consumed == True)
+                .filter(BlockchainTransaction.first_block_hash == self.first_block_hash)
+                .filter(or_(BlockchainTransaction.status == 'PENDING',
+                            and_(BlockchainTransaction.status == 'FAILED',
+                                 BlockchainTransaction.error == 'Timeout Error')))
+                .filter(BlockchainTask.status != 'SUCCESS')
+                .filter(last_broadcast < stale_before)
+                .order_by(BlockchainTransaction.nonce.asc())
+                .all())
+
+        return [t for t in transactions if t.id == max(sibling.id for sibling in t.task.transactions)]
+
+    def get_unresolved_transactions_by_hash(self, hashes):
+        """
+        Pending transactions with any of the hashes. Transactions failed by the pending expiry are included,
+        since they can still be mined, but only while they're the latest attempt at their task.
+        Once the task has been retried, the old attempt being mined mustn't retry it again.
+        """
+        newer_attempt = aliased(BlockchainTransaction)
+        has_newer_attempt = exists().where(
+            and_(newer_attempt.blockchain_task_id == BlockchainTransaction.blockchain_task_id,
+                 newer_attempt.id > BlockchainTransaction.id)
+        )
+
+        return (self.session.query(BlockchainTransaction)
+                .filter(BlockchainTransaction.hash.in_(hashes))
+                .filter(or_(BlockchainTransaction.status == 'PENDING',
+                            and_(BlockchainTransaction.status == 'FAILED',
+                                 BlockchainTransaction.error == 'Timeout Error',
+                                 ~has_newer_attempt)))
+                .all())
+
+    def has_newer_transaction_attempt(self, transaction):
+        """
+        Checks the database rather than the task's loaded transactions,
+        so attempts created by other workers since they were loaded are seen too
+        """
+        return self.session.query(
+            exists().where(and_(BlockchainTransaction.blockchain_task_id == transaction.blockchain_task_id,
+                                BlockchainTransaction.id > transaction.id))
+        ).scalar()
+
     def create_blockchain_transaction(self, task_uuid):
 
         task = self.session.query(BlockchainTask).filter_by(uuid=task_uuid).first()
@@ -262,12 +452,167 @@ class SQLPersistenceInterface(object):
 
         return task
 
+    def update_task_statuses(self, task_ids):
+        """
+        Marks tasks to have their status column recalculated when the session next commits.
+        Changes made through the session are picked up automatically, so this is only needed after bulk updates,
+        which bypass it.
+        """
+        self.session.info.setdefault('stale_task_ids', set()).update(task_ids)
+
+    def _mark_flushed_task_statuses_stale(self, session, flush_context):
+        """
+        Session after_flush hook. Notes the tasks whose status may have changed with the transactions and tasks
+        that were just written. Ids are only all assigned by now, and the flushed changes are still visible.
+        """
+        stale_task_ids = session.info.setdefault('stale_task_ids', set())
+
+        for obj in session.new | session.dirty:
+            if isinstance(obj, BlockchainTask):
+                stale_task_ids.add(obj.id)
+
+            elif isinstance(obj, BlockchainTransaction):
+                if obj in session.new:
+                    stale_task_ids.add(obj.blockchain_task_id)
+                    continue
+
+                attrs = inspect(obj).attrs
+                if attrs._status.history.has_changes() or attrs.blockchain_task_id.history.has_changes():
+                    # Both the task it was moved from and the task it was moved to
+                    stale_task_ids.update(attrs.blockchain_task_id.history.sum())
+
+    def _recalculate_stale_task_statuses(self, session):
+        """
+        Session before_commit hook. Recalculates the status column of every task marked stale during the
+        transaction, in the transaction itself, so the column can't be committed out of line with the transactions.
+        """
+        # Pending changes are otherwise only flushed after this hook
+        session.flush()
+
+        task_ids = session.info.pop('stale_task_ids', set()) - {None}
+        if not task_ids:
+            return
+
+        with self.metrics.span('update_task_statuses'):
+            statuses = session.execute(
+                BlockchainTask.__table__.update()
+                    .where(BlockchainTask.id.in_(task_ids))
+                    .values({BlockchainTask._status: BlockchainTask.computed_status})
+                    .returning(BlockchainTask.uuid, BlockchainTask._status)
+            ).fetchall()
+
+        session.info.setdefault('task_statuses_to_cache', []).extend(statuses)
+
+    def _cache_committed_task_statuses(self, session):
+        """
+        Session after_commit hook. Pushes the recalculated statuses into redis, where the app reads them from
+        instead of asking the worker for each task individually. Only done once they're committed, so a task
+        is never seen with a status that gets rolled back.
+        """
+        statuses = session.info.pop('task_statuses_to_cache', None)
+        if not statuses:
+            return
+
+        with self.metrics.span('cache_task_statuses'):
+            self._set_cached_task_statuses(statuses)
+
+    def _discard_task_status_changes(self, session):
+        session.info.pop('stale_task_ids', None)
+        session.info.pop('task_statuses_to_cache', None)
+
+    def get_tasks_with_stale_status(self, min_task_id=None, max_task_id=None):
+        """
+        Verification path for the status column. Slow, since it computes every task's status from its transactions
+        """
+        query = self.session.query(BlockchainTask).filter(BlockchainTask.status != BlockchainTask.computed_status)
+        query = self._filter_minmax_task_ids_maybe(query, min_task_id, max_task_id)
+
+        return query.all()
+
+    def _set_cached_task_statuses(self, statuses):
+        pipe = self.red.pipeline(transaction=False)
+        for uuid, status in statuses:
+            pipe.set(self.TASK_STATUS_KEY_PREFIX + uuid, status, ex=self.TASK_STATUS_CACHE_SECONDS)
+            pipe.publish(self.TASK_STATUS_CHANNEL_PREFIX + uuid, status)
+        pipe.execute()
+
+    def fill_cached_task_statuses(self, task_uuids):
+        """
+        Caches the statuses of tasks whose keys have expired, from the status column. A key that's set in the
+        meantime by a commit is newer than what's read here, so it's left alone.
+        Tasks that don't exist are cached as 'UNKNOWN'.
+        """
+        statuses = dict(
+            self.session.query(BlockchainTask.uuid, BlockchainTask._status)
+                .filter(BlockchainTask.uuid.in_(task_uuids))
+        )
+
+        pipe = self.red.pipeline(transaction=False)
+        for uuid in task_uuids:
+            pipe.set(
+                self.TASK_STATUS_KEY_PREFIX + uuid, statuses.get(uuid, 'UNKNOWN'),
+                ex=self.TASK_STATUS_CACHE_SECONDS, nx=True
+            )
+        pipe.execute()
+
+    def get_cached_task_status(self, uuid):
+        status = self.red.get(self.TASK_STATUS_KEY_PREFIX + uuid)
+        return status.decode() if status is not None else None
+
+    def subscribe_to_task_status(self, uuid):
+        """
+        :return: a redis PubSub that receives the task's status every time it changes
+        """
+        return task_status.subscribe_to_task_status(self.red, uuid)
+
+    def publish_wallet_pending_depths(self):
+        """
+        Counts the recent unfinished tasks queued against each signing wallet, and writes them to redis for the app,
+        which uses them to spread an organisation's transfers across its pool of system wallets.
+        """
+        window_start = datetime.datetime.utcnow() - datetime.timedelta(
+            seconds=self.WALLET_PENDING_DEPTH_WINDOW_SECONDS
+        )
+
+        depths = (self.session.query(BlockchainWallet.address, func.count(BlockchainTask.id))
+                  .join(BlockchainTask, BlockchainTask.signing_wallet_id == BlockchainWallet.id)
+                  .filter(BlockchainTask.status.in_(['PENDING', 'UNSTARTED']))
+                  .filter(BlockchainTask.created >= window_start)
+                  .group_by(BlockchainWallet.address)
+                  .all())
+
+        pipe = self.red.pipeline()
+        pipe.delete(self.WALLET_PENDING_DEPTH_KEY)
+        if depths:
+            pipe.hmset(self.WALLET_PENDING_DEPTH_KEY, dict(depths))
+        pipe.execute()
+
+        return dict(depths)
+
+    def get_serialised_tasks_from_uuids(self, uuids):
+        """
+        Bulk version of get_serialised_task_from_uuid.
+        Also backfills the status cache, so tasks that fell out of it are only fetched from the worker once.
+
+        :return: dict of task uuid to serialised task. Unknown uuids are left out
+        """
+        tasks = self.session.query(BlockchainTask).filter(BlockchainTask.uuid.in_(uuids)).all()
+
+        serialised_tasks = {task.uuid: self._serialise_task(task) for task in tasks}
+
+        self._set_cached_task_statuses([(uuid, task['status']) for uuid, task in serialised_tasks.items()])
+
+        return serialised_tasks
+
     def get_serialised_task_from_uuid(self, uuid):
         task = self.get_task_from_uuid(uuid)
 
         if task is None:
             return None
 
+        return self._serialise_task(task)
+
+    def _serialise_task(self, task):
         base_data = {
             'id': task.id,
             'status': task.status,
@@ -423,7 +768,15 @@ class SQLPersistenceInterface(object):
 
         self.session.commit()
 
-    def __init__(self, w3, red, session_factory, PENDING_TRANSACTION_EXPIRY_SECONDS=30):
+    @property
+    def first_block_hash(self):
+        # Looked up on first use rather than at import, so eth_manager can be imported without a node to talk to
+        if self._first_block_hash is None:
+            self._first_block_hash = self.w3.eth.getBlock(0).hash.hex()
+
+        return self._first_block_hash
+
+    def __init__(self, w3, red, session_factory, PENDING_TRANSACTION_EXPIRY_SECONDS=30, metrics=None):
 
         self.w3 = w3
 
@@ -432,7 +785,19 @@ class SQLPersistenceInterface(object):
         self.session_factory = session_factory
 
         self.session = scoped_session(session_factory)
-        
-        self.first_block_hash = w3.eth.getBlock(0).hash.hex()
 
-        self.PENDING_TRANSACTION_EXPIRY_SECONDS = PENDING_TRANSACTION_EXPIRY_SECONDS
\ No newline at end of file
+        # Keeps the task status column, and its redis cache, in line with every change committed through the session
+        event.listen(self.session, 'after_flush', self._mark_flushed_task_statuses_stale)
+        event.listen(self.session, 'before_commit', self._recalculate_stale_task_statuses)
+        event.listen(self.session, 'after_commit', self._cache_committed_task_statuses)
+        event.listen(self.session, 'after_rollback', self._discard_task_status_changes)
+
+        self._first_block_hash = None
+
+        self.PENDING_TRANSACTION_EXPIRY_SECONDS = PENDING_TRANSACTION_EXPIRY_SECONDS
+
+        self.nonce_allocator = NonceAllocator(red)
+
+        self.metrics = metrics or Metrics(
+            red, statsd_host=config.ETH_STATSD_HOST, statsd_port=config.ETH_STATSD_PORT
+        )
\ No newline at end of file
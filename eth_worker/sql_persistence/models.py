@@ -138,6 +138,10 @@ class BlockchainTask(ModelBase):
     # Purely for convenience to show status on single db table for debugging - use status hybrid prop in code
     status_text = Column(String)
 
+    # Denormalised from the transactions so that tasks can be filtered by status without touching
+    # the transaction table. Maintained by the persistence interface - see computed_status
+    _status = Column(String, index=True, default='UNSTARTED')
+
     # How many times the system has previously requested an attempt to complete a transaction for this task
     previous_invocations = Column(Integer)
 
@@ -184,11 +188,20 @@ class BlockchainTask(ModelBase):
 
     @hybrid_property
     def status(self):
+        return self._status
+
+    @hybrid_property
+    def computed_status(self):
+        """
+        The status derived from the task's transactions, which the status column is kept in line with.
+        Slow, since it loads every transaction (or uses a correlated subquery in SQL), so only use it to
+        set or verify the status column.
+        """
         lowest_status_code = min(set(t.status_code for t in self.transactions) or [3])
         return STATUS_INT_TO_STRING.get(lowest_status_code, 'UNSTARTED')
 
-    @status.expression
-    def status(cls):
+    @computed_status.expression
+    def computed_status(cls):
         return (
             case(
                 STATUS_INT_TO_STRING,
@@ -215,9 +228,22 @@ class BlockchainTransaction(ModelBase):
     error = Column(String)
     message = Column(String)
     block = Column(Integer)
+    gas_used = Column(BigInteger)
+    # Number of transfers sent together in the multi-transfer call this transaction was part of, if any
+    batch_size = Column(Integer)
+
+    # Journal of what was actually sent, so the transaction can be rebroadcast or replaced at the same nonce
+    raw_transaction = Column(String)
+    unsigned_transaction = Column(JSON)
+    gas_price = Column(BigInteger)
+    last_broadcast_date = Column(DateTime)
+    rebroadcast_count = Column(Integer, default=0)
+    replacement_count = Column(Integer, default=0)
+    replaced_hashes = Column(JSON)
+
     submitted_date = Column(DateTime)
     mined_date = Column(DateTime)
-    hash = Column(String)
+    hash = Column(String, index=True)
     contract_address = Column(String)
     nonce = Column(Integer)
     nonce_consumed = Column(Boolean, default=False)
@@ -0,0 +1,59 @@
+"""
+Where the eth worker publishes blockchain task statuses in redis, shared by the worker that writes them
+and the app that reads them.
+
+Every time a task's status changes, the worker:
+- sets TASK_STATUS_KEY_PREFIX + task uuid to the new status, such as 'PENDING' or 'SUCCESS'
+- publishes the new status on TASK_STATUS_CHANNEL_PREFIX + task uuid
+"""
+from time import time
+
+TASK_STATUS_KEY_PREFIX = 'BlockchainTaskStatus-'
+TASK_STATUS_CACHE_SECONDS = 60 * 60 * 24
+
+TASK_STATUS_CHANNEL_PREFIX = 'BlockchainTaskStatusChannel-'
+
+
+def subscribe_to_task_status(red, task_uuid):
+    """
+    :return: a redis PubSub that receives the task's status every time it changes
+    """
+    pubsub = red.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(TASK_STATUS_CHANNEL_PREFIX + task_uuid)
+    return pubsub
+
+
+def await_task_success(red, task_uuid, get_status, timeout=None, recheck_interval=5):
+    """
+    Blocks until the task succeeds, waking up on published status changes rather than polling.
+
+    :param get_status: called with no arguments to read the task's status directly. Used for the first check,
+    and then every recheck_interval seconds in case a notification is missed, for example across a redis reconnect.
+    Should return None if the task doesn't exist.
+    :param timeout: seconds to wait for, or None to wait forever
+    :return: 'SUCCESS', or None if the task doesn't exist
+    :raises TimeoutError: if the task hasn't succeeded within the timeout
+    """
+    # Subscribe before the first check so a success published in between can't be missed
+    pubsub = subscribe_to_task_status(red, task_uuid)
+
+    try:
+        status = get_status()
+        deadline = None if timeout is None else time() + timeout
+
+        while status not in ['SUCCESS', None]:
+            remaining = recheck_interval if deadline is None else deadline - time()
+            if remaining <= 0:
+                raise TimeoutError
+
+            message = pubsub.get_message(timeout=min(remaining, recheck_interval))
+
+            if message:
+                status = message['data'].decode()
+            else:
+                status = get_status()
+
+    finally:
+        pubsub.close()
+
+    return status
@@ -44,3 +44,20 @@ def test_get_organisation(test_client, complete_admin_auth_token,
 
     assert response.status_code == status_code
 
+
+
+def test_put_organisation_system_wallet_pool_size(test_client, complete_admin_auth_token, create_organisation):
+    pool_size = len(create_organisation.system_blockchain_addresses) + 1
+
+    response = test_client.put(
+        f"/api/v1/organisation/{create_organisation.id}/",
+        headers=dict(
+            Authorization=complete_admin_auth_token,
+            Accept='application/json'
+        ),
+        json={
+            'system_wallet_pool_size': pool_size
+        })
+
+    assert response.status_code == 200
+    assert len(create_organisation.system_blockchain_addresses) == pool_size
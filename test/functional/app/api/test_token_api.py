@@ -0,0 +1,47 @@
+import json
+import time
+import pytest
+
+from server import db, red
+from server.utils.exchange_rate_matrix import RATE_MATRIX_KEY
+
+
+@pytest.fixture(scope='module')
+def smart_token(test_client, init_database, external_reserve_token):
+    from server.models.token import Token, TokenType
+
+    token = Token(address='0x' + '5' * 40, name='Smart Token', symbol='SMART', token_type=TokenType.LIQUID)
+    token.decimals = 18
+
+    db.session.add(token)
+    db.session.commit()
+
+    return token
+
+
+@pytest.mark.parametrize("cached, expected_block, expected_rate", [
+    (True, 1234, 0.5),
+    # Nothing has been calculated yet, so there are no rates rather than the request waiting on them
+    (False, None, None),
+])
+def test_get_tokens_with_exchange_rates(test_client, external_reserve_token, smart_token,
+                                        cached, expected_block, expected_rate):
+    red.delete(RATE_MATRIX_KEY)
+
+    if cached:
+        red.set(RATE_MATRIX_KEY, json.dumps({
+            'rates': {str(external_reserve_token.id): {str(smart_token.id): 0.5}},
+            'as_of_block': 1234,
+            'calculated_at': time.time()
+        }))
+
+    response = test_client.get('/api/v1/token/?symbols=aud&exchange_pairs=aud,smart')
+
+    red.delete(RATE_MATRIX_KEY)
+
+    assert response.status_code == 200
+    assert response.json['data']['rates_as_of_block'] == expected_block
+
+    tokens = response.json['data']['tokens']
+    assert len(tokens) == 1
+    assert tokens[0]['exchange_rates'].get('SMART') == expected_rate
@@ -14,6 +14,10 @@ class MockBlockchainTasker(object):
             'dependents': []
         }
 
+    @staticmethod
+    def get_blockchain_task_statuses(task_uuids, *args, **kwargs):
+        return {uuid: 'SUCCESS' for uuid in task_uuids}
+
     @staticmethod
     def await_task_success(*args, **kwargs):
 
@@ -59,6 +63,10 @@ class MockBlockchainTasker(object):
     def get_conversion_amount(from_amount, *args, **kwargs):
         return random.random() * from_amount
 
+    @staticmethod
+    def get_inverse_conversion_amount(to_amount, *args, **kwargs):
+        return random.random() * to_amount
+
     @staticmethod
     def get_token_decimals(*args, **kwargs):
         return 18
@@ -67,6 +75,10 @@ class MockBlockchainTasker(object):
     def get_wallet_balance(*args, **kwargs):
         return int(10e18)
 
+    @staticmethod
+    def get_wallet_balances(addresses, *args, **kwargs):
+        return {address: int(10e18) for address in addresses}
+
     @staticmethod
     def get_allowance(*args, **kwargs):
         return int(10e18)
@@ -1,3 +1,34 @@
+import pytest
 
 
+def test_grow_system_blockchain_address_pool(create_organisation):
+    pool_size = len(create_organisation.system_blockchain_addresses) + 2
 
+    new_addresses = create_organisation.grow_system_blockchain_address_pool(pool_size)
+
+    assert len(new_addresses) == 2
+    assert create_organisation.system_blockchain_addresses[-2:] == new_addresses
+
+    # Disbursements come from the org level account, so it approves the new addresses straight away
+    org_transfer_account = create_organisation.queried_org_level_transfer_account
+    assert all(org_transfer_account.get_approval(address) for address in new_addresses)
+
+    assert create_organisation.grow_system_blockchain_address_pool(pool_size) == []
+
+
+@pytest.mark.parametrize("approved_indices, candidate_indices", [
+    ([1, 2], [1, 2]),
+    ([], [0, 1, 2]),
+])
+def test_choose_system_blockchain_address(mocker, create_organisation, approved_indices, candidate_indices):
+    create_organisation.grow_system_blockchain_address_pool(3)
+    addresses = create_organisation.system_blockchain_addresses
+
+    choose = mocker.patch('server.models.organisation.choose_least_loaded_address', side_effect=lambda a: a[-1])
+
+    sender_transfer_account = mocker.MagicMock()
+    sender_transfer_account.get_approval.side_effect = \
+        lambda address: address in [addresses[i] for i in approved_indices]
+
+    assert create_organisation.choose_system_blockchain_address(sender_transfer_account) == addresses[2]
+    choose.assert_called_once_with([addresses[i] for i in candidate_indices])
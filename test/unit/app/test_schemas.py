@@ -0,0 +1,53 @@
+import pytest
+from types import SimpleNamespace
+from marshmallow import fields
+
+from server import bt
+from server.schemas import BlockchainTaskableSchemaBase, ExchangeSchema
+
+
+class ParentTaskableSchema(BlockchainTaskableSchemaBase):
+    child = fields.Nested(BlockchainTaskableSchemaBase)
+
+
+def taskable(uuid, **kwargs):
+    # Has no blockchain_status, so a status that wasn't prefetched fails the dump
+    return SimpleNamespace(id=1, created=None, updated=None, blockchain_task_uuid=uuid, **kwargs)
+
+
+@pytest.fixture(scope='function')
+def get_statuses(mocker):
+    return mocker.patch.object(
+        bt, 'get_blockchain_task_statuses', side_effect=lambda uuids: {uuid: 'SUCCESS' for uuid in uuids}
+    )
+
+
+def test_list_dump_fetches_statuses_once(test_client, get_statuses):
+    exchanges = [taskable(f'uuid-{i}') for i in range(5)] + [taskable(None)]
+
+    schema = ExchangeSchema(many=True, only=('blockchain_task_uuid', 'blockchain_status'))
+    data = schema.dump(exchanges).data
+
+    assert get_statuses.call_count == 1
+    assert sorted(get_statuses.call_args[0][0]) == [f'uuid-{i}' for i in range(5)]
+
+    assert [d['blockchain_status'] for d in data] == ['SUCCESS'] * 5 + ['UNKNOWN']
+
+    # Reused schemas mustn't serve statuses from an earlier dump
+    assert 'blockchain_statuses' not in schema.context
+
+
+def test_nested_dump_keeps_outer_statuses(test_client, get_statuses):
+    parents = [taskable(f'parent-{i}', child=taskable(f'child-{i}')) for i in range(3)]
+
+    data = ParentTaskableSchema(many=True).dump(parents).data
+
+    requested = [uuid for call in get_statuses.call_args_list for uuid in call[0][0]]
+
+    # The parents are all fetched up front, and never again by the nested dumps
+    assert get_statuses.call_args_list[0][0][0] == [f'parent-{i}' for i in range(3)]
+    assert sorted(requested) == sorted([f'parent-{i}' for i in range(3)] + [f'child-{i}' for i in range(3)])
+
+    for d in data:
+        assert d['blockchain_status'] == 'SUCCESS'
+        assert d['child']['blockchain_status'] == 'SUCCESS'
@@ -0,0 +1,42 @@
+import pytest
+
+from server import red
+from server.utils.blockchain_tasks import BlockchainTasker
+from share.blockchain_task_status import TASK_STATUS_KEY_PREFIX
+
+TASK_UUID = 'a3c4e2b0-5f1d-4c8e-9b7a-2d6f8e1c0b94'
+
+
+@pytest.fixture(scope='function')
+def tasker(mocker, test_client):
+    """
+    A blockchain tasker that gets tasks the worker has no cached status for from here, rather than the worker
+    """
+    red.delete(TASK_STATUS_KEY_PREFIX + TASK_UUID)
+
+    tasker = BlockchainTasker()
+    mocker.patch.object(tasker, 'get_blockchain_tasks', return_value={})
+    mocker.patch.object(tasker, 'get_blockchain_task', side_effect=lambda uuid: {'uuid': uuid, 'status': 'SUCCESS'})
+
+    yield tasker
+
+    red.delete(TASK_STATUS_KEY_PREFIX + TASK_UUID)
+
+
+def test_already_succeeded_task_is_returned(tasker):
+    red.set(TASK_STATUS_KEY_PREFIX + TASK_UUID, 'SUCCESS')
+
+    assert tasker.await_task_success(TASK_UUID, timeout=5) == {'uuid': TASK_UUID, 'status': 'SUCCESS'}
+    tasker.get_blockchain_tasks.assert_not_called()
+
+
+def test_pending_task_times_out(tasker):
+    red.set(TASK_STATUS_KEY_PREFIX + TASK_UUID, 'PENDING')
+
+    with pytest.raises(TimeoutError):
+        tasker.await_task_success(TASK_UUID, timeout=0.5, recheck_interval=0.1)
+
+
+def test_unknown_task_returns_none(tasker):
+    assert tasker.await_task_success(TASK_UUID, timeout=5) is None
+    tasker.get_blockchain_task.assert_not_called()
@@ -0,0 +1,122 @@
+import pytest
+
+from server import red
+from server.utils.blockchain_tasks import BlockchainTasker
+from server.utils.chain_read_cache import LATEST_BLOCK_KEY
+
+TOKEN_ADDRESS = '0xC4375B7De8af5a38a93548eb8453a498222C4fF2'
+HOLDER_ADDRESS = '0x2E6C02A5d8E1Bd5AA7e1E5A3D02c8F8Ff44c5f8F'
+
+
+@pytest.fixture(scope='function')
+def clear_chain_reads():
+    def clear():
+        for key in red.scan_iter('ChainRead-*'):
+            red.delete(key)
+        red.delete(LATEST_BLOCK_KEY)
+
+    clear()
+    yield
+    clear()
+
+
+@pytest.fixture(scope='function')
+def tasker(mocker, test_client, clear_chain_reads):
+    """
+    A blockchain tasker whose calls are answered here rather than by the eth worker.
+    Each call returns one more than the last, so a cached result can be told apart from a fresh one.
+    """
+    tasker = BlockchainTasker()
+
+    results = iter(range(1, 1000))
+
+    def execute(task, kwargs=None, args=None, timeout=None, queue='high-priority'):
+        if 'calls' in kwargs:
+            return [next(results) for _ in kwargs['calls']]
+        return next(results)
+
+    mocker.patch.object(tasker, '_execute_synchronous_celery', side_effect=execute)
+
+    return tasker
+
+
+def balance_of(tasker, address=HOLDER_ADDRESS):
+    return tasker._synchronous_call(TOKEN_ADDRESS, 'ERC20', 'balanceOf', args=[address])
+
+
+def test_calls_are_cached_for_the_latest_block(tasker):
+    red.set(LATEST_BLOCK_KEY, 100)
+
+    assert balance_of(tasker) == 1
+    assert balance_of(tasker) == 1
+    assert tasker._execute_synchronous_celery.call_count == 1
+
+    # Each call's arguments are cached separately
+    assert balance_of(tasker, TOKEN_ADDRESS) == 2
+
+
+def test_new_block_invalidates_cached_calls(tasker):
+    red.set(LATEST_BLOCK_KEY, 100)
+    assert balance_of(tasker) == 1
+
+    red.set(LATEST_BLOCK_KEY, 101)
+    assert balance_of(tasker) == 2
+    assert balance_of(tasker) == 2
+
+
+def test_calls_are_not_cached_without_a_block(tasker):
+    assert balance_of(tasker) == 1
+    assert balance_of(tasker) == 2
+
+
+def test_immutable_calls_are_cached_across_blocks(tasker):
+    decimals = lambda: tasker._synchronous_call(TOKEN_ADDRESS, 'ERC20', 'decimals')
+
+    assert decimals() == 1
+
+    red.set(LATEST_BLOCK_KEY, 100)
+    assert decimals() == 1
+    assert tasker._execute_synchronous_celery.call_count == 1
+
+
+def test_cached_calls_expire(tasker):
+    red.set(LATEST_BLOCK_KEY, 100)
+    balance_of(tasker)
+    tasker._synchronous_call(TOKEN_ADDRESS, 'ERC20', 'decimals')
+
+    block_key, = red.scan_iter('ChainRead-100-*')
+    immutable_key, = red.scan_iter('ChainRead-immutable-*')
+
+    assert 0 < red.ttl(block_key) <= tasker.read_cache.block_ttl_seconds
+    assert tasker.read_cache.block_ttl_seconds < red.ttl(immutable_key) <= tasker.read_cache.immutable_ttl_seconds
+
+
+def test_failed_calls_are_not_cached(tasker):
+    red.set(LATEST_BLOCK_KEY, 100)
+    tasker._execute_synchronous_celery.side_effect = [None, 5]
+
+    assert balance_of(tasker) is None
+    assert balance_of(tasker) == 5
+
+
+def test_batch_calls_are_made_at_the_latest_block(tasker):
+    red.set(LATEST_BLOCK_KEY, 100)
+    calls = [{'contract_address': TOKEN_ADDRESS, 'contract_type': 'ERC20', 'func': 'totalSupply'}]
+
+    assert tasker._synchronous_batch_call(calls, block_identifier=tasker.read_cache.get_latest_block()) == [1]
+    assert tasker._execute_synchronous_celery.call_args[0][1]['block_identifier'] == 100
+
+
+def test_block_scoped_values_are_invalidated_by_new_blocks(tasker):
+    cache = tasker.read_cache
+
+    # Nothing can be cached until the eth worker has published a block
+    cache.set_block_scoped('snapshot', {'a': 1})
+    assert cache.get_block_scoped('snapshot') == (False, None)
+
+    red.set(LATEST_BLOCK_KEY, 100)
+    cache.set_block_scoped('snapshot', {'a': 1})
+    assert cache.get_block_scoped('snapshot') == (True, {'a': 1})
+
+    red.set(LATEST_BLOCK_KEY, 101)
+    assert cache.get_block_scoped('snapshot') == (False, None)
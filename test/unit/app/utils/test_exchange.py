@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+
+from server.utils.exchange import (
+    bonding_curve_conversion,
+    bonding_curve_inverse_conversion,
+    bonding_curve_token1_to_token2,
+    bonding_curve_tokens_to_reserve,
+    bonding_curve_reserve_to_tokens
+)
+
+token1_state = (1e24, 2.5e23, 250000)
+token2_state = (4e23, 1e23, 500000)
+
+
+@pytest.mark.parametrize("from_state, to_state, expected_func", [
+    (token1_state, token2_state,
+     lambda x: bonding_curve_token1_to_token2(1e24, 4e23, 2.5e23, 1e23, 250000, 500000, x)),
+    (token1_state, None, lambda x: bonding_curve_tokens_to_reserve(*token1_state, x)),
+    (None, token2_state, lambda x: bonding_curve_reserve_to_tokens(*token2_state, x)),
+])
+def test_bonding_curve_conversion(from_state, to_state, expected_func):
+    amount = 1.234e19
+
+    assert bonding_curve_conversion(from_state, to_state, amount) == pytest.approx(expected_func(amount))
+
+
+@pytest.mark.parametrize("from_state, to_state", [
+    (token1_state, token2_state),
+    (token2_state, token1_state),
+    (token1_state, None),
+    (None, token2_state),
+])
+def test_bonding_curve_inverse_conversion(from_state, to_state):
+    to_amount = 5e18
+
+    from_amount = bonding_curve_inverse_conversion(from_state, to_state, to_amount)
+
+    assert bonding_curve_conversion(from_state, to_state, from_amount) == pytest.approx(to_amount)
+
+
+def test_bonding_curve_conversion_vectorised():
+    amounts = np.array([1e18, 2e18, 3e18])
+
+    converted = bonding_curve_conversion(token1_state, token2_state, amounts)
+
+    for amount, result in zip(amounts, converted):
+        assert result == pytest.approx(bonding_curve_conversion(token1_state, token2_state, amount))
@@ -0,0 +1,71 @@
+import json
+import time
+import pytest
+
+from server import red, bt
+from server.schemas import TokenSchema
+from server.utils import exchange_rate_matrix
+from server.utils.exchange_rate_matrix import (
+    RATE_MATRIX_KEY,
+    get_exchange_rate_matrix,
+    refresh_exchange_rate_matrix_if_stale
+)
+
+
+@pytest.fixture(scope='function')
+def clear_rate_matrix():
+    red.delete(RATE_MATRIX_KEY)
+    yield
+    red.delete(RATE_MATRIX_KEY)
+
+
+@pytest.fixture(scope='function')
+def calculate_rates(mocker):
+    return mocker.patch.object(exchange_rate_matrix, 'calculate_exchange_rate_matrix', return_value={'1': {'2': 0.5}})
+
+
+def test_get_exchange_rate_matrix_never_calculates(test_client, clear_rate_matrix, calculate_rates):
+    assert get_exchange_rate_matrix() == {'rates': {}, 'as_of_block': None}
+    calculate_rates.assert_not_called()
+
+    matrix = {'rates': {'1': {'2': 0.5}}, 'as_of_block': 100, 'calculated_at': time.time()}
+    red.set(RATE_MATRIX_KEY, json.dumps(matrix))
+
+    assert get_exchange_rate_matrix() == matrix
+    calculate_rates.assert_not_called()
+
+
+def test_refresh_exchange_rate_matrix_once_per_block(mocker, test_client, clear_rate_matrix, calculate_rates):
+    latest_block = mocker.patch.object(bt.read_cache, 'get_latest_block', return_value=100)
+
+    assert refresh_exchange_rate_matrix_if_stale() is True
+    assert get_exchange_rate_matrix()['as_of_block'] == 100
+
+    assert refresh_exchange_rate_matrix_if_stale() is False
+    assert calculate_rates.call_count == 1
+
+    latest_block.return_value = 101
+
+    assert refresh_exchange_rate_matrix_if_stale() is True
+    assert get_exchange_rate_matrix()['as_of_block'] == 101
+    assert calculate_rates.call_count == 2
+
+
+def test_token_schema_get_exchange_rates(mocker):
+    aud = mocker.MagicMock(id=1, symbol='AUD')
+    smart = mocker.MagicMock(id=2, symbol='SMART')
+    other = mocker.MagicMock(id=3, symbol='OTHER')
+
+    schema = TokenSchema()
+    schema.context = {
+        'exchange_pairs': [aud, smart, other],
+        'exchange_rate_matrix': {'rates': {'1': {'2': 0.5}, '2': {'1': 2.0}}, 'as_of_block': 100}
+    }
+
+    # Pairs without a rate, such as tokens on different exchange contracts, are left out
+    assert schema.get_exchange_rates(aud) == {'SMART': 0.5}
+    assert schema.get_exchange_rates(smart) == {'AUD': 2.0}
+    assert schema.get_exchange_rates(other) == {}
+
+    schema.context = {'exchange_pairs': [aud, smart], 'exchange_rate_matrix': None}
+    assert schema.get_exchange_rates(aud) == {}
@@ -0,0 +1,38 @@
+from collections import Counter
+import pytest
+
+from server import red
+from server.utils.wallet_pool import PENDING_DEPTH_KEY, choose_least_loaded_address
+
+ADDRESSES = ['0xa', '0xb', '0xc']
+
+
+@pytest.fixture(scope='function')
+def clear_pending_depths():
+    red.delete(PENDING_DEPTH_KEY)
+    yield
+    red.delete(PENDING_DEPTH_KEY)
+
+
+def test_chooses_least_loaded_address(test_client, clear_pending_depths):
+    red.hmset(PENDING_DEPTH_KEY, {'0xa': 5, '0xb': 2, '0xc': 3})
+
+    assert choose_least_loaded_address(ADDRESSES) == '0xb'
+    assert int(red.hget(PENDING_DEPTH_KEY, '0xb')) == 3
+
+
+def test_uncounted_addresses_are_idle(test_client, clear_pending_depths):
+    red.hmset(PENDING_DEPTH_KEY, {'0xa': 1, '0xc': 1})
+
+    assert choose_least_loaded_address(ADDRESSES) == '0xb'
+
+
+def test_burst_is_spread_across_pool(test_client, clear_pending_depths):
+    chosen = Counter(choose_least_loaded_address(ADDRESSES) for _ in range(6))
+
+    assert chosen == {'0xa': 2, '0xb': 2, '0xc': 2}
+
+
+def test_single_address_is_left_uncounted(test_client, clear_pending_depths):
+    assert choose_least_loaded_address(['0xa']) == '0xa'
+    assert red.hget(PENDING_DEPTH_KEY, '0xa') is None
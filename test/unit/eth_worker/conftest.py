@@ -0,0 +1,400 @@
+import pytest
+
+import os
+import sys
+from uuid import uuid4
+
+import rlp
+from eth_account import Account
+from eth_abi import encode_abi
+from eth_utils import keccak, encode_hex, to_checksum_address, function_signature_to_4byte_selector
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.providers.base import BaseProvider
+
+eth_worker_dir = os.path.abspath(os.path.join(os.getcwd(), "eth_worker"))
+sys.path.append(eth_worker_dir)
+
+import config
+
+# Kept apart from the database and redis used by a running eth worker, since every test wipes them
+UNIT_TEST_ETH_DATABASE_NAME = config.ETH_DATABASE_NAME + '_unit'
+UNIT_TEST_REDIS_DB = 15
+
+CHAIN_ID = 42
+
+TOKEN_ADDRESS = '0xC4375B7De8af5a38a93548eb8453a498222C4fF2'
+RECIPIENT_ADDRESS = '0x2E6C02A5d8E1Bd5AA7e1E5A3D02c8F8Ff44c5f8F'
+
+
+class FakeNode(BaseProvider):
+    """
+    An in-process stand-in for an ethereum node, so the worker is tested through a real Web3.
+    Signed transactions sent to it are kept in its pool, and are only mined when a test calls mine.
+    """
+
+    def make_request(self, method, params):
+        try:
+            return {'jsonrpc': '2.0', 'id': 0, 'result': getattr(self, method)(*params)}
+        except NodeError as e:
+            return {'jsonrpc': '2.0', 'id': 0, 'error': {'code': -32000, 'message': str(e)}}
+
+    def mine(self, *tx_hashes, status=1, gas_used=21000):
+        """
+        Mines the given transactions from the pool into a new block
+        """
+        counts = dict(self.counts[-1])
+
+        for tx_hash in tx_hashes:
+            transaction = self.pool.pop(HexBytes(tx_hash).hex())
+            counts[transaction['from']] = max(counts.get(transaction['from'], 0), transaction['nonce'] + 1)
+
+            self.receipts[transaction['hash']] = {
+                'transactionHash': transaction['hash'],
+                'blockNumber': hex(len(self.blocks)),
+                'status': hex(status),
+                'gasUsed': hex(gas_used),
+                'cumulativeGasUsed': hex(gas_used),
+                'contractAddress': None,
+                'logs': []
+            }
+
+        self._add_block([HexBytes(tx_hash).hex() for tx_hash in tx_hashes], counts)
+
+    def mine_foreign_transaction(self, address):
+        """
+        Mines a transaction from the address that wasn't sent through this node, using up its next nonce
+        """
+        counts = dict(self.counts[-1])
+        counts[address] = counts.get(address, 0) + 1
+
+        self._add_block([encode_hex(keccak(os.urandom(32)))], counts)
+
+    def mine_empty_blocks(self, count):
+        for _ in range(count):
+            self._add_block([], dict(self.counts[-1]))
+
+    def drop_pending_transactions(self):
+        self.pool.clear()
+
+    def respond_to_call(self, contract_address, function_signature, output_types, values):
+        selector = encode_hex(function_signature_to_4byte_selector(function_signature))
+        self.call_results[(contract_address.lower(), selector)] = encode_hex(encode_abi(output_types, values))
+
+    def sent_transactions(self):
+        """
+        :return: every transaction the node has accepted, in the order they were sent
+        """
+        return [self.transactions[tx_hash] for tx_hash in self.sent]
+
+    def _add_block(self, tx_hashes, counts):
+        number = len(self.blocks)
+        self.blocks.append({
+            'number': hex(number),
+            'hash': encode_hex(keccak(text=f'block-{number}')),
+            'transactions': tx_hashes
+        })
+        self.counts.append(counts)
+
+    def _block_number(self, block_identifier):
+        if block_identifier in ['latest', 'pending']:
+            return len(self.blocks) - 1
+        if block_identifier == 'earliest':
+            return 0
+
+        return int(block_identifier, 16)
+
+    def _address(self, address):
+        return to_checksum_address(address)
+
+    # JSON-RPC methods
+
+    def eth_chainId(self):
+        return hex(self.chain_id)
+
+    def net_version(self):
+        return str(self.chain_id)
+
+    def eth_blockNumber(self):
+        return hex(len(self.blocks) - 1)
+
+    def eth_gasPrice(self):
+        return hex(self.gas_price)
+
+    def eth_getBalance(self, address, block_identifier):
+        return hex(self.balance)
+
+    def eth_getBlockByNumber(self, block_identifier, full_transactions):
+        number = self._block_number(block_identifier)
+        return self.blocks[number] if number < len(self.blocks) else None
+
+    def eth_getTransactionCount(self, address, block_identifier):
+        address = self._address(address)
+
+        number = self._block_number(block_identifier)
+        if number >= len(self.blocks):
+            raise NodeError('unknown block')
+
+        count = self.counts[number].get(address, 0)
+
+        if block_identifier == 'pending':
+            pending_nonces = {t['nonce'] for t in self.pool.values() if t['from'] == address}
+            while count in pending_nonces:
+                count += 1
+
+        return hex(count)
+
+    def eth_estimateGas(self, transaction, block_identifier=None):
+        self.estimate_gas_calls += 1
+        return hex(self.estimated_gas)
+
+    def eth_call(self, transaction, block_identifier='latest'):
+        key = (transaction['to'].lower(), transaction['data'][:10])
+        if key not in self.call_results:
+            raise NodeError('execution reverted')
+
+        return self.call_results[key]
+
+    def eth_sendRawTransaction(self, raw_transaction):
+        raw_transaction = HexBytes(raw_transaction)
+        tx_hash = encode_hex(keccak(raw_transaction))
+
+        if tx_hash in self.pool or tx_hash in self.receipts:
+            raise NodeError('already known')
+
+        nonce, gas_price, gas, to, value, data, v, r, s = rlp.decode(raw_transaction)
+        transaction = {
+            'hash': tx_hash,
+            'from': Account.recoverTransaction(raw_transaction),
+            'nonce': int.from_bytes(nonce, 'big'),
+            'gasPrice': int.from_bytes(gas_price, 'big'),
+            'gas': int.from_bytes(gas, 'big'),
+            'to': to_checksum_address(to) if to else None,
+            'value': int.from_bytes(value, 'big'),
+            'data': encode_hex(data)
+        }
+
+        if transaction['nonce'] < self.counts[-1].get(transaction['from'], 0):
+            raise NodeError('nonce too low')
+
+        self.pool[tx_hash] = transaction
+        self.transactions[tx_hash] = transaction
+        self.sent.append(tx_hash)
+
+        return tx_hash
+
+    def eth_getTransactionReceipt(self, tx_hash):
+        return self.receipts.get(HexBytes(tx_hash).hex())
+
+    def __init__(self, chain_id=CHAIN_ID):
+        self.chain_id = chain_id
+
+        self.gas_price = Web3.toWei(1, 'gwei')
+        self.balance = Web3.toWei(100, 'ether')
+        self.estimated_gas = 50000
+        self.estimate_gas_calls = 0
+        self.call_results = {}
+
+        self.blocks = []
+        # Transaction count of each address as of each block
+        self.counts = []
+        self._add_block([], {})
+
+        self.pool = {}
+        self.receipts = {}
+        self.transactions = {}
+        self.sent = []
+
+
+class NodeError(Exception):
+    pass
+
+
+class QueuedTask(object):
+
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=None, kwargs=None, **options):
+        self.args = tuple(args or self.args)
+        self.kwargs = kwargs or self.kwargs
+        self.options = {**self.options, **options}
+        self.queued_tasks.append(self)
+        return self
+
+    def on_error(self, error_callback):
+        return self
+
+    def __init__(self, queued_tasks, name, args, kwargs, options):
+        self.queued_tasks = queued_tasks
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.options = options
+        self.id = str(uuid4())
+
+
+class QueuedTaskGroup(object):
+
+    def delay(self):
+        for task in self.tasks:
+            task.delay()
+
+    def on_error(self, error_callback):
+        return self
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+
+class QueuedTasks(list):
+    """
+    Stands in for celery's canvas in the worker, recording the tasks it queues rather than sending them to a broker
+    """
+
+    def signature(self, name, args=None, kwargs=None, **options):
+        return QueuedTask(self, name, tuple(args or ()), kwargs or {}, options)
+
+    def group(self, tasks):
+        return QueuedTaskGroup(list(tasks))
+
+    def chain(self, tasks):
+        # Later tasks in a chain only run once the first succeeds, so only the first is queued
+        return QueuedTaskGroup(list(tasks)[:1])
+
+    def args_for(self, endpoint):
+        return [task.args for task in self if task.name.rsplit('.', 1)[-1] == endpoint]
+
+
+@pytest.fixture(scope='function')
+def queued_tasks(mocker):
+    queued_tasks = QueuedTasks()
+
+    for module in ['eth_manager.processor', 'eth_manager.async_submitter']:
+        mocker.patch(f'{module}.signature', queued_tasks.signature)
+    mocker.patch('eth_manager.processor.group', queued_tasks.group)
+    mocker.patch('eth_manager.processor.chain', queued_tasks.chain)
+
+    return queued_tasks
+
+
+@pytest.fixture(scope='function')
+def node():
+    return FakeNode()
+
+
+@pytest.fixture(scope='function')
+def w3(node):
+    return Web3(node)
+
+
+@pytest.fixture(scope='function')
+def red():
+    import redis
+
+    red = redis.Redis.from_url(config.REDIS_URL, db=UNIT_TEST_REDIS_DB)
+    red.flushdb()
+
+    return red
+
+
+@pytest.fixture(scope='session')
+def eth_database_engine():
+    from sqlalchemy import create_engine
+    from sql_persistence.models import ModelBase
+
+    admin_engine = create_engine(
+        config.get_database_uri('postgres', config.ETH_DATABASE_HOST, censored=False), isolation_level='AUTOCOMMIT'
+    )
+    admin_engine.execute(f'DROP DATABASE IF EXISTS {UNIT_TEST_ETH_DATABASE_NAME}')
+    admin_engine.execute(f'CREATE DATABASE {UNIT_TEST_ETH_DATABASE_NAME}')
+
+    engine = create_engine(
+        config.get_database_uri(UNIT_TEST_ETH_DATABASE_NAME, config.ETH_DATABASE_HOST, censored=False)
+    )
+    ModelBase.metadata.create_all(engine)
+
+    yield engine
+
+    engine.dispose()
+    admin_engine.execute(f'DROP DATABASE IF EXISTS {UNIT_TEST_ETH_DATABASE_NAME}')
+    admin_engine.dispose()
+
+
+@pytest.fixture(scope='function')
+def eth_database(eth_database_engine):
+    from sql_persistence.models import ModelBase
+
+    tables = ', '.join(table.name for table in ModelBase.metadata.sorted_tables)
+    eth_database_engine.execute(f'TRUNCATE {tables} RESTART IDENTITY CASCADE')
+
+    return eth_database_engine
+
+
+@pytest.fixture(scope='function')
+def persistence_interface(w3, red, eth_database):
+    from sqlalchemy.orm import sessionmaker
+    from eth_manager.metrics import Metrics
+    from sql_persistence.interface import SQLPersistenceInterface
+
+    persistence_interface = SQLPersistenceInterface(
+        w3=w3, red=red, session_factory=sessionmaker(autocommit=False, autoflush=True, bind=eth_database),
+        metrics=Metrics(red)
+    )
+
+    yield persistence_interface
+
+    persistence_interface.session.remove()
+
+
+@pytest.fixture(scope='function')
+def processor(w3, red, persistence_interface, queued_tasks):
+    from eth_manager.processor import TransactionProcessor
+
+    processor = TransactionProcessor(
+        ethereum_chain_id=CHAIN_ID,
+        w3=w3,
+        red=red,
+        gas_price_gwei=1,
+        gas_limit=8000000,
+        persistence_interface=persistence_interface,
+        metrics=persistence_interface.metrics
+    )
+
+    processor.registry.register_abi_module('ERC20', 'eth_manager.ABIs.erc20_abi')
+    processor.registry.register_abi_module('MultiTransfer', 'eth_manager.ABIs.multi_transfer_abi')
+
+    return processor
+
+
+@pytest.fixture(scope='function')
+def signing_wallet(persistence_interface):
+    return persistence_interface.create_new_blockchain_wallet()
+
+
+@pytest.fixture(scope='function')
+def block_watcher(w3, red, persistence_interface, processor):
+    from eth_manager.block_watcher import BlockWatcher
+
+    return BlockWatcher(w3=w3, red=red, persistence_interface=persistence_interface, processor=processor)
+
+
+@pytest.fixture(scope='function')
+def send_transfer(processor, persistence_interface, signing_wallet):
+    """
+    Creates an ERC20 transfer task from the signing wallet and sends its first attempt to the node
+    """
+    def inner(amount=100, token_address=TOKEN_ADDRESS, recipient_address=RECIPIENT_ADDRESS, gas_limit=None):
+        task = persistence_interface.create_function_task(
+            str(uuid4()), signing_wallet, token_address, 'ERC20', 'transfer', [recipient_address, amount]
+        )
+        transaction = persistence_interface.create_blockchain_transaction(task.uuid)
+
+        processor.process_function_transaction(
+            transaction.id, token_address, 'ERC20', 'transfer', [recipient_address, amount],
+            gas_limit=gas_limit, task_id=task.id
+        )
+
+        return persistence_interface.get_transaction(transaction.id)
+
+    return inner
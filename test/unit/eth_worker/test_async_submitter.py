@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+
+
+@pytest.fixture(scope='function')
+def async_processor(processor):
+    processor.submit_pipeline = 'async'
+
+    return processor
+
+
+@pytest.fixture(scope='function')
+def submitter(node, red, persistence_interface, async_processor):
+    from eth_manager.async_submitter import AsyncSubmitter, JSONRPCError
+
+    submitter = AsyncSubmitter(
+        red=red, persistence_interface=persistence_interface, processor=async_processor,
+        receipt_poll_interval=0.01, max_receipt_poll_interval=0.02, receipt_timeout=0.5
+    )
+
+    # Answered by the fake node, rather than over HTTP
+    async def rpc(method, params):
+        response = node.make_request(method, params)
+        if 'error' in response:
+            raise JSONRPCError(response['error']['message'])
+        return response['result']
+
+    submitter.rpc = rpc
+
+    return submitter
+
+
+def run(*coroutines):
+    return asyncio.get_event_loop().run_until_complete(asyncio.gather(*coroutines))
+
+
+async def mine_soon(node, tx_hash):
+    await asyncio.sleep(0.05)
+    node.mine(tx_hash)
+
+
+def test_queued_transactions_are_popped_in_order(submitter, send_transfer):
+    transactions = [send_transfer() for _ in range(3)]
+
+    assert submitter._pop(2) == [t.id for t in transactions[:2]]
+    assert submitter._pop(2) == [transactions[2].id]
+
+
+def test_mined_transaction_is_resolved(node, submitter, persistence_interface, queued_tasks, send_transfer):
+    transaction = send_transfer()
+    assert node.sent_transactions() == []
+
+    run(submitter._submit(transaction.id), mine_soon(node, transaction.hash))
+
+    assert [t['hash'] for t in node.sent_transactions()] == [transaction.hash]
+
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.status == 'SUCCESS'
+    assert transaction.submitted_date is not None
+    assert transaction.task.status == 'SUCCESS'
+
+    assert submitter.processor.metrics.get_all()['async_submitted'] == 1
+    assert queued_tasks.args_for('_check_transaction_response') == []
+
+
+def test_receipt_timeout_hands_transaction_to_processor(node, submitter, persistence_interface, queued_tasks,
+                                                        send_transfer):
+    transaction = send_transfer()
+
+    run(submitter._submit(transaction.id))
+
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.status == 'PENDING'
+    assert transaction.submitted_date is not None
+
+    assert queued_tasks.args_for('_check_transaction_response') == [(transaction.id,)]
+    assert submitter.processor.metrics.get_all()['async_receipt_timeouts'] == 1
+
+
+def test_block_watcher_resolves_transaction(node, submitter, queued_tasks, send_transfer):
+    submitter.processor.transaction_watcher = 'block'
+
+    transaction = send_transfer()
+
+    run(submitter._submit(transaction.id))
+
+    assert transaction.hash in node.pool
+    assert queued_tasks.args_for('_check_transaction_response') == []
+
+
+def test_rejected_transaction_is_failed_and_retried(node, submitter, persistence_interface, queued_tasks,
+                                                    signing_wallet, send_transfer):
+    transaction = send_transfer()
+
+    # Its nonce is used up before it's sent
+    node.mine_foreign_transaction(signing_wallet.address)
+
+    run(submitter._submit(transaction.id))
+
+    assert node.sent_transactions() == []
+
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.status == 'FAILED'
+    assert transaction.error == 'PreBlockchainError'
+    assert 'nonce too low' in transaction.message
+    assert transaction.nonce_consumed is False
+
+    assert queued_tasks.args_for('_attempt_transaction') == [(transaction.task.uuid,)]
+
+
+def test_transaction_already_known_counts_as_sent(node, submitter, persistence_interface, queued_tasks,
+                                                  send_transfer):
+    submitter.processor.transaction_watcher = 'block'
+
+    transaction = send_transfer()
+    node.eth_sendRawTransaction(transaction.raw_transaction)
+
+    run(submitter._submit(transaction.id))
+
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.status == 'PENDING'
+    assert transaction.submitted_date is not None
+    assert queued_tasks.args_for('_attempt_transaction') == []
+
+
+def test_submit_survives_errors(mocker, submitter, send_transfer):
+    transaction = send_transfer()
+
+    async def unreachable(method, params):
+        raise ConnectionError('node unreachable')
+
+    submitter.rpc = unreachable
+    rollback = mocker.spy(submitter.persistence_interface.session, 'rollback')
+
+    run(submitter.submit(transaction.id))
+
+    assert submitter.in_flight == 0
+    rollback.assert_called_once()
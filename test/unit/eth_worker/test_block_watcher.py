@@ -0,0 +1,75 @@
+import pytest
+from uuid import uuid4
+
+from conftest import TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+
+def test_process_block_fetches_each_receipt_once(mocker, node, block_watcher, persistence_interface,
+                                                 signing_wallet, send_transfer):
+    carrier = send_transfer()
+    single = send_transfer()
+
+    # Two more transfers carried by the first transaction, as they would be by a multi-transfer batch
+    batched = []
+    for amount in [200, 300]:
+        task = persistence_interface.create_function_task(
+            str(uuid4()), signing_wallet, TOKEN_ADDRESS, 'ERC20', 'transfer', [RECIPIENT_ADDRESS, amount]
+        )
+        batched.append(persistence_interface.create_blockchain_transaction(task.uuid))
+
+    persistence_interface.bulk_update_transaction_data([
+        (t.id, {'hash': carrier.hash, 'nonce': carrier.nonce, 'nonce_consumed': True, 'batch_size': 3})
+        for t in [carrier] + batched
+    ])
+
+    node.mine(carrier.hash, single.hash)
+
+    get_receipt = mocker.spy(node, 'eth_getTransactionReceipt')
+
+    assert block_watcher.process_block(1) == 4
+
+    assert sorted(c[0][0] for c in get_receipt.call_args_list) == sorted([carrier.hash, single.hash])
+
+    for transaction in [carrier, single] + batched:
+        assert persistence_interface.get_transaction(transaction.id).status == 'SUCCESS'
+        assert persistence_interface.get_transaction(transaction.id).task.status == 'SUCCESS'
+
+
+@pytest.mark.parametrize("has_newer_attempt, resolved", [
+    (False, 1),
+    (True, 0),
+])
+def test_timed_out_transaction_is_resolved_only_while_latest(node, block_watcher, persistence_interface,
+                                                             send_transfer, has_newer_attempt, resolved):
+    transaction = send_transfer()
+    persistence_interface.update_transaction_data(transaction.id, {'status': 'FAILED', 'error': 'Timeout Error'})
+
+    if has_newer_attempt:
+        persistence_interface.create_blockchain_transaction(transaction.task.uuid)
+
+    node.mine(transaction.hash)
+
+    assert block_watcher.process_block(1) == resolved
+
+    expected_status = 'FAILED' if has_newer_attempt else 'SUCCESS'
+    assert persistence_interface.get_transaction(transaction.id).status == expected_status
+
+
+def test_process_block_skips_empty_blocks(node, block_watcher):
+    node.mine_empty_blocks(1)
+
+    assert block_watcher.process_block(1) == 0
+
+
+def test_poll_catches_up_from_last_processed_block(node, red, block_watcher, persistence_interface, send_transfer):
+    transaction = send_transfer()
+
+    block_watcher.set_last_processed_block(0)
+    node.mine(transaction.hash)
+    node.mine_empty_blocks(2)
+
+    assert block_watcher.poll() == 3
+    assert block_watcher.get_last_processed_block() == 3
+    assert int(red.get(block_watcher.LATEST_BLOCK_KEY)) == 3
+
+    assert persistence_interface.get_transaction(transaction.id).status == 'SUCCESS'
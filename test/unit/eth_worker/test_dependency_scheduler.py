@@ -0,0 +1,135 @@
+import pytest
+from uuid import uuid4
+
+from conftest import TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+
+@pytest.fixture(scope='function')
+def scheduler(processor):
+    return processor.dependency_scheduler
+
+
+@pytest.fixture(scope='function')
+def create_task(persistence_interface, signing_wallet):
+    def inner(prior_tasks=None):
+        return persistence_interface.create_function_task(
+            str(uuid4()), signing_wallet, TOKEN_ADDRESS, 'ERC20', 'transfer', [RECIPIENT_ADDRESS, 100],
+            prior_tasks=prior_tasks
+        )
+
+    return inner
+
+
+@pytest.fixture(scope='function')
+def set_task_status(persistence_interface):
+    def inner(task, status):
+        transaction = persistence_interface.create_blockchain_transaction(task.uuid)
+        persistence_interface.update_transaction_data(transaction.id, {'status': status})
+
+    return inner
+
+
+def test_task_is_released_by_its_last_prior(scheduler, create_task, set_task_status):
+    priors = [create_task(), create_task()]
+    for prior in priors:
+        set_task_status(prior, 'PENDING')
+
+    dependent = create_task()
+
+    assert scheduler.block(dependent.uuid, [p.uuid for p in priors]) == 2
+    assert scheduler.get_blocked_task_uuids() == [dependent.uuid]
+
+    set_task_status(priors[0], 'SUCCESS')
+    assert scheduler.release(priors[0].uuid) == []
+
+    set_task_status(priors[1], 'SUCCESS')
+    assert scheduler.release(priors[1].uuid) == [dependent.uuid]
+
+    assert scheduler.get_blocked_task_uuids() == []
+
+
+def test_task_is_not_blocked_on_succeeded_priors(scheduler, create_task, set_task_status):
+    prior = create_task()
+    set_task_status(prior, 'SUCCESS')
+
+    dependent = create_task()
+
+    assert scheduler.block(dependent.uuid, [prior.uuid]) == 0
+    assert scheduler.get_blocked_task_uuids() == []
+
+
+@pytest.mark.parametrize("status, waiting_on", [
+    ('SUCCESS', 0),
+    ('PENDING', 1),
+])
+def test_expired_status_is_read_from_database(red, persistence_interface, scheduler, create_task, set_task_status,
+                                              status, waiting_on):
+    prior = create_task()
+    set_task_status(prior, status)
+
+    red.delete(persistence_interface.TASK_STATUS_KEY_PREFIX + prior.uuid)
+
+    assert scheduler.block(create_task().uuid, [prior.uuid]) == waiting_on
+    assert persistence_interface.get_cached_task_status(prior.uuid) == status
+
+
+def test_status_cached_in_the_meantime_is_kept(red, persistence_interface, create_task, set_task_status):
+    prior = create_task()
+    set_task_status(prior, 'PENDING')
+
+    key = persistence_interface.TASK_STATUS_KEY_PREFIX + prior.uuid
+    red.delete(key)
+
+    # Cached by a commit that the database read below doesn't see
+    red.set(key, 'SUCCESS')
+
+    persistence_interface.fill_cached_task_statuses([prior.uuid])
+
+    assert persistence_interface.get_cached_task_status(prior.uuid) == 'SUCCESS'
+
+
+def test_dependent_is_started_once_prior_is_mined(node, processor, block_watcher, queued_tasks,
+                                                 persistence_interface, create_task, send_transfer):
+    prior = send_transfer().task
+    dependent = create_task(prior_tasks=[prior.uuid])
+
+    processor.attempt_transaction(dependent.uuid)
+
+    assert processor.dependency_scheduler.get_blocked_task_uuids() == [dependent.uuid]
+    assert persistence_interface.get_task_from_uuid(dependent.uuid).transactions == []
+
+    node.mine(prior.transactions[0].hash)
+    block_watcher.process_block(1)
+
+    assert queued_tasks.args_for('_attempt_transaction') == [(dependent.uuid,)]
+    assert processor.dependency_scheduler.get_blocked_task_uuids() == []
+    assert persistence_interface.get_task_from_uuid(prior.uuid).status_text == 'SUCCESS'
+
+
+def test_self_dependency_fails_task(processor, persistence_interface, create_task, set_task_status):
+    task = create_task()
+    set_task_status(task, 'FAILED')
+
+    task.prior_tasks.append(task)
+    persistence_interface.session.commit()
+
+    processor.attempt_transaction(task.uuid)
+
+    assert persistence_interface.get_task_from_uuid(task.uuid).status_text == 'FAILED: Dependency cycle'
+    assert processor.dependency_scheduler.get_blocked_task_uuids() == []
+    assert len(task.transactions) == 1
+
+
+def test_dependency_cycle_fails_task(processor, persistence_interface, create_task):
+    first = create_task()
+    second = create_task(prior_tasks=[first.uuid])
+    third = create_task(prior_tasks=[second.uuid])
+
+    first.prior_tasks.append(third)
+    persistence_interface.session.commit()
+
+    processor.attempt_transaction(first.uuid)
+
+    assert persistence_interface.get_task_from_uuid(first.uuid).status_text == 'FAILED: Dependency cycle'
+    assert processor.dependency_scheduler.get_blocked_task_uuids() == []
+    assert first.transactions == []
@@ -0,0 +1,84 @@
+import pytest
+
+from eth_abi.exceptions import EncodingError
+from web3.exceptions import InvalidAddress, ValidationError
+
+from conftest import TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+SPENDER_ADDRESS = '0x5b3a1F9C7E2D4B6A8C0E1f3a5B7d9c2E4F6a8b0c'
+
+CALLS = {
+    'transfer': lambda amount, address=RECIPIENT_ADDRESS: [address, amount],
+    'approve': lambda amount, address=SPENDER_ADDRESS: [address, amount],
+    'transferFrom': lambda amount, address=RECIPIENT_ADDRESS: [SPENDER_ADDRESS, address, amount],
+}
+
+
+@pytest.fixture(scope='function')
+def token(w3):
+    from eth_manager.ABIs import erc20_abi
+
+    return w3.eth.contract(address=TOKEN_ADDRESS, abi=erc20_abi.abi)
+
+
+@pytest.mark.parametrize("function", list(CALLS))
+@pytest.mark.parametrize("amount", [0, 1, 10 ** 18, 2 ** 256 - 1])
+def test_call_is_encoded_as_web3_would(token, function, amount):
+    from eth_manager.erc20_encoding import build_erc20_transaction
+
+    args = CALLS[function](amount)
+
+    web3_transaction = getattr(token.functions, function)(*args).buildTransaction(
+        {'gas': 100000, 'gasPrice': 1, 'nonce': 0, 'chainId': 42}
+    )
+
+    transaction = build_erc20_transaction(TOKEN_ADDRESS.lower(), function, args)
+
+    assert transaction['data'] == web3_transaction['data']
+    assert transaction['to'] == web3_transaction['to']
+    assert transaction['value'] == web3_transaction['value']
+
+
+@pytest.mark.parametrize("function", list(CALLS))
+@pytest.mark.parametrize("address", [
+    RECIPIENT_ADDRESS.lower(),
+    '0x' + RECIPIENT_ADDRESS[2:].upper(),
+    # Mistyped, so the checksum doesn't match
+    RECIPIENT_ADDRESS[:-1] + 'f',
+    RECIPIENT_ADDRESS[2:],
+    '0x1234',
+])
+def test_non_checksummed_address_is_rejected_as_by_web3(token, function, address):
+    from eth_manager.erc20_encoding import encode_erc20_call
+
+    args = CALLS[function](100, address)
+
+    with pytest.raises((InvalidAddress, ValidationError)):
+        token.encodeABI(function, args)
+
+    with pytest.raises(InvalidAddress):
+        encode_erc20_call(function, args)
+
+
+@pytest.mark.parametrize("amount", [-1, 2 ** 256, 1.5, '100'])
+def test_invalid_amount_is_rejected_as_by_web3(token, amount):
+    from eth_manager.erc20_encoding import encode_erc20_call
+
+    with pytest.raises(ValidationError):
+        token.encodeABI('transfer', [RECIPIENT_ADDRESS, amount])
+
+    with pytest.raises(EncodingError):
+        encode_erc20_call('transfer', [RECIPIENT_ADDRESS, amount])
+
+
+@pytest.mark.parametrize("fast_path", [True, False])
+def test_fast_path_sends_the_same_transaction(node, processor, send_transfer, fast_path):
+    processor.erc20_fast_path = fast_path
+
+    send_transfer(amount=2 ** 256 - 1)
+
+    sent, = node.sent_transactions()
+    assert sent['to'] == TOKEN_ADDRESS
+    assert sent['data'] == (
+        '0xa9059cbb' + RECIPIENT_ADDRESS[2:].lower().rjust(64, '0') + 'f' * 64
+    )
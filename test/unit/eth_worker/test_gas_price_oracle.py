@@ -0,0 +1,100 @@
+import json
+import logging
+import time
+
+import pytest
+
+DEFAULT_GAS_PRICE = 20
+PROVIDER_URL = 'http://gas-price-provider'
+
+
+@pytest.fixture(scope='function')
+def provider(mocker):
+    """
+    Stands in for the gas price provider's HTTP API. Set to an exception to make requests to it fail.
+    """
+    class Provider(object):
+        gas_price = 10
+        error = None
+
+        def get(self, url, params, timeout):
+            assert url == PROVIDER_URL + '/price'
+            if self.error:
+                raise self.error
+            return mocker.MagicMock(json=lambda: {'gas_price': str(self.gas_price)})
+
+    provider = Provider()
+    mocker.patch('eth_manager.gas_price_oracle.requests.get', provider.get)
+
+    return provider
+
+
+@pytest.fixture(scope='function')
+def oracle(red, provider):
+    from eth_manager.gas_price_oracle import GasPriceOracle
+    from eth_manager.metrics import Metrics
+
+    return GasPriceOracle(red, Metrics(red), DEFAULT_GAS_PRICE, PROVIDER_URL, memory_ttl_seconds=0)
+
+
+def test_refreshed_price_is_served(oracle, provider):
+    assert oracle.refresh(60) == 10
+    assert oracle.get_gas_price() == 10
+
+
+def test_price_is_capped_at_the_default(oracle, provider):
+    provider.gas_price = DEFAULT_GAS_PRICE * 10
+
+    assert oracle.refresh(60) == DEFAULT_GAS_PRICE
+    assert oracle.get_gas_price() == DEFAULT_GAS_PRICE
+
+
+def test_failed_refresh_keeps_the_last_good_price(caplog, oracle, provider):
+    oracle.refresh(60)
+
+    provider.error = ConnectionError('provider down')
+    with caplog.at_level(logging.WARNING, logger='eth_manager.gas_price_oracle'):
+        assert oracle.refresh(60) == 10
+
+    assert 'provider down' in caplog.text
+    assert oracle.metrics.get_all()['gas_price_refresh_failures'] == 1
+    assert oracle.get_gas_price() == 10
+
+
+def test_failed_first_refresh_falls_back_to_default(oracle, provider):
+    provider.error = ConnectionError('provider down')
+
+    assert oracle.refresh(60) is None
+    assert oracle.get_gas_price() == DEFAULT_GAS_PRICE
+    assert oracle.metrics.get_all()['gas_price_fallbacks'] == 1
+
+
+def test_stale_price_falls_back_to_default(red, oracle):
+    red.set(oracle.KEY, json.dumps({'gas_price': 10, 'fetched_at': time.time() - oracle.max_age_seconds - 1}))
+
+    assert oracle.get_gas_price() == DEFAULT_GAS_PRICE
+
+
+def test_price_is_held_in_memory(oracle, provider):
+    oracle.memory_ttl_seconds = 60
+
+    oracle.refresh(60)
+    assert oracle.get_gas_price() == 10
+
+    # Another worker refreshes the price in redis
+    provider.gas_price = 15
+    oracle.refresh(60)
+    assert oracle.get_gas_price() == 10
+
+    oracle.memory_ttl_seconds = 0
+    assert oracle.get_gas_price() == 15
+
+
+def test_without_a_provider_the_default_is_used(red):
+    from eth_manager.gas_price_oracle import GasPriceOracle
+    from eth_manager.metrics import Metrics
+
+    oracle = GasPriceOracle(red, Metrics(red), DEFAULT_GAS_PRICE, None)
+
+    assert oracle.refresh(60) is None
+    assert oracle.get_gas_price() == DEFAULT_GAS_PRICE
@@ -0,0 +1,65 @@
+import config
+from conftest import TOKEN_ADDRESS
+
+# Gas used by a transfer to an existing holder, and to a new one, which has to initialise their balance
+EXISTING_HOLDER_TRANSFER_GAS = 35000
+NEW_HOLDER_TRANSFER_GAS = 51000
+
+
+def sent_gas(node, transaction):
+    return node.transactions[transaction.hash]['gas']
+
+
+def test_estimates_gas_without_a_profile(node, send_transfer):
+    transaction = send_transfer()
+
+    assert node.estimate_gas_calls == 1
+    assert sent_gas(node, transaction) == int(node.estimated_gas * 1.2)
+
+
+def test_learned_gas_covers_new_holders(node, block_watcher, send_transfer):
+    first = send_transfer()
+    node.mine(first.hash, gas_used=EXISTING_HOLDER_TRANSFER_GAS)
+    block_watcher.process_block(1)
+
+    second = send_transfer()
+
+    assert node.estimate_gas_calls == 1
+    assert sent_gas(node, second) >= EXISTING_HOLDER_TRANSFER_GAS + config.ETH_GAS_PROFILE_HEADROOM
+    assert sent_gas(node, second) >= NEW_HOLDER_TRANSFER_GAS
+
+
+def test_profile_keeps_the_highest_gas_used(node, processor, block_watcher, send_transfer):
+    for block, gas_used in enumerate([NEW_HOLDER_TRANSFER_GAS, EXISTING_HOLDER_TRANSFER_GAS], start=1):
+        transaction = send_transfer()
+        node.mine(transaction.hash, gas_used=gas_used)
+        block_watcher.process_block(block)
+
+    assert processor.gas_profiles.get_gas_used(TOKEN_ADDRESS, 'ERC20', 'transfer') == NEW_HOLDER_TRANSFER_GAS
+
+
+def test_failed_transaction_goes_back_to_estimating(node, block_watcher, send_transfer):
+    first = send_transfer()
+    node.mine(first.hash, gas_used=EXISTING_HOLDER_TRANSFER_GAS)
+    block_watcher.process_block(1)
+
+    # Could have run out of gas on the learned limit
+    second = send_transfer()
+    node.mine(second.hash, status=0, gas_used=EXISTING_HOLDER_TRANSFER_GAS + config.ETH_GAS_PROFILE_HEADROOM)
+    block_watcher.process_block(2)
+
+    third = send_transfer()
+
+    assert node.estimate_gas_calls == 2
+    assert sent_gas(node, third) == int(node.estimated_gas * 1.2)
+
+
+def test_explicit_gas_limit_is_used_as_is(node, block_watcher, send_transfer):
+    first = send_transfer()
+    node.mine(first.hash, gas_used=EXISTING_HOLDER_TRANSFER_GAS)
+    block_watcher.process_block(1)
+
+    second = send_transfer(gas_limit=100000)
+
+    assert node.estimate_gas_calls == 1
+    assert sent_gas(node, second) == 100000
@@ -0,0 +1,89 @@
+import pytest
+import json
+import logging
+
+import redis
+
+from conftest import TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+
+@pytest.fixture(scope='function')
+def unreachable_metrics():
+    from eth_manager.metrics import Metrics
+
+    # Nothing listens on this port
+    return Metrics(redis.Redis(host='127.0.0.1', port=1, socket_connect_timeout=0.1))
+
+
+def test_span_survives_redis_errors(unreachable_metrics):
+    sent = []
+
+    with unreachable_metrics.span('send_raw_transaction', transaction_id=1):
+        sent.append(1)
+
+    assert sent == [1]
+
+
+def test_span_still_raises_stage_errors(unreachable_metrics):
+    with pytest.raises(ValueError):
+        with unreachable_metrics.span('send_raw_transaction', transaction_id=1):
+            raise ValueError('nonce too low')
+
+
+def test_writes_survive_redis_errors(unreachable_metrics):
+    unreachable_metrics.increment('transactions_success')
+    unreachable_metrics.gauge('async_in_flight', 3)
+    unreachable_metrics.observe('get_receipt_seconds', 0.2)
+
+
+def test_processor_shares_persistence_metrics(processor, persistence_interface):
+    assert processor.metrics is persistence_interface.metrics
+    assert processor.gas_profiles.metrics is persistence_interface.metrics
+
+
+def test_transaction_stages_are_timed(caplog, processor, send_transfer):
+    caplog.set_level(logging.DEBUG, logger='eth_manager.spans')
+
+    transaction = send_transfer()
+
+    stages = [
+        'estimate_gas', 'nonce_lock_wait', 'claim_nonce', 'build_and_sign', 'send_raw_transaction', 'record_submission'
+    ]
+
+    histograms = processor.metrics.get_histograms()
+    for stage in stages:
+        assert histograms[f'{stage}_seconds']['count'] == 1
+
+    spans = [json.loads(r.getMessage()) for r in caplog.records if r.name == 'eth_manager.spans']
+    transaction_spans = [s for s in spans if s.get('transaction_id') == transaction.id]
+    assert [s['span'] for s in transaction_spans] == stages
+    assert not any(s['failed'] for s in transaction_spans)
+    assert all(s['task_id'] == transaction.task.id for s in transaction_spans if s['span'] != 'nonce_lock_wait')
+
+
+def test_task_statuses_are_updated_inside_spans(processor, send_transfer):
+    send_transfer()
+
+    histograms = processor.metrics.get_histograms()
+    assert histograms['update_task_statuses_seconds']['count'] > 0
+    assert histograms['cache_task_statuses_seconds']['count'] > 0
+
+
+def test_skipped_attempts_are_counted_rather_than_printed(capsys, processor, persistence_interface, signing_wallet,
+                                                          send_transfer):
+    from uuid import uuid4
+
+    prior = send_transfer().task
+    dependent = persistence_interface.create_function_task(
+        str(uuid4()), signing_wallet, TOKEN_ADDRESS, 'ERC20', 'transfer', [RECIPIENT_ADDRESS, 100],
+        prior_tasks=[prior.uuid]
+    )
+
+    processor.attempt_transaction(dependent.uuid)
+    processor.attempt_transaction(prior.uuid)
+
+    metrics = processor.metrics.get_all()
+    assert metrics['attempts_blocked'] == 1
+    assert metrics['attempts_skipped'] == 1
+
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,136 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+import redis
+
+import config
+from conftest import UNIT_TEST_REDIS_DB, TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+
+@pytest.fixture(scope='function')
+def new_transaction(persistence_interface, signing_wallet):
+    def inner():
+        task = persistence_interface.create_function_task(
+            str(uuid4()), signing_wallet, TOKEN_ADDRESS, 'ERC20', 'transfer', [RECIPIENT_ADDRESS, 100]
+        )
+        return persistence_interface.create_blockchain_transaction(task.uuid)
+
+    return inner
+
+
+@pytest.fixture(scope='function')
+def allocate(persistence_interface, signing_wallet, new_transaction):
+    # Claims aren't reconciled as gaps while they're recent, which would hide them from these tests
+    persistence_interface.nonce_allocator.claim_grace_seconds = -1
+
+    def inner():
+        transaction = new_transaction()
+        nonce, _ = persistence_interface.allocate_transaction_nonce(signing_wallet, transaction.id)
+        return nonce, transaction
+
+    return inner
+
+
+def test_concurrent_claims_are_unique(red, signing_wallet):
+    from eth_manager.nonce_allocator import NonceAllocator
+
+    NonceAllocator(red).seed(signing_wallet.address, 5)
+
+    def claim_many(_):
+        # As separate worker processes would, each claims over its own connection
+        allocator = NonceAllocator(redis.Redis.from_url(config.REDIS_URL, db=UNIT_TEST_REDIS_DB))
+        return [allocator.claim(signing_wallet.address) for _ in range(50)]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        nonces = [n for claimed in executor.map(claim_many, range(8)) for n in claimed]
+
+    assert sorted(nonces) == list(range(5, 5 + 400))
+
+
+def test_unseeded_allocator_falls_back_to_chain_and_database(node, persistence_interface, signing_wallet,
+                                                            new_transaction, allocate):
+    for _ in range(3):
+        node.mine_foreign_transaction(signing_wallet.address)
+
+    # Claimed through the locked path, before the allocator was switched on
+    persistence_interface.update_transaction_data(new_transaction().id, {
+        'signing_wallet': signing_wallet, 'nonce': 3, 'nonce_consumed': True, 'status': 'PENDING'
+    })
+
+    assert persistence_interface.nonce_allocator.get_counter(signing_wallet.address) is None
+
+    assert allocate()[0] == 4
+    assert persistence_interface.nonce_allocator.get_counter(signing_wallet.address) == 5
+    assert signing_wallet.address in persistence_interface.nonce_allocator.get_wallet_addresses()
+
+
+def test_locked_claim_skips_consumed_nonces(node, persistence_interface, signing_wallet, new_transaction):
+    node.mine_foreign_transaction(signing_wallet.address)
+
+    first = new_transaction()
+    assert persistence_interface.locked_claim_transaction_nonce(signing_wallet, first.id) == (1, first.id)
+
+    second = new_transaction()
+    assert persistence_interface.locked_claim_transaction_nonce(signing_wallet, second.id) == (2, second.id)
+
+    # An existing claim is returned as is
+    assert persistence_interface.locked_claim_transaction_nonce(signing_wallet, first.id) == (1, first.id)
+
+    assert persistence_interface.nonce_allocator.get_counter(signing_wallet.address) is None
+
+
+def test_reconcile_hands_out_unused_nonces_again(persistence_interface, signing_wallet, allocate):
+    claims = [allocate() for _ in range(3)]
+    assert [nonce for nonce, _ in claims] == [0, 1, 2]
+
+    # The transaction at nonce 1 failed before it was sent, so nothing on chain uses that nonce
+    persistence_interface.update_transaction_data(claims[1][1].id, {'status': 'FAILED', 'nonce_consumed': False})
+
+    assert persistence_interface.reconcile_wallet_nonces(signing_wallet) == 1
+    assert persistence_interface.nonce_allocator.get_gaps(signing_wallet.address) == [1]
+
+    assert allocate()[0] == 1
+    assert allocate()[0] == 3
+
+    # Nothing is left to reconcile once the gap has been claimed again
+    assert persistence_interface.reconcile_wallet_nonces(signing_wallet) == 0
+
+
+def test_reconcile_moves_counter_past_network_nonce(node, persistence_interface, signing_wallet, allocate):
+    assert allocate()[0] == 0
+
+    # Nonces used by something other than this worker
+    for _ in range(3):
+        node.mine_foreign_transaction(signing_wallet.address)
+
+    persistence_interface.reconcile_wallet_nonces(signing_wallet)
+
+    assert persistence_interface.nonce_allocator.get_gaps(signing_wallet.address) == []
+    assert allocate()[0] == 3
+
+
+def test_reconcile_skips_recent_claims(persistence_interface, signing_wallet, allocate):
+    claims = [allocate() for _ in range(2)]
+    persistence_interface.update_transaction_data(claims[0][1].id, {'status': 'FAILED', 'nonce_consumed': False})
+
+    # The claiming transaction may not be committed yet, so it isn't a gap until the grace period has passed
+    persistence_interface.nonce_allocator.claim_grace_seconds = 60
+
+    assert persistence_interface.reconcile_wallet_nonces(signing_wallet) == 0
+    assert persistence_interface.nonce_allocator.get_gaps(signing_wallet.address) == []
+
+
+def test_take_only_releases_unclaimed_nonces(persistence_interface, signing_wallet, allocate):
+    allocator = persistence_interface.nonce_allocator
+
+    claims = [allocate() for _ in range(2)]
+    persistence_interface.update_transaction_data(claims[1][1].id, {'status': 'FAILED', 'nonce_consumed': False})
+    persistence_interface.reconcile_wallet_nonces(signing_wallet)
+
+    assert allocator.take(signing_wallet.address, 1) is True
+    assert allocator.get_gaps(signing_wallet.address) == []
+
+    # Claimed since the last reconcile, so possibly already being signed
+    assert allocate()[0] == 2
+    assert allocator.take(signing_wallet.address, 2) is False
@@ -0,0 +1,140 @@
+import pytest
+
+ADDRESS = '0x2E6C02A5d8E1Bd5AA7e1E5A3D02c8F8Ff44c5f8F'
+
+
+@pytest.fixture(scope='function')
+def gap_tracker(red, persistence_interface):
+    from eth_manager.nonce_gaps import NonceGapTracker
+
+    return NonceGapTracker(red, persistence_interface.metrics)
+
+
+@pytest.fixture(scope='function')
+def gap_filling_processor(processor):
+    processor.nonce_gap_fill_after_seconds = 0
+
+    return processor
+
+
+@pytest.fixture(scope='function')
+def sent_transfers(send_transfer):
+    def inner(count=3):
+        return [send_transfer() for _ in range(count)]
+
+    return inner
+
+
+def test_tracker_reports_how_long_gaps_are_open(mocker, gap_tracker):
+    now = mocker.patch('eth_manager.nonce_gaps.time.time', return_value=1000.0)
+
+    assert gap_tracker.observe(ADDRESS, [3, 5]) == {3: 0, 5: 0}
+
+    now.return_value = 1030.0
+    assert gap_tracker.observe(ADDRESS, [5, 7]) == {5: 30, 7: 0}
+
+    metrics = gap_tracker.metrics.get_all()
+    assert metrics['nonce_gaps_closed'] == 1
+    assert metrics['nonce_gap_seconds_total'] == 30
+    assert metrics['last_nonce_gap_seconds'] == 30
+
+    now.return_value = 1100.0
+    assert gap_tracker.observe(ADDRESS, []) == {}
+
+    metrics = gap_tracker.metrics.get_all()
+    assert metrics['nonce_gaps_closed'] == 3
+    assert metrics['nonce_gap_seconds_total'] == 30 + 100 + 70
+
+
+def test_tracker_keeps_addresses_apart(red, gap_tracker, signing_wallet):
+    gap_tracker.observe(ADDRESS, [1])
+    gap_tracker.observe(signing_wallet.address, [])
+
+    assert gap_tracker.metrics.get_all().get('nonce_gaps_closed') is None
+    assert red.hkeys(f'NonceGapsOpen-{ADDRESS}') == [b'1']
+
+
+def test_young_gap_is_only_recorded(node, red, processor, signing_wallet, sent_transfers):
+    first, *_ = sent_transfers()
+    node.pool.pop(first.hash)
+
+    processor.nonce_gap_fill_after_seconds = 60
+
+    assert processor.fill_wallet_nonce_gaps(signing_wallet) == []
+    assert red.hkeys(f'NonceGapsOpen-{signing_wallet.address}') == [b'0']
+    assert first.hash not in node.pool
+
+
+def test_dropped_transaction_is_rebroadcast_into_its_gap(node, gap_filling_processor, persistence_interface,
+                                                        signing_wallet, sent_transfers):
+    first, *_ = sent_transfers()
+    node.pool.pop(first.hash)
+
+    assert gap_filling_processor.fill_wallet_nonce_gaps(signing_wallet) == [0]
+
+    assert first.hash in node.pool
+    assert persistence_interface.get_transaction(first.id).rebroadcast_count == 1
+
+
+def test_gap_without_a_transaction_is_filled_by_a_transfer_to_self(node, gap_filling_processor, persistence_interface,
+                                                                   signing_wallet, sent_transfers):
+    _, failed, _ = sent_transfers()
+
+    # Failed after it was sent, and dropped by the node
+    persistence_interface.update_transaction_data(failed.id, {'status': 'FAILED', 'nonce_consumed': True})
+    node.pool.pop(failed.hash)
+
+    assert gap_filling_processor.fill_wallet_nonce_gaps(signing_wallet) == [1]
+
+    filler = node.sent_transactions()[-1]
+    assert filler['nonce'] == 1
+    assert filler['to'] == signing_wallet.address
+    assert filler['value'] == 0
+    assert gap_filling_processor.metrics.get_all()['nonce_gaps_filled'] == 1
+
+
+def test_gap_closes_once_mined(node, gap_filling_processor, signing_wallet, sent_transfers):
+    transactions = sent_transfers()
+    node.pool.pop(transactions[0].hash)
+
+    gap_filling_processor.fill_wallet_nonce_gaps(signing_wallet)
+
+    node.mine(*[t.hash for t in transactions])
+
+    assert gap_filling_processor.fill_wallet_nonce_gaps(signing_wallet) == []
+    assert gap_filling_processor.metrics.get_all()['nonce_gaps_closed'] == 1
+
+
+def test_released_nonce_is_taken_from_the_allocator_before_filling(node, gap_filling_processor, persistence_interface,
+                                                                   signing_wallet, sent_transfers):
+    gap_filling_processor.nonce_allocator = 'redis'
+    persistence_interface.nonce_allocator.claim_grace_seconds = -1
+
+    _, failed, _ = sent_transfers()
+
+    # Failed before the node accepted it, so its nonce is handed out again
+    persistence_interface.update_transaction_data(failed.id, {'status': 'FAILED', 'nonce_consumed': False})
+    node.pool.pop(failed.hash)
+    persistence_interface.reconcile_wallet_nonces(signing_wallet)
+
+    assert persistence_interface.nonce_allocator.get_gaps(signing_wallet.address) == [1]
+
+    assert gap_filling_processor.fill_wallet_nonce_gaps(signing_wallet) == [1]
+
+    # So it won't be claimed by a new transaction as well
+    assert persistence_interface.nonce_allocator.get_gaps(signing_wallet.address) == []
+    assert node.sent_transactions()[-1]['to'] == signing_wallet.address
+
+
+def test_claimed_nonce_is_not_filled(node, gap_filling_processor, persistence_interface, signing_wallet,
+                                     sent_transfers):
+    gap_filling_processor.nonce_allocator = 'redis'
+
+    _, failed, _ = sent_transfers()
+
+    # Not released by a reconcile, so it may have been claimed by a new transaction that's still being signed
+    persistence_interface.update_transaction_data(failed.id, {'status': 'FAILED', 'nonce_consumed': False})
+    node.pool.pop(failed.hash)
+
+    assert gap_filling_processor.fill_wallet_nonce_gaps(signing_wallet) == []
+    assert node.sent_transactions()[-1]['nonce'] == 2
@@ -0,0 +1,40 @@
+from collections import Counter
+
+from eth_manager.partitioning import HashRing
+
+NODES = [f'processor-{i}' for i in range(4)]
+KEYS = ['0x{:040x}'.format(i * 7919) for i in range(1000)]
+
+
+def test_keys_always_route_to_the_same_node():
+    ring = HashRing(NODES)
+
+    assert [ring.get_node(k) for k in KEYS] == [HashRing(NODES).get_node(k) for k in KEYS]
+
+
+def test_keys_are_spread_across_nodes():
+    counts = Counter(HashRing(NODES).get_node(k) for k in KEYS)
+
+    assert set(counts) == set(NODES)
+    assert min(counts.values()) > len(KEYS) / len(NODES) / 2
+
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(NODES)
+    grown_ring = HashRing(NODES + ['processor-4'])
+
+    moved = [k for k in KEYS if ring.get_node(k) != grown_ring.get_node(k)]
+
+    assert moved
+    assert all(grown_ring.get_node(k) == 'processor-4' for k in moved)
+
+
+def test_processor_queue_ignores_address_case(processor):
+    address = '0xAbC0000000000000000000000000000000000123'
+
+    assert processor.get_processor_queue(address) == 'processor'
+
+    processor.processor_queue_ring = HashRing(NODES)
+
+    assert processor.get_processor_queue(address) == processor.get_processor_queue(address.lower())
+    assert processor.get_processor_queue(address) in NODES
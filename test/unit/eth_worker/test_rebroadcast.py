@@ -0,0 +1,170 @@
+import pytest
+from uuid import uuid4
+
+from conftest import TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+
+@pytest.fixture(scope='function')
+def rebroadcasting_processor(processor):
+    # Everything sent so far counts as stale
+    processor.rebroadcast_after_seconds = -1
+    processor.rebroadcasts_before_replacement = 1
+    processor.max_gas_price_replacements = 1
+    processor.nonce_consumed_confirmations = 2
+
+    return processor
+
+
+def rebroadcast(processor):
+    counts = processor.rebroadcast_stale_transactions()
+    return {outcome: count for outcome, count in counts.items() if count}
+
+
+def test_fresh_transaction_is_left_alone(node, processor, send_transfer):
+    send_transfer()
+    node.drop_pending_transactions()
+
+    assert rebroadcast(processor) == {}
+
+
+def test_dropped_transaction_is_rebroadcast(node, rebroadcasting_processor, persistence_interface, send_transfer):
+    transaction = send_transfer()
+    node.drop_pending_transactions()
+
+    assert rebroadcast(rebroadcasting_processor) == {'rebroadcast': 1}
+
+    assert transaction.hash in node.pool
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.rebroadcast_count == 1
+    assert transaction.last_broadcast_date is not None
+
+
+def test_stalled_transaction_is_replaced_at_higher_gas_price(node, rebroadcasting_processor, persistence_interface,
+                                                             signing_wallet, send_transfer):
+    transaction = send_transfer()
+    original_hash, original_gas_price = transaction.hash, transaction.gas_price
+
+    # Carried along with it, as in a multi-transfer batch
+    task = persistence_interface.create_function_task(
+        str(uuid4()), signing_wallet, TOKEN_ADDRESS, 'ERC20', 'transfer', [RECIPIENT_ADDRESS, 200]
+    )
+    batched = persistence_interface.create_blockchain_transaction(task.uuid)
+    persistence_interface.update_transaction_data(batched.id, {
+        'hash': original_hash, 'nonce': transaction.nonce, 'nonce_consumed': True, 'batch_size': 2
+    })
+
+    assert rebroadcast(rebroadcasting_processor) == {'rebroadcast': 1}
+    assert rebroadcast(rebroadcasting_processor) == {'replaced': 1}
+
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.hash != original_hash
+    assert transaction.replaced_hashes == [original_hash]
+    assert transaction.replacement_count == 1
+    assert transaction.rebroadcast_count == 0
+    assert transaction.gas_price >= original_gas_price * 1.1
+
+    replacement = node.transactions[transaction.hash]
+    assert replacement['nonce'] == transaction.nonce
+    assert replacement['gasPrice'] == transaction.gas_price
+
+    assert persistence_interface.get_transaction(batched.id).hash == transaction.hash
+
+    # Rebroadcast again before the next replacement, which is one more than allowed
+    assert rebroadcast(rebroadcasting_processor) == {'rebroadcast': 1}
+    assert rebroadcast(rebroadcasting_processor) == {}
+
+
+def test_replaced_transaction_mined_is_resolved(node, rebroadcasting_processor, persistence_interface,
+                                                send_transfer):
+    transaction = send_transfer()
+    original_hash = transaction.hash
+
+    rebroadcasting_processor.rebroadcasts_before_replacement = 0
+    assert rebroadcast(rebroadcasting_processor) == {'replaced': 1}
+
+    # The original is mined after all, rather than its replacement
+    node.mine(original_hash)
+
+    assert rebroadcast(rebroadcasting_processor) == {'resolved': 1}
+
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.status == 'SUCCESS'
+    assert transaction.hash == original_hash
+    assert transaction.task.status == 'SUCCESS'
+
+
+def test_transaction_mined_after_receipt_check_is_resolved(mocker, node, rebroadcasting_processor,
+                                                           persistence_interface, send_transfer):
+    transaction = send_transfer()
+
+    get_transaction_count = node.eth_getTransactionCount
+
+    def mined_before_nonce_check(address, block_identifier):
+        if transaction.hash in node.pool:
+            node.mine(transaction.hash)
+        return get_transaction_count(address, block_identifier)
+
+    mocker.patch.object(node, 'eth_getTransactionCount', side_effect=mined_before_nonce_check)
+
+    assert rebroadcast(rebroadcasting_processor) == {'resolved': 1}
+    assert persistence_interface.get_transaction(transaction.id).status == 'SUCCESS'
+
+
+def test_consumed_nonce_fails_transaction_once_confirmed(node, rebroadcasting_processor, persistence_interface,
+                                                         queued_tasks, signing_wallet, send_transfer):
+    transaction = send_transfer()
+
+    node.drop_pending_transactions()
+    node.mine_foreign_transaction(signing_wallet.address)
+
+    # Could still be reorged out, which would let ours be mined
+    assert rebroadcast(rebroadcasting_processor) == {}
+
+    node.mine_empty_blocks(2)
+
+    assert rebroadcast(rebroadcasting_processor) == {'failed': 1}
+
+    transaction = persistence_interface.get_transaction(transaction.id)
+    assert transaction.status == 'FAILED'
+    assert transaction.error == 'Nonce Consumed'
+    assert queued_tasks.args_for('_attempt_transaction') == [(transaction.task.uuid,)]
+
+
+@pytest.mark.parametrize("has_newer_attempt, outcome", [
+    (True, None),
+    (False, 'rebroadcast'),
+])
+def test_timed_out_transaction_is_only_resent_while_latest(node, rebroadcasting_processor, persistence_interface,
+                                                          send_transfer, has_newer_attempt, outcome):
+    transaction = send_transfer()
+    node.drop_pending_transactions()
+
+    persistence_interface.update_transaction_data(transaction.id, {'status': 'FAILED', 'error': 'Timeout Error'})
+
+    if has_newer_attempt:
+        persistence_interface.create_blockchain_transaction(transaction.task.uuid)
+
+    assert rebroadcasting_processor.rebroadcast_transaction(transaction) == outcome
+
+    expected_status = 'FAILED' if has_newer_attempt else 'PENDING'
+    assert persistence_interface.get_transaction(transaction.id).status == expected_status
+    assert (transaction.hash in node.pool) != has_newer_attempt
+
+
+def test_timed_out_transaction_is_not_resent_while_task_is_locked(node, red, rebroadcasting_processor,
+                                                                  persistence_interface, send_transfer):
+    transaction = send_transfer()
+    node.drop_pending_transactions()
+
+    persistence_interface.update_transaction_data(transaction.id, {'status': 'FAILED', 'error': 'Timeout Error'})
+
+    # As it would be by attempt_transaction, while it makes a new attempt
+    lock = red.lock(f'TaskID-{transaction.task.id}', timeout=10)
+    assert lock.acquire()
+
+    try:
+        assert rebroadcasting_processor.rebroadcast_transaction(transaction) is None
+    finally:
+        lock.release()
+
+    assert transaction.hash not in node.pool
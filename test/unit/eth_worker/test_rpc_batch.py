@@ -0,0 +1,101 @@
+import pytest
+
+from conftest import TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+
+class BatchingNodeSession(object):
+    """
+    Answers JSON-RPC batches posted by the batch client from the fake node, in reverse order like a node may
+    """
+
+    def post(self, url, json, timeout):
+        self.batches.append(json)
+
+        responses = [
+            {**self.node.make_request(request['method'], request['params']), 'id': request['id']}
+            for request in json if request['id'] not in self.dropped_ids
+        ]
+
+        return Response(list(reversed(responses)))
+
+    def __init__(self, node):
+        self.node = node
+        self.batches = []
+        self.dropped_ids = set()
+
+
+class Response(object):
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.responses
+
+    def __init__(self, responses):
+        self.responses = responses
+
+
+@pytest.fixture(scope='function')
+def session(node):
+    return BatchingNodeSession(node)
+
+
+@pytest.fixture(scope='function')
+def batch_client(session):
+    from eth_manager.rpc_batch import JSONRPCBatchClient
+
+    client = JSONRPCBatchClient('http://node', batch_size=2)
+    client.session = session
+
+    return client
+
+
+def test_results_are_in_request_order(node, session, batch_client):
+    node.mine_empty_blocks(2)
+
+    results = batch_client.request_batch('eth_getBlockByNumber', [[hex(n), False] for n in range(3)])
+
+    assert [int(block['number'], 16) for block in results] == [0, 1, 2]
+    assert [len(batch) for batch in session.batches] == [2, 1]
+
+
+def test_errors_are_returned_in_place(node, batch_client):
+    node.respond_to_call(TOKEN_ADDRESS, 'decimals()', ['uint8'], [18])
+
+    results = batch_client.eth_call_batch([
+        {'to': TOKEN_ADDRESS, 'data': '0x313ce567'},
+        {'to': TOKEN_ADDRESS, 'data': '0x95d89b41'}
+    ])
+
+    assert int(results[0], 16) == 18
+    assert isinstance(results[1], Exception)
+    assert 'execution reverted' in str(results[1])
+
+
+def test_missing_responses_raise(session, batch_client):
+    from eth_manager.exceptions import IncompleteBatchResponseError
+
+    session.dropped_ids = {1}
+
+    with pytest.raises(IncompleteBatchResponseError):
+        batch_client.request_batch('eth_blockNumber', [[], [], []])
+
+
+def test_call_contract_functions(node, processor, session):
+    processor.rpc_batch_client.session = session
+
+    node.respond_to_call(TOKEN_ADDRESS, 'balanceOf(address)', ['uint256'], [1234])
+    node.respond_to_call(TOKEN_ADDRESS, 'symbol()', ['string'], ['SEMPO'])
+
+    results = processor.call_contract_functions([
+        {'contract_address': TOKEN_ADDRESS, 'abi_type': 'ERC20', 'function': 'balanceOf', 'args': [RECIPIENT_ADDRESS]},
+        {'contract_address': TOKEN_ADDRESS, 'abi_type': 'ERC20', 'function': 'symbol'},
+        {'contract_address': TOKEN_ADDRESS, 'abi_type': 'ERC20', 'function': 'decimals'}
+    ], block_identifier=0)
+
+    assert results == [1234, 'SEMPO', None]
+
+    calls = [request['params'] for request in session.batches[0]]
+    assert calls[0][0]['data'] == '0x70a08231' + RECIPIENT_ADDRESS[2:].lower().rjust(64, '0')
+    assert all(block_identifier == '0x0' for _, block_identifier in calls)
@@ -0,0 +1,93 @@
+import pytest
+
+from eth_keys import keys
+
+
+@pytest.fixture(scope='function')
+def key_cache(persistence_interface):
+    from eth_manager.signing_key_cache import SigningKeyCache
+
+    # Flushed on every count, so the metrics can be read straight away
+    return SigningKeyCache(persistence_interface.metrics, max_size=2, flush_interval_seconds=0)
+
+
+@pytest.fixture(scope='function')
+def create_wallet(persistence_interface):
+    return persistence_interface.create_new_blockchain_wallet
+
+
+def counts(metrics):
+    all_metrics = metrics.get_all()
+    return all_metrics.get('signing_key_cache_hits', 0), all_metrics.get('signing_key_cache_misses', 0)
+
+
+def test_key_is_decrypted_once(key_cache, create_wallet):
+    wallet = create_wallet()
+
+    private_key = key_cache.get_private_key(wallet)
+    assert isinstance(private_key, keys.PrivateKey)
+    assert private_key.public_key.to_checksum_address() == wallet.address
+
+    assert key_cache.get_private_key(wallet) is private_key
+    assert counts(key_cache.metrics) == (1, 1)
+    assert key_cache.metrics.get_all()['signing_key_decrypt_us'] > 0
+
+
+def test_rotated_key_is_not_served_from_cache(key_cache, create_wallet):
+    wallet = create_wallet()
+
+    old_key = key_cache.get_private_key(wallet)
+
+    # Re-encrypting the same key gives a new ciphertext, as rotating the encryption secret would
+    wallet.private_key = wallet.private_key
+
+    assert key_cache.get_private_key(wallet) == old_key
+    assert counts(key_cache.metrics) == (0, 2)
+
+    new_wallet_key = create_wallet().private_key
+    wallet.private_key = new_wallet_key
+
+    assert key_cache.get_private_key(wallet) == keys.PrivateKey(bytes.fromhex(new_wallet_key.replace('0x', '')))
+    assert counts(key_cache.metrics) == (0, 3)
+
+
+def test_expired_key_is_decrypted_again(key_cache, create_wallet):
+    key_cache.ttl_seconds = 0
+    wallet = create_wallet()
+
+    key_cache.get_private_key(wallet)
+    key_cache.get_private_key(wallet)
+
+    assert counts(key_cache.metrics) == (0, 2)
+
+
+def test_least_recently_used_key_is_evicted(key_cache, create_wallet):
+    first, second, third = create_wallet(), create_wallet(), create_wallet()
+
+    key_cache.get_private_key(first)
+    key_cache.get_private_key(second)
+    key_cache.get_private_key(first)
+    key_cache.get_private_key(third)
+
+    assert counts(key_cache.metrics) == (1, 3)
+
+    key_cache.get_private_key(first)
+    assert counts(key_cache.metrics) == (2, 3)
+
+    key_cache.get_private_key(second)
+    assert counts(key_cache.metrics) == (2, 4)
+
+
+def test_clear_drops_keys_and_flushes_counts(key_cache, create_wallet):
+    key_cache.flush_interval_seconds = 60
+    wallet = create_wallet()
+
+    key_cache.get_private_key(wallet)
+    assert counts(key_cache.metrics) == (0, 0)
+
+    key_cache.clear()
+    assert counts(key_cache.metrics) == (0, 1)
+
+    key_cache.get_private_key(wallet)
+    key_cache.clear()
+    assert counts(key_cache.metrics) == (0, 2)
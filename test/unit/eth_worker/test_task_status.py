@@ -0,0 +1,79 @@
+import threading
+import time
+
+import pytest
+
+from share import blockchain_task_status as task_status
+
+
+@pytest.fixture(scope='function')
+def transfer_task(persistence_interface, send_transfer):
+    return send_transfer().task
+
+
+def await_success(persistence_interface, task, timeout, recheck_interval=5):
+    return task_status.await_task_success(
+        persistence_interface.red, task.uuid,
+        lambda: persistence_interface.get_cached_task_status(task.uuid),
+        timeout=timeout, recheck_interval=recheck_interval
+    )
+
+
+def test_task_status_is_cached_and_published(persistence_interface, transfer_task):
+    pubsub = persistence_interface.subscribe_to_task_status(transfer_task.uuid)
+    # Reads the subscription's confirmation, which is otherwise returned as None in place of the first message
+    pubsub.get_message(timeout=1)
+
+    persistence_interface.update_transaction_data(transfer_task.transactions[0].id, {'status': 'SUCCESS'})
+
+    assert persistence_interface.get_cached_task_status(transfer_task.uuid) == 'SUCCESS'
+    assert pubsub.get_message(timeout=1)['data'] == b'SUCCESS'
+
+
+def test_task_that_already_succeeded_returns_immediately(persistence_interface, transfer_task):
+    # Succeeded before anything subscribed, so the only record of it is the cached status
+    persistence_interface.update_transaction_data(transfer_task.transactions[0].id, {'status': 'SUCCESS'})
+
+    start = time.time()
+    assert await_success(persistence_interface, transfer_task, timeout=5) == 'SUCCESS'
+    assert time.time() - start < 1
+
+
+def test_waits_for_published_success(persistence_interface, eth_database, transfer_task):
+    from sqlalchemy.orm import sessionmaker
+    from sql_persistence.interface import SQLPersistenceInterface
+
+    # As another worker would, with its own session
+    other_worker = SQLPersistenceInterface(
+        w3=persistence_interface.w3, red=persistence_interface.red,
+        session_factory=sessionmaker(bind=eth_database), metrics=persistence_interface.metrics
+    )
+    transaction_id = transfer_task.transactions[0].id
+
+    def succeed():
+        time.sleep(0.2)
+        other_worker.update_transaction_data(transaction_id, {'status': 'SUCCESS'})
+        other_worker.session.remove()
+
+    thread = threading.Thread(target=succeed)
+    thread.start()
+
+    start = time.time()
+    # The recheck interval is long enough that only the published status can end the wait in time
+    assert await_success(persistence_interface, transfer_task, timeout=10, recheck_interval=5) == 'SUCCESS'
+    assert time.time() - start < 2
+
+    thread.join()
+
+
+def test_timeout(persistence_interface, transfer_task):
+    start = time.time()
+
+    with pytest.raises(TimeoutError):
+        await_success(persistence_interface, transfer_task, timeout=0.5, recheck_interval=0.1)
+
+    assert 0.5 <= time.time() - start < 2
+
+
+def test_unknown_task_returns_none(red):
+    assert task_status.await_task_success(red, 'no-such-task', lambda: None, timeout=5) is None
@@ -0,0 +1,137 @@
+import datetime
+import importlib.util
+import os
+from uuid import uuid4
+
+import pytest
+
+from conftest import TOKEN_ADDRESS, RECIPIENT_ADDRESS
+
+STATUS_MIGRATION = os.path.join(
+    os.path.dirname(__file__), '..', '..', '..', 'eth_worker', 'migrations', 'versions', 'c5a91e3f7d28_.py'
+)
+
+
+@pytest.fixture(scope='function')
+def make_task(persistence_interface, signing_wallet):
+    """
+    Creates a task with a transaction in each of the given statuses
+    """
+    def inner(*transaction_statuses):
+        task = persistence_interface.create_function_task(
+            str(uuid4()), signing_wallet, TOKEN_ADDRESS, 'ERC20', 'transfer', [RECIPIENT_ADDRESS, 100]
+        )
+        for status in transaction_statuses:
+            transaction = persistence_interface.create_blockchain_transaction(task.uuid)
+            persistence_interface.update_transaction_data(transaction.id, {'status': status})
+
+        return task
+
+    return inner
+
+
+def assert_status(persistence_interface, task, expected_status):
+    persistence_interface.session.expire_all()
+
+    assert task.status == expected_status
+    assert task.computed_status == expected_status
+    assert persistence_interface.get_cached_task_status(task.uuid) == expected_status
+
+
+@pytest.mark.parametrize("transaction_statuses, expected_status", [
+    ([], 'UNSTARTED'),
+    (['PENDING'], 'PENDING'),
+    (['FAILED'], 'FAILED'),
+    (['FAILED', 'PENDING'], 'PENDING'),
+    (['FAILED', 'FAILED', 'SUCCESS'], 'SUCCESS'),
+])
+def test_status_follows_transactions(persistence_interface, make_task, transaction_statuses, expected_status):
+    task = make_task(*transaction_statuses)
+
+    assert_status(persistence_interface, task, expected_status)
+    assert persistence_interface.get_tasks_with_stale_status() == []
+
+
+def test_status_follows_bulk_transaction_updates(persistence_interface, make_task):
+    tasks = [make_task('PENDING'), make_task('PENDING')]
+
+    persistence_interface.bulk_update_transaction_data([(t.transactions[0].id, {'status': 'SUCCESS'}) for t in tasks])
+
+    for task in tasks:
+        assert_status(persistence_interface, task, 'SUCCESS')
+
+
+def test_status_follows_expired_transactions(persistence_interface, make_task):
+    task = make_task('PENDING')
+
+    # Expired by a query level bulk update, which the session doesn't see
+    persistence_interface.update_transaction_data(task.transactions[0].id, {
+        'updated': datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+    })
+    persistence_interface._fail_expired_transactions()
+
+    assert_status(persistence_interface, task, 'FAILED')
+
+
+def test_status_text_changes_keep_status(persistence_interface, make_task):
+    task = make_task('SUCCESS')
+
+    persistence_interface.set_task_status_text(task, 'SUCCESS')
+
+    assert_status(persistence_interface, task, 'SUCCESS')
+    assert persistence_interface.get_tasks_with_stale_status() == []
+
+
+def test_status_is_recalculated_in_the_same_commit(persistence_interface, eth_database, make_task):
+    task = make_task('PENDING')
+
+    transaction = task.transactions[0]
+    transaction.status = 'SUCCESS'
+
+    # Seen by the database only as part of the commit that changes the transaction
+    assert eth_database.execute(f"SELECT _status FROM blockchain_task WHERE id = {task.id}").scalar() == 'PENDING'
+    persistence_interface.session.commit()
+    assert eth_database.execute(f"SELECT _status FROM blockchain_task WHERE id = {task.id}").scalar() == 'SUCCESS'
+
+
+def test_rolled_back_status_changes_are_not_cached(persistence_interface, make_task):
+    task = make_task('PENDING')
+
+    task.transactions[0].status = 'SUCCESS'
+    persistence_interface.session.flush()
+    persistence_interface.session.rollback()
+
+    # Nothing left over from the rolled back changes is applied by the next commit
+    persistence_interface.session.commit()
+
+    assert_status(persistence_interface, task, 'PENDING')
+
+
+def test_migration_backfills_status(persistence_interface, eth_database, make_task):
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+
+    expected_statuses = {
+        make_task().id: 'UNSTARTED',
+        make_task('PENDING').id: 'PENDING',
+        make_task('FAILED').id: 'FAILED',
+        make_task('FAILED', 'PENDING').id: 'PENDING',
+        make_task('FAILED', 'SUCCESS').id: 'SUCCESS'
+    }
+
+    # Releases the session's locks, so the migration can alter the table
+    persistence_interface.session.remove()
+
+    spec = importlib.util.spec_from_file_location('status_migration', STATUS_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    with eth_database.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.downgrade()
+            migration.upgrade()
+
+    statuses = dict(eth_database.execute("SELECT id, _status FROM blockchain_task").fetchall())
+
+    assert statuses == expected_statuses
+    assert persistence_interface.get_tasks_with_stale_status() == []
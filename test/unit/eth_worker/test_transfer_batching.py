@@ -0,0 +1,172 @@
+import pytest
+import asyncio
+from uuid import uuid4
+
+from eth_utils import function_signature_to_4byte_selector, encode_hex
+
+from conftest import TOKEN_ADDRESS, NodeError
+
+MULTI_TRANSFER_ADDRESS = '0x1F2e3d4c5B6A79880716253443526170f8e9daCb'
+ORGANISATION_ADDRESS = '0x5b3a1F9C7E2D4B6A8C0E1f3a5B7d9c2E4F6a8b0c'
+
+
+@pytest.fixture(scope='function')
+def batching_processor(node, processor):
+    processor.multi_transfer_contract_address = MULTI_TRANSFER_ADDRESS
+    node.respond_to_call(TOKEN_ADDRESS, 'allowance(address,address)', ['uint256'], [10 ** 18])
+
+    return processor
+
+
+@pytest.fixture(scope='function')
+def queue_transfers(batching_processor, persistence_interface, signing_wallet):
+    """
+    Queues transfers to be batched, of the signing wallet's own tokens, or of the organisation's with transferFrom
+    """
+    def inner(function, count=3):
+        transactions = []
+        for i in range(1, count + 1):
+            recipient = '0x{:040x}'.format(i)
+            args = [recipient, i * 10] if function == 'transfer' else [ORGANISATION_ADDRESS, recipient, i * 10]
+
+            task = persistence_interface.create_function_task(
+                str(uuid4()), signing_wallet, TOKEN_ADDRESS, 'ERC20', function, args
+            )
+            transaction = persistence_interface.create_blockchain_transaction(task.uuid)
+
+            assert batching_processor.is_batchable_transfer(task)
+            batching_processor.queue_batched_transfer(task, transaction)
+
+            transactions.append(transaction)
+
+        return transactions
+
+    return inner
+
+
+def selector(function_signature):
+    return encode_hex(function_signature_to_4byte_selector(function_signature))
+
+
+def test_transfer_from_calls_are_queued_by_source(batching_processor, queued_tasks, signing_wallet, queue_transfers):
+    queue_transfers('transferFrom')
+    queue_transfers('transfer')
+
+    # One batch is scheduled for each source, however many transfers join it
+    assert queued_tasks.args_for('_process_transfer_batch') == [
+        (signing_wallet.address, TOKEN_ADDRESS, ORGANISATION_ADDRESS),
+        (signing_wallet.address, TOKEN_ADDRESS, signing_wallet.address),
+    ]
+
+
+@pytest.mark.parametrize("function, from_address, batch_function", [
+    ('transfer', None, 'multiTransfer(address,address[],uint256[])'),
+    ('transferFrom', ORGANISATION_ADDRESS, 'multiTransferFrom(address,address,address[],uint256[])'),
+])
+def test_transfers_are_sent_as_one_batch(node, batching_processor, persistence_interface, signing_wallet,
+                                         queue_transfers, function, from_address, batch_function):
+    transactions = queue_transfers(function)
+    carrier = transactions[0]
+
+    batch_id = batching_processor.process_transfer_batch(signing_wallet.address, TOKEN_ADDRESS, from_address)
+    assert batch_id == carrier.id
+
+    sent, = node.sent_transactions()
+    assert sent['to'] == MULTI_TRANSFER_ADDRESS
+    assert sent['data'].startswith(selector(batch_function))
+
+    recorded = [persistence_interface.get_transaction(t.id) for t in transactions]
+    assert all(t.hash == sent['hash'] and t.nonce == sent['nonce'] and t.batch_size == 3 for t in recorded)
+    assert all(t.submitted_date is not None and t.nonce_consumed for t in recorded)
+
+    # Only the carrier is rebroadcast
+    assert [t.raw_transaction is not None for t in recorded] == [True, False, False]
+
+
+def test_async_batch_is_marked_submitted_once_sent(node, red, batching_processor, persistence_interface,
+                                                   signing_wallet, queue_transfers):
+    from eth_manager.async_submitter import AsyncSubmitter, ASYNC_SUBMIT_QUEUE_KEY
+
+    batching_processor.submit_pipeline = 'async'
+    batching_processor.transaction_watcher = 'block'
+
+    transactions = queue_transfers('transfer')
+    carrier = transactions[0]
+
+    batching_processor.process_transfer_batch(signing_wallet.address, TOKEN_ADDRESS)
+
+    assert node.sent_transactions() == []
+    assert [int(i) for i in red.lrange(ASYNC_SUBMIT_QUEUE_KEY, 0, -1)] == [carrier.id]
+
+    recorded = [persistence_interface.get_transaction(t.id) for t in transactions]
+    assert all(t.hash == recorded[0].hash and t.submitted_date is None for t in recorded)
+
+    submitter = AsyncSubmitter(red, persistence_interface, batching_processor)
+
+    async def rpc(method, params):
+        return node.make_request(method, params)['result']
+
+    submitter.rpc = rpc
+
+    asyncio.get_event_loop().run_until_complete(submitter._submit(carrier.id))
+
+    assert [t['hash'] for t in node.sent_transactions()] == [recorded[0].hash]
+    assert all(persistence_interface.get_transaction(t.id).submitted_date is not None for t in transactions)
+
+
+def test_transfers_are_sent_individually_without_allowance(node, batching_processor, queued_tasks, signing_wallet,
+                                                           queue_transfers):
+    node.respond_to_call(TOKEN_ADDRESS, 'allowance(address,address)', ['uint256'], [59])
+
+    transactions = queue_transfers('transferFrom')
+
+    assert batching_processor.process_transfer_batch(
+        signing_wallet.address, TOKEN_ADDRESS, ORGANISATION_ADDRESS
+    ) is None
+
+    assert node.sent_transactions() == []
+    assert [args[0] for args in queued_tasks.args_for('_process_function_transaction')] == [
+        t.id for t in transactions
+    ]
+
+
+def test_failed_batch_is_retried_per_transfer(mocker, node, batching_processor, persistence_interface, queued_tasks,
+                                              signing_wallet, queue_transfers):
+    transactions = queue_transfers('transfer')
+
+    mocker.patch.object(node, 'eth_sendRawTransaction', side_effect=NodeError('insufficient funds'))
+
+    assert batching_processor.process_transfer_batch(signing_wallet.address, TOKEN_ADDRESS) is None
+
+    assert all(persistence_interface.get_transaction(t.id).status == 'FAILED' for t in transactions)
+
+    # Each transfer gets its own new attempt, rather than the batch being sent again
+    assert sorted(args[0] for args in queued_tasks.args_for('_attempt_transaction')) == sorted(
+        t.task.uuid for t in transactions
+    )
+    assert batching_processor.metrics.get_all()['transfer_batch_failures'] == 1
+
+
+@pytest.mark.parametrize("status", [1, 0])
+def test_batched_transfers_resolve_individually(node, block_watcher, batching_processor, persistence_interface,
+                                                queued_tasks, signing_wallet, queue_transfers, status):
+    transactions = queue_transfers('transfer')
+    batching_processor.process_transfer_batch(signing_wallet.address, TOKEN_ADDRESS)
+
+    node.mine(persistence_interface.get_transaction(transactions[0].id).hash, status=status, gas_used=150000)
+
+    assert block_watcher.process_block(1) == 3
+
+    for transaction in transactions:
+        transaction = persistence_interface.get_transaction(transaction.id)
+        assert transaction.status == ('SUCCESS' if status else 'FAILED')
+
+    if status:
+        assert queued_tasks.args_for('_attempt_transaction') == []
+    else:
+        assert sorted(args[0] for args in queued_tasks.args_for('_attempt_transaction')) == sorted(
+            t.task.uuid for t in transactions
+        )
+
+    # The gas used by the whole batch says nothing about a single transfer
+    assert batching_processor.gas_profiles.get_gas_used(TOKEN_ADDRESS, 'ERC20', 'transfer') is None